@@ -1,18 +1,37 @@
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 from typing import Dict, List
-import pyttsx3
-import threading
+from concurrent.futures import ThreadPoolExecutor
+import importlib
+import sqlite3
 
 # Data models
 from models.user_model import UserModel, MAX_USERS
 from models.pacing_model import PacingModel
+from models.param_history import ParameterHistory
+from models.audit_log import AuditLog
+from models.announcer import Announcer
+from models.event_bus import EventBus, COMM_STATUS, VERIFY_RESULT, ERROR, NOTIFY
+from models.egram_acquisition import EgramAcquisition
 from models.serial_comms import SerialManager
-
-# Views
-from views.login_views import Welcome, Register
-from views.main_view import MainFrame, DataEntry, DebugLED
-from views.egram_view import EgramView
+from models.serial_capture import RawCapture
+from models import brady_sim
+from models import profile_io
+from models import parameter_rules
+from views import notifications
+from views.notifications import ToastStack
+
+# Views: name -> (module, class). Each screen is imported and built the first
+# time it is shown, so the egram screen's matplotlib setup doesn't delay login.
+FRAME_CLASSES = {
+    "Welcome": ("views.login_views", "Welcome"),
+    "Register": ("views.login_views", "Register"),
+    "MainFrame": ("views.main_view", "MainFrame"),
+    "DataEntry": ("views.main_view", "DataEntry"),
+    "DebugLED": ("views.main_view", "DebugLED"),
+    "EgramView": ("views.egram_view", "EgramView"),
+    "EgramBrowser": ("views.egram_browser", "EgramBrowser"),
+}
 
 # Appearance
 ctk.set_appearance_mode("System")
@@ -35,14 +54,33 @@ class DCMApp(ctk.CTk):
         self.resizable(True, True)
         self.minsize(800, 500)
 
-        # Models and session
-        self.user_model = UserModel()
-        self.pacing_model = PacingModel()
+        # Worker threads reach the UI only through the bus (see models/event_bus.py)
+        self.bus = EventBus()
+        self.bus.attach(self)
+        self.bus.subscribe(ERROR, self._show_error)
+        self.bus.subscribe(NOTIFY, self.notify)
+
+        # Models and session (their saves are written in the background; failures come back on the bus)
+        self.user_model = UserModel(on_write_error=self._on_write_error)
+        self.pacing_model = PacingModel(on_write_error=self._on_write_error)
+        self.param_history = ParameterHistory(on_write_error=self._on_write_error)
         self.serial_manager = SerialManager() 
+        self.egram_acquisition = EgramAcquisition(self.serial_manager, self.bus)
+        self.audit_log = AuditLog(on_write_error=self._on_write_error)
+        self.serial_manager.audit = self.audit_log
+        # Raw byte capture for protocol debugging (off unless started)
+        self.raw_capture = RawCapture()
+        # Speech engine warms up on its own thread while the login screen shows
+        self.announcer = Announcer()
         self.current_user: str | None = None
+        # Bulk profile/audit import and export run here, off the Tk thread
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-io")
+        # Board round trips (e.g. verify) run here, one at a time
+        self._comm_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="comm")
 
         # --- ACCESSIBILITY STATE ---
-        self.current_font_size = 14  # Default size
+        self.DEFAULT_FONT_SIZE = 14
+        self.current_font_size = self.DEFAULT_FONT_SIZE
         self.MIN_FONT_SIZE = 10
         self.MAX_FONT_SIZE = 24
 
@@ -57,13 +95,43 @@ class DCMApp(ctk.CTk):
         self.container.grid_rowconfigure(0, weight=1)
         self.container.grid_columnconfigure(0, weight=1)
 
+        # Only the screens built so far (see _get_frame)
         self.frames: Dict[str, ctk.CTkFrame] = {}
-        for F in (Welcome, Register, MainFrame, DataEntry, DebugLED, EgramView):
-            frame = F(parent=self.container, controller=self)
-            self.frames[F.__name__] = frame
-            frame.grid(row=0, column=0, sticky="nsew")
+        self.current_frame: str | None = None
+        # Comm and I/O results are toasts, not modal dialogs, so streaming never stalls
+        self.toasts = ToastStack(self, self.current_font_size)
 
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
         self.show_frame("Welcome")
+
+    def _on_close(self):
+        """Flushes pending saves before the window goes away."""
+        self.announcer.close()
+        self.egram_acquisition.stop()
+        self._comm_pool.shutdown(wait=True)
+        self.disconnect_serial()
+        self.serial_manager.capture = None
+        self.raw_capture.stop()
+        self._io_pool.shutdown(wait=True)
+        failed = {}
+        for name, model in (("Pacing settings", self.pacing_model), ("Parameter history", self.param_history),
+                            ("Audit log", self.audit_log), ("Accounts", self.user_model)):
+            for key, error in model.close().items():
+                failed[f"{name} {key}"] = error
+        self.bus.detach()
+        if failed:
+            lines = "\n".join(f"{what}: {error}" for what, error in failed.items())
+            messagebox.showerror("Save Error", f"These changes could not be written to disk:\n{lines}")
+        self.destroy()
+
+    def _on_write_error(self, store: str, key, error: Exception):
+        """A background save failed for good (persistence worker thread)."""
+        if store == "pacing-store" and isinstance(key, tuple) and len(key) == 2:
+            what = f"{key[1]} settings for {key[0]}"
+        else:
+            what = f"{store} ({key})"
+        self.bus.publish(NOTIFY, notifications.ERROR, "Save Error",
+                         f"{what} could not be saved: {error}\nChanges are kept for this session only.")
     
     # ---------------- Accessibility ----------------
     def increase_font_size(self):
@@ -81,19 +149,63 @@ class DCMApp(ctk.CTk):
         for frame in self.frames.values():
             if hasattr(frame, "update_font_size"):
                 frame.update_font_size(self.current_font_size)
+        self.toasts.update_font_size(self.current_font_size)
 
     # ---------------- Navigation ----------------
+    def _get_frame(self, frame_name: str) -> ctk.CTkFrame:
+        """Returns a screen, importing and building it on first use."""
+        frame = self.frames.get(frame_name)
+        if frame is None:
+            module_name, class_name = FRAME_CLASSES[frame_name]
+            frame_class = getattr(importlib.import_module(module_name), class_name)
+            frame = frame_class(parent=self.container, controller=self)
+            frame.grid(row=0, column=0, sticky="nsew")
+            self.frames[frame_name] = frame
+
+            # Catch the new screen up with state set before it existed
+            if self.current_font_size != self.DEFAULT_FONT_SIZE and hasattr(frame, "update_font_size"):
+                frame.update_font_size(self.current_font_size)
+            if hasattr(frame, "set_user"):
+                frame.set_user(self.current_user or "")
+            if hasattr(frame, "update_comm_status"):
+                frame.update_comm_status(self.connected, self.current_device_id)
+        return frame
+
+    def _set_user_on_frames(self, username: str):
+        for frame in self.frames.values():
+            if hasattr(frame, "set_user"):
+                frame.set_user(username)
+
     def show_frame(self, frame_name: str):
-        frame = self.frames[frame_name]
+        frame = self._get_frame(frame_name)
+        # Screens stay stacked (tkraise), so tell them when they are covered/uncovered
+        previous = self.frames.get(self.current_frame)
+        if previous is not None and previous is not frame and hasattr(previous, "on_hide"):
+            previous.on_hide()
+        self.current_frame = frame_name
         if frame_name == "Welcome":
             frame.refresh_user_count()
-        if frame_name == "MainFrame":
-            self._push_comm_status_to_ui()
         frame.tkraise()
+        if hasattr(frame, "on_show"):
+            frame.on_show()
 
     # ---------------- Authentication ----------------
+    def _when_done(self, future, callback):
+        """Calls back on the Tk thread with a worker Future's result once it completes."""
+        def done(f):
+            try:
+                result = f.result()
+            except Exception as e:
+                self.bus.publish(ERROR, "Error", str(e))
+                return
+            self.bus.call(callback, *result)
+        future.add_done_callback(done)
+
     def handle_register(self, username: str, password: str):
-        ok, msg = self.user_model.register_user(username, password)
+        # Password hashing runs off the Tk thread
+        self._when_done(self.user_model.register_user_async(username, password), self._on_register_done)
+
+    def _on_register_done(self, ok: bool, msg: str):
         if ok:
             messagebox.showinfo("Success", msg)
             self.show_frame("Welcome")
@@ -101,20 +213,23 @@ class DCMApp(ctk.CTk):
             messagebox.showerror("Error", msg)
 
     def handle_login(self, username: str, password: str):
-        ok, msg = self.user_model.authenticate(username, password)
+        username = username.strip()
+        future = self.user_model.authenticate_async(username, password)
+        self._when_done(future, lambda ok, msg: self._on_login_done(username, ok, msg))
+
+    def _on_login_done(self, username: str, ok: bool, msg: str):
         if ok:
             self.current_user = username
-            self.frames["MainFrame"].set_user(username)
-            self.frames["DataEntry"].set_user(username)
-            self._push_comm_status_to_ui()
+            self.audit_log.set_context(username, self.current_device_id)
+            self._set_user_on_frames(username)
             self.show_frame("MainFrame")
         else:
             messagebox.showerror("Error", msg)
 
     def handle_logout(self):
         self.current_user = None
-        self.frames["MainFrame"].set_user("")
-        self.frames["DataEntry"].set_user("")
+        self.audit_log.set_context(None, self.current_device_id)
+        self._set_user_on_frames("")
         self.disconnect_serial()
         self.show_frame("Welcome")
 
@@ -124,13 +239,13 @@ class DCMApp(ctk.CTk):
             messagebox.showerror("Error", "Not logged in.")
             return
         settings = self.pacing_model.load_settings(self.current_user, mode)
-        self.frames["DataEntry"].set_pacing_mode(mode, settings)
+        self._get_frame("DataEntry").set_pacing_mode(mode, settings)
         self.show_frame("DataEntry")
 
     def handle_save_settings(self, mode: str, data: Dict[str, str]):
         """Saves locally and sends to board."""
         if not self.current_user:
-            messagebox.showerror("Error", "Not logged in.")
+            self.notify(notifications.ERROR, "Error", "Not logged in.")
             return
         
         # 1. Save locally
@@ -138,6 +253,7 @@ class DCMApp(ctk.CTk):
         msg = f"{mode} settings have been saved locally."
 
         # 2. Send to Hardware (if connected)
+        success = True
         if self.connected:
             success = self._send_settings_to_board(mode, data)
             if success:
@@ -147,98 +263,50 @@ class DCMApp(ctk.CTk):
         else:
             msg += "\n(Board not connected, so not sent)."
         
-        messagebox.showinfo("Result", msg)
+        self.notify(notifications.SUCCESS if success else notifications.WARNING, "Result", msg)
         self.show_frame("MainFrame")
 
     def handle_send_parameters(self, mode: str, data: Dict[str, str]):
         """Sends parameters to board WITHOUT saving to disk."""
         if not self.connected:
-            messagebox.showerror("Comm Error", "Board is NOT connected. Cannot send.")
+            self.notify(notifications.ERROR, "Comm Error", "Board is NOT connected. Cannot send.")
             return
 
         success = self._send_settings_to_board(mode, data)
         if success:
-            messagebox.showinfo("Success", "Parameters sent to board successfully.")
+            self.notify(notifications.SUCCESS, "Success", "Parameters sent to board successfully.")
         else:
             # _send_settings_to_board already shows a specific error
             pass
 
     def _send_settings_to_board(self, mode_str: str, data: Dict[str, str]) -> bool:
-        """Helper to convert dict strings to commands and send."""
-        # Mode Mapping
-        mode_map = {
-            "AOO": 0, "VOO": 1, "AAI": 2, "VVI": 3,
-            "AOOR": 4, "VOOR": 5, "AAIR": 6, "VVIR": 7
-        } 
-        mode_int = mode_map.get(mode_str, 0)
-
-        # Threshold Mapping (Text -> Float)
-        thresh_map = {
-            "V-Low": 1.5, "Low": 2.0, "Med-Low": 2.5, "Med": 3.0, 
-            "Med-High": 3.5, "High": 4.0, "V-High": 4.5
-        }
-
+        """Validates and packs the settings in one pass, then sends the packet."""
         try:
-            # Handle Activity Threshold Conversion
-            act_str = data.get("Activity Threshold", "Med")
-            act_float = thresh_map.get(act_str, 3.0) 
-            # Scale by 10 (e.g., 1.5 -> 15)
-            act_thresh_uint8 = int(act_float * 10)
-
-            # NOTE: We use valid defaults (not 0) for parameters missing in the current mode.
-            # This ensures the firmware doesn't reject the packet due to out-of-range values.
-            
-            params = {
-                "mode": mode_int,
-                "lrl": int(data.get("Lower Rate Limit", 60)),
-                "msr": int(data.get("Maximum Sensor Rate", 120)), 
-                
-                # Amplitudes default to 3.5V if missing (0 might be invalid)
-                "a_amp": float(data.get("Atrial Amplitude", 3.5)),
-                "v_amp": float(data.get("Ventricular Amplitude", 3.5)),
-                
-                # Pulse Widths default to 1.0ms if missing
-                # Must be float because input might be "0.5"
-                "a_pw": float(data.get("Atrial Pulse Width", 1.0)),
-                "v_pw": float(data.get("Ventricular Pulse Width", 1.0)),
-                
-                # Sensitivity default 2.5mV
-                "a_sens": float(data.get("Atrial Sensitivity", 2.5)),
-                "v_sens": float(data.get("Ventricular Sensitivity", 2.5)),
-                
-                # Refractory Periods default to standard values (not 0)
-                "a_ref": int(data.get("ARP") or data.get("PVARP") or 250), 
-                "v_ref": int(data.get("VRP", 320)),
-                
-                "hyst": int(data.get("Hysteresis", 0)),
-                
-                # Rate Adaptive Defaults (Crucial for Packet Acceptance)
-                "recov": int(data.get("Recovery Time", 5)),       # Range 2-16
-                "resp_fact": int(data.get("Response Factor", 8)), # Range 1-16
-                "act_thresh": act_thresh_uint8,                   # Defaults to Med (30)
-                "react_time": int(data.get("Reaction Time", 30))  # Range 10-50
-            }
-
-            success = self.serial_manager.send_params(params)
-            
-            if not success:
-                messagebox.showerror("Comm Error", "Failed to send parameters to board.")
-                return False
-            return True
-
+            packet = parameter_rules.encode_settings(mode_str, data)
         except ValueError as e:
-            messagebox.showerror("Data Error", f"Invalid number format: {e}")
+            self.notify(notifications.ERROR, "Data Error", f"Invalid parameters: {e}")
             return False
 
+        success = self.serial_manager.send_params(packet)
+        if not success:
+            self.announcer.announce("alarm")
+            self.notify(notifications.ERROR, "Comm Error", "Failed to send parameters to board.")
+            return False
+
+        # Record what the board was actually given (quantized values)
+        self.param_history.record_sent(self.current_user or "", self.current_device_id or "Unknown",
+                                       mode_str, parameter_rules.decode_packet(packet))
+        return True
+
     def send_debug_color(self, color_code: int):
         """Sends command to light up LED if connected and verified."""
         if not self.connected or self.current_device_id != "FRDM-K64F":
-            messagebox.showwarning("Access Denied", "Debug mode requires a verified FRDM-K64F connection.")
+            self.notify(notifications.WARNING, "Access Denied", "Debug mode requires a verified FRDM-K64F connection.")
             return
         
         success = self.serial_manager.send_color_command(color_code)
         if not success:
-            messagebox.showerror("Comm Error", "Failed to send LED command.")
+            self.notify(notifications.ERROR, "Comm Error", "Failed to send LED command.")
 
     def request_echo(self) -> str:
         """
@@ -255,6 +323,16 @@ class DCMApp(ctk.CTk):
         else:
             return "Echo Failed: No Data Received"
 
+    def request_verify(self):
+        """Runs verify_parameters off the Tk thread; the text arrives as VERIFY_RESULT."""
+        def run():
+            try:
+                text = self.verify_parameters()
+            except Exception as e:
+                text = f"Verification Failed:\n{e}"
+            self.bus.publish(VERIFY_RESULT, text)
+        self._comm_pool.submit(run)
+
     def verify_parameters(self) -> str:
         """Requests cardiac parameters from board and returns formatted string."""
         if not self.connected:
@@ -268,6 +346,9 @@ class DCMApp(ctk.CTk):
         if "error" in data:
             return f"Verification Failed:\n{data['error']}"
 
+        self.param_history.record_verified(self.current_user or "", self.current_device_id or "Unknown",
+                                           parameter_rules.decode_echo(bytes.fromhex(data["raw"])))
+
         # --- PRINT RAW BYTES TO TERMINAL ---
         raw_str = data.get('raw', '')
         if raw_str:
@@ -279,11 +360,7 @@ class DCMApp(ctk.CTk):
 
         # --- GUI Display ---
         mode_id = data['mode']
-        mode_names = {
-            0: "AOO", 1: "VOO", 2: "AAI", 3: "VVI",
-            4: "AOOR", 5: "VOOR", 6: "AAIR", 7: "VVIR"
-        }
-        mode_str = mode_names.get(mode_id, f"Unknown ({mode_id})")
+        mode_str = parameter_rules.MODE_NAMES.get(mode_id, f"Unknown ({mode_id})")
         
         lines = [
             f"Raw: {raw_str}", 
@@ -307,20 +384,143 @@ class DCMApp(ctk.CTk):
 
         return "\n".join(lines)
 
+    def preview_pacing(self, mode: str, data: Dict[str, str], intrinsic_bpm: float,
+                       duration_s: float = 600.0) -> str:
+        """Simulates the mode against a synthetic rhythm and returns a summary string."""
+        try:
+            config = brady_sim.config_from_settings(mode, data)
+        except (ValueError, TypeError):
+            return "Preview: enter numeric values to simulate."
+        if config.lrl <= 0:
+            return "Preview: LRL must be positive."
+
+        times, amps = brady_sim.synthetic_rhythm(intrinsic_bpm, duration_s)
+        result = brady_sim.simulate(config, times, amps, duration_s)
+        return f"{int(duration_s // 60)} min @ {intrinsic_bpm:g} bpm intrinsic\n" + result.summary_text()
+
+    def run_io(self, fn, callback):
+        """Runs fn() on the I/O worker; callback(*result) then runs on the Tk thread."""
+        self._when_done(self._io_pool.submit(fn), callback)
+
+    # ---------------- Profile import/export ----------------
+    def import_profiles(self):
+        path = filedialog.askopenfilename(
+            title="Import Profiles",
+            filetypes=[("Profiles", "*.jsonl *.csv"), ("JSON lines", "*.jsonl"), ("CSV", "*.csv")],
+        )
+        if not path:
+            return
+        errors_path = path + ".errors.csv"
+        future = self._io_pool.submit(self._import_profiles, path, errors_path)
+        self._when_done(future, self._on_import_done)
+
+    def _import_profiles(self, path: str, errors_path: str):
+        """Runs on the profile-io pool."""
+        try:
+            report = profile_io.import_profiles(path, self.pacing_model, errors_path=errors_path)
+        except (OSError, UnicodeDecodeError) as e:
+            return False, f"Import failed: {e}"
+        lines = [report.summary_text()]
+        if report.rejected:
+            lines += [f"Record {n}: {msg}" for n, msg in report.errors[:10]]
+            lines.append(f"All rejected records: {errors_path}")
+        return True, "\n".join(lines)
+
+    def _on_import_done(self, ok: bool, msg: str):
+        self.notify(notifications.SUCCESS if ok else notifications.ERROR, "Import Profiles", msg)
+
+    def export_profiles(self):
+        path = filedialog.asksaveasfilename(
+            title="Export Profiles",
+            defaultextension=".jsonl",
+            filetypes=[("JSON lines", "*.jsonl"), ("CSV", "*.csv")],
+        )
+        if not path:
+            return
+        future = self._io_pool.submit(self._export_profiles, path)
+        self._when_done(future, self._on_export_done)
+
+    def _export_profiles(self, path: str):
+        """Runs on the profile-io pool."""
+        try:
+            count = profile_io.export_profiles(path, self.pacing_model)
+        except OSError as e:
+            return False, f"Export failed: {e}"
+        return True, f"Exported {count} profiles to {path}."
+
+    def _on_export_done(self, ok: bool, msg: str):
+        self.notify(notifications.SUCCESS if ok else notifications.ERROR, "Export", msg)
+
+    def export_audit_log(self):
+        path = filedialog.asksaveasfilename(
+            title="Export Serial Audit Log", defaultextension=".csv", filetypes=[("CSV", "*.csv")],
+        )
+        if not path:
+            return
+        future = self._io_pool.submit(self._export_audit_log, path)
+        self._when_done(future, self._on_export_done)
+
+    def _export_audit_log(self, path: str):
+        """Runs on the profile-io pool."""
+        try:
+            count = self.audit_log.export_csv(path)
+        except (OSError, sqlite3.Error) as e:
+            return False, f"Export failed: {e}"
+        return True, f"Exported {count} serial transactions to {path}."
+
+    # ---------------- Raw serial capture ----------------
+    def start_capture(self) -> str:
+        """Tees every byte crossing the port to a new capture; returns its base path."""
+        path = self.raw_capture.start(self.current_user, self.current_device_id,
+                                      self.serial_manager.egram_checksum)
+        self.serial_manager.capture = self.raw_capture
+        return path
+
+    def stop_capture(self):
+        """Closes the capture and decodes it in the background (report lands next to it)."""
+        self.serial_manager.capture = None
+        path = self.raw_capture.stop()
+        if path:
+            self.run_io(lambda: self._decode_capture(path), self._on_capture_decoded)
+
+    def _decode_capture(self, path: str):
+        """Runs on the profile-io pool."""
+        from models.protocol_decoder import decode
+        from models.serial_capture import load_capture
+        try:
+            meta, chunks, data = load_capture(path)
+            decoded = decode(chunks, data, meta.get("egram_checksum", False))
+            with open(path + ".report.txt", "w") as f:
+                f.write("\n".join(decoded.summary_lines() + [""] + decoded.anomaly_lines(data, limit=1000)) + "\n")
+        except (OSError, ValueError) as e:
+            return notifications.ERROR, f"Could not decode {path}: {e}"
+        malformed = int((~decoded.packets["ok"]).sum()) + len(decoded.bad_frames)
+        clean = malformed == 0 and len(decoded.resyncs) == 0
+        return (notifications.SUCCESS if clean else notifications.WARNING,
+                f"Saved {path}.rawcap: {len(decoded.frames):,} egram frames, {len(decoded.packets):,} commands/replies, "
+                f"{len(decoded.resyncs)} resyncs, {malformed} malformed. Report: {path}.report.txt")
+
+    def _on_capture_decoded(self, severity: str, msg: str):
+        self.notify(severity, "Raw Capture", msg)
+
     # ---------------- Comms helpers ----------------
-    def _push_comm_status_to_ui(self):
-        if "MainFrame" in self.frames:
-            self.frames["MainFrame"].update_comm_status(self.connected, self.current_device_id)
+    def notify(self, severity: str, title: str, message: str):
+        """Shows a toast (Tk thread; workers publish NOTIFY or ERROR instead)."""
+        self.toasts.show(severity, title, message)
+
+    def _show_error(self, title: str, message: str):
+        self.notify(notifications.ERROR, title, message)
 
     def _set_comm_state(self, connected: bool, device_id: str | None):
         self.connected = connected
         self.current_device_id = device_id if connected else None
-        self._push_comm_status_to_ui()
+        self.audit_log.set_context(self.current_user, self.current_device_id)
+        self.bus.publish(COMM_STATUS, self.connected, self.current_device_id)
 
         if connected:
             if self.last_interrogated_device_id is not None and device_id != self.last_interrogated_device_id:
-                messagebox.showwarning(
-                    "Device Change Detected",
+                self.notify(
+                    notifications.WARNING, "Device Change Detected",
                     f"A different pacemaker is now in range.\n"
                     f"Previous: {self.last_interrogated_device_id}\nCurrent: {device_id}"
                 )
@@ -333,7 +533,7 @@ class DCMApp(ctk.CTk):
 
     def connect_serial(self, port_name_display: str):
         if not self.current_user:
-            messagebox.showerror("Error", "Please log in first.")
+            self.notify(notifications.ERROR, "Error", "Please log in first.")
             return
 
         # --- SAFETY CHECK ---
@@ -360,14 +560,20 @@ class DCMApp(ctk.CTk):
                 device_id = "Unverified Device" 
             self._play_connect_sound()
             self._set_comm_state(True, device_id)
-            messagebox.showinfo("Connected", f"Successfully connected to {port_name_display}")
+            self.notify(notifications.SUCCESS, "Connected", f"Successfully connected to {port_name_display}")
         else:
             self._set_comm_state(False, None)
-            messagebox.showerror("Connection Failed", f"Could not open {port_name_display}")
+            self.notify(notifications.ERROR, "Connection Failed", f"Could not open {port_name_display}")
 
     def disconnect_serial(self):
+        was_connected = self.connected
+        # Only a board stream depends on the port; a replay or mock stream carries on
+        if self.egram_acquisition.reading_serial:
+            self.egram_acquisition.stop()
         self._set_comm_state(False, None)
         self.serial_manager.disconnect()
+        if was_connected:
+            self.announcer.announce("disconnect")
 
     # ---------------- Utilities ----------------
     def get_user_count(self) -> int:
@@ -377,16 +583,5 @@ class DCMApp(ctk.CTk):
         return MAX_USERS
     
     def _play_connect_sound(self):
-            """Plays the connection audio in a separate thread to prevent UI freezing."""
-            def speak():
-                try:
-                    engine = pyttsx3.init()
-                    # Optional: Adjust rate/volume
-                    engine.setProperty('rate', 175) 
-                    engine.say("The pacemaking device has been connected")
-                    engine.runAndWait()
-                except Exception as e:
-                    print(f"Audio Error: {e}")
-            
-            # Run in a thread so the GUI doesn't freeze while speaking
-            threading.Thread(target=speak, daemon=True).start()
\ No newline at end of file
+        """Queues the connection announcement on the speech worker (never blocks the UI)."""
+        self.announcer.announce("connect")
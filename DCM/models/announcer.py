@@ -0,0 +1,123 @@
+# models/announcer.py
+"""
+Spoken announcements on one long-lived worker thread.
+
+The pyttsx3 engine is created once, on the worker, when the app starts, so
+an announcement never pays for engine init and the engine is never used
+from two threads. Fixed announcements are synthesized to WAV once and
+replayed from the cache where the platform can play files (winsound on
+Windows); elsewhere the warm engine speaks them.
+
+announce() never blocks: the queue is bounded, a message already waiting
+is not queued twice, and when it is full the oldest non-alarm message is
+dropped.
+"""
+import os
+import threading
+from collections import deque
+
+try:
+    import winsound
+except ImportError:  # not on Windows
+    winsound = None
+
+_DATA_DIR = os.environ.get("DCM_DATA_DIR") or os.path.dirname(os.path.abspath(__file__))
+SPEECH_CACHE_DIR = os.path.join(_DATA_DIR, "speech_cache")
+
+ANNOUNCEMENTS = {
+    "connect": "The pacemaking device has been connected",
+    "disconnect": "The pacemaking device has been disconnected",
+    "alarm": "Warning. Communication with the pacemaker failed",
+}
+# Alarms jump the queue and are never dropped for other messages
+PRIORITY_KEYS = {"alarm"}
+
+MAX_QUEUED = 4
+SPEECH_RATE = 175
+
+
+class Announcer:
+    def __init__(self, cache_dir: str = SPEECH_CACHE_DIR, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._engine = None
+        self._thread = None
+        if enabled:
+            self._thread = threading.Thread(target=self._run, name="announcer", daemon=True)
+            self._thread.start()
+
+    def announce(self, key: str):
+        """Queues a fixed announcement (see ANNOUNCEMENTS) or free text. Never blocks."""
+        with self._cond:
+            if self._closed or self._thread is None or key in self._queue:
+                return
+            if len(self._queue) >= MAX_QUEUED:
+                droppable = [k for k in self._queue if k not in PRIORITY_KEYS]
+                if not droppable:
+                    return
+                self._queue.remove(droppable[0])
+            if key in PRIORITY_KEYS:
+                self._queue.appendleft(key)
+            else:
+                self._queue.append(key)
+            self._cond.notify()
+
+    def close(self, timeout: float | None = 2.0):
+        with self._cond:
+            self._closed = True
+            self._queue.clear()
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ---------------- Worker ----------------
+    def _run(self):
+        self._warm_up()
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                key = self._queue.popleft()
+            try:
+                self._speak(key)
+            except Exception as e:
+                print(f"Audio Error: {e}")
+
+    def _warm_up(self):
+        try:
+            import pyttsx3
+            self._engine = pyttsx3.init()
+            self._engine.setProperty("rate", SPEECH_RATE)
+        except Exception as e:
+            print(f"Audio Error: {e}")
+            return
+        if winsound is None:
+            return
+        # Synthesize the fixed announcements once; later runs reuse the files
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for key, text in ANNOUNCEMENTS.items():
+            path = self._cache_path(key)
+            if not os.path.exists(path):
+                try:
+                    self._engine.save_to_file(text, path)
+                    self._engine.runAndWait()
+                except Exception as e:
+                    print(f"Audio Error: {e}")
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}_{SPEECH_RATE}.wav")
+
+    def _speak(self, key: str):
+        text = ANNOUNCEMENTS.get(key, key)
+        if winsound is not None and key in ANNOUNCEMENTS:
+            path = self._cache_path(key)
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                winsound.PlaySound(path, winsound.SND_FILENAME)
+                return
+        if self._engine is not None:
+            self._engine.say(text)
+            self._engine.runAndWait()
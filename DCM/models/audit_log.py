@@ -0,0 +1,357 @@
+# models/audit_log.py
+"""
+Append-only audit log of every serial transaction.
+
+Records are length-prefixed and written to segment files (audit_000001.log,
+...) that are only ever appended to:
+
+    [u32 length][f8 ts][u1 direction][u1 opcode][u1 outcome]
+    [u1 user_len][u1 device_len][user][device][raw bytes]
+
+length counts everything after itself. log() only queues the record; the
+persistence worker appends each batch in one write and adds a row per block
+to a SQLite index (segment, byte range, device, first/last timestamp), so
+range scans read just the blocks that can match.
+"""
+import csv
+import os
+import sqlite3
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+
+from models.persistence import WriteBehindWorker
+
+_DATA_DIR = os.environ.get("DCM_DATA_DIR") or os.path.dirname(os.path.abspath(__file__))
+AUDIT_DIR = os.path.join(_DATA_DIR, "audit")
+
+SEGMENT_BYTES = 64 * 1024 * 1024
+# A block never spans more than this, so time lookups can use the index
+BLOCK_SPAN_S = 1.0
+
+TX = 0
+RX = 1
+OUTCOME_OK = 0
+OUTCOME_FAILED = 1
+OUTCOME_TIMEOUT = 2
+OUTCOME_NAMES = {OUTCOME_OK: "ok", OUTCOME_FAILED: "failed", OUTCOME_TIMEOUT: "timeout"}
+
+_RECORD = struct.Struct("<IdBBBBB")
+_LENGTH = struct.Struct("<I")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_blocks (
+    id        INTEGER PRIMARY KEY,
+    segment   INTEGER NOT NULL,
+    offset    INTEGER NOT NULL,
+    length    INTEGER NOT NULL,
+    device_id TEXT NOT NULL,
+    ts_first  REAL NOT NULL,
+    ts_last   REAL NOT NULL,
+    records   INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_blocks_time   ON audit_blocks (ts_first);
+CREATE INDEX IF NOT EXISTS idx_blocks_device ON audit_blocks (device_id, ts_first);
+"""
+
+
+@dataclass
+class AuditRecord:
+    ts: float
+    direction: int
+    opcode: int
+    outcome: int
+    username: str
+    device_id: str
+    raw: bytes
+
+
+def _connect(path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _segment_path(directory: str, segment: int) -> str:
+    return os.path.join(directory, f"audit_{segment:06d}.log")
+
+
+def encode_record(ts: float, direction: int, opcode: int, outcome: int,
+                  username: str, device_id: str, raw: bytes) -> bytes:
+    user = username.encode("utf-8")[:255]
+    device = device_id.encode("utf-8")[:255]
+    length = _RECORD.size - _LENGTH.size + len(user) + len(device) + len(raw)
+    return b"".join((
+        _RECORD.pack(length, ts, direction, opcode & 0xFF, outcome, len(user), len(device)),
+        user, device, raw,
+    ))
+
+
+def iter_records(buf: bytes) -> Iterator[Tuple[int, int, AuditRecord]]:
+    """Yields (start offset, end offset, record) for every complete record in buf."""
+    pos, n = 0, len(buf)
+    while pos + _RECORD.size <= n:
+        length, ts, direction, opcode, outcome, user_len, device_len = _RECORD.unpack_from(buf, pos)
+        end = pos + _LENGTH.size + length
+        if end > n:
+            return
+        start = pos + _RECORD.size
+        user_end = start + user_len
+        device_end = user_end + device_len
+        yield pos, end, AuditRecord(ts, direction, opcode, outcome,
+                                    bytes(buf[start:user_end]).decode("utf-8", "replace"),
+                                    bytes(buf[user_end:device_end]).decode("utf-8", "replace"),
+                                    bytes(buf[device_end:end]))
+        pos = end
+
+
+class AuditLog:
+    def __init__(self, directory: str = AUDIT_DIR, on_write_error=None):
+        """
+        Opens (or creates) the log in directory. A tail written after the
+        last indexed block (e.g. the app was killed mid-batch) is indexed
+        again, and a torn final record is cut off.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, "audit_index.db")
+        self.conn = _connect(self.index_path)
+
+        self._lock = threading.Lock()
+        self._queue: List[tuple] = []
+        self._username = ""
+        self._device_id = ""
+
+        self._segment, self._size = self._recover()
+        self._file = None
+        self._write_conn: sqlite3.Connection | None = None
+        self._writer = WriteBehindWorker("audit-log", delay_s=0.1, on_error=on_write_error)
+
+    def set_context(self, username: str | None, device_id: str | None):
+        """User/device stamped on the records logged from now on."""
+        with self._lock:
+            self._username = username or ""
+            self._device_id = device_id or ""
+
+    # ---------------- Writes ----------------
+    def log(self, direction: int, opcode: int, raw: bytes, outcome: int = OUTCOME_OK,
+            ts: float | None = None):
+        """Queues one transaction. Cheap enough to call on every serial read/write."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            self._queue.append((ts, direction, opcode, outcome, self._username, self._device_id, bytes(raw)))
+            first = len(self._queue) == 1
+        # (a drain that gave up left its records queued; the next record retries it)
+        if first or "drain" in self._writer.failed:
+            self._writer.submit("drain", self._drain)
+
+    def _drain(self):
+        """Runs on the persistence worker thread (which owns the file and _write_conn)."""
+        with self._lock:
+            batch, self._queue = self._queue, []
+        written = 0
+        try:
+            while written < len(batch):
+                written += self._append(batch[written:])
+        except Exception:
+            # Put back what didn't make it, ahead of anything logged since
+            with self._lock:
+                self._queue[:0] = batch[written:]
+            raise
+
+    def _append(self, batch: List[tuple]) -> int:
+        """
+        Writes the leading records of batch that fit the current segment
+        (rotating first if it is full) and indexes them. Returns how many
+        were written; on failure nothing of this call is kept.
+        """
+        if self._write_conn is None:
+            self._write_conn = _connect(self.index_path, check_same_thread=False)
+        first = encode_record(*batch[0])
+        if self._size + len(first) > SEGMENT_BYTES and self._size > 0:
+            self._rotate()
+
+        size = self._size
+        blocks = []
+        chunks: List[bytes] = []
+        block = None  # [device, offset, length, ts_first, ts_last, records]
+        for item in batch:
+            ts, device_id = item[0], item[5]
+            record = first if not chunks else encode_record(*item)
+            if size + len(record) > SEGMENT_BYTES and size > 0:
+                break
+            if block is None or block[0] != device_id or ts - block[3] > BLOCK_SPAN_S:
+                if block is not None:
+                    blocks.append(block)
+                block = [device_id, size, 0, ts, ts, 0]
+            block[2] += len(record)
+            block[4] = max(block[4], ts)
+            block[5] += 1
+            chunks.append(record)
+            size += len(record)
+        blocks.append(block)
+
+        self._write_out(chunks, blocks)
+        # Only now do later blocks start after these bytes
+        self._size = size
+        return len(chunks)
+
+    def _write_out(self, chunks: List[bytes], blocks: list):
+        if self._file is None:
+            self._file = open(_segment_path(self.directory, self._segment), "ab")
+        try:
+            # Data first, then the index rows that point at it
+            self._file.write(b"".join(chunks))
+            self._file.flush()
+            with self._write_conn:
+                self._write_conn.executemany(
+                    "INSERT INTO audit_blocks (segment, offset, length, device_id, ts_first, ts_last, records) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(self._segment, offset, length, device, first, last, count)
+                     for device, offset, length, first, last, count in blocks],
+                )
+        except Exception:
+            # Cut off the unindexed bytes so the retry appends at the same offset
+            try:
+                self._file.truncate(self._size)
+            finally:
+                self._file.close()
+                self._file = None
+            raise
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._segment += 1
+        self._size = 0
+
+    def _recover(self) -> Tuple[int, int]:
+        """Finds the segment to append to, re-indexing any unindexed tail."""
+        row = self.conn.execute(
+            "SELECT segment, offset + length FROM audit_blocks ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        segment, indexed = row if row else (1, 0)
+        size = self._reindex_tail(segment, indexed)
+        # A crash right after a rotation can leave newer, unindexed segments
+        while os.path.exists(_segment_path(self.directory, segment + 1)):
+            segment += 1
+            size = self._reindex_tail(segment, 0)
+        return segment, size
+
+    def _reindex_tail(self, segment: int, indexed: int) -> int:
+        """Indexes the records of a segment after byte `indexed`. Returns the segment size."""
+        path = _segment_path(self.directory, segment)
+        if not os.path.exists(path):
+            return 0
+        with open(path, "rb") as f:
+            f.seek(indexed)
+            tail = f.read()
+
+        end, blocks, block = 0, [], None
+        for pos, end, rec in iter_records(tail):
+            if block is None or block[0] != rec.device_id or rec.ts - block[3] > BLOCK_SPAN_S:
+                if block is not None:
+                    blocks.append(block)
+                block = [rec.device_id, indexed + pos, 0, rec.ts, rec.ts, 0]
+            block[2] = indexed + end - block[1]
+            block[4] = max(block[4], rec.ts)
+            block[5] += 1
+        if block is not None:
+            blocks.append(block)
+        if end < len(tail):
+            # Torn write at the very end: drop the partial record
+            with open(path, "r+b") as f:
+                f.truncate(indexed + end)
+        if blocks:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO audit_blocks (segment, offset, length, device_id, ts_first, ts_last, records) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(segment, offset, length, device, first, last, count)
+                     for device, offset, length, first, last, count in blocks],
+                )
+        return indexed + end
+
+    # ---------------- Reads ----------------
+    def scan(self, start: float | None = None, end: float | None = None,
+             device_id: str | None = None) -> Iterator[AuditRecord]:
+        """
+        Streams the records logged between start and end (inclusive), for
+        one device or all, in log order. Only indexed blocks that can
+        contain matches are read. Uses its own index connection, so it can
+        run off the Tk thread (export_csv runs on the I/O pool).
+        """
+        self.flush()
+        clauses, args = [], []
+        if device_id is not None:
+            clauses.append("device_id = ?")
+            args.append(device_id)
+        if start is not None:
+            # ts_first bounds keep the search on idx_blocks_time/device
+            clauses.append("ts_first >= ?")
+            args.append(start - BLOCK_SPAN_S)
+            clauses.append("ts_last >= ?")
+            args.append(start)
+        if end is not None:
+            clauses.append("ts_first <= ?")
+            args.append(end)
+        conn = _connect(self.index_path, check_same_thread=False)
+        try:
+            blocks = conn.execute(
+                "SELECT segment, offset, length FROM audit_blocks"
+                + (" WHERE " + " AND ".join(clauses) if clauses else "") + " ORDER BY id",
+                args,
+            ).fetchall()
+        finally:
+            conn.close()
+
+        handle, open_segment = None, None
+        try:
+            for segment, offset, length in blocks:
+                if segment != open_segment:
+                    if handle is not None:
+                        handle.close()
+                    handle = open(_segment_path(self.directory, segment), "rb")
+                    open_segment = segment
+                handle.seek(offset)
+                for _start, _end, rec in iter_records(handle.read(length)):
+                    if (start is None or rec.ts >= start) and (end is None or rec.ts <= end):
+                        yield rec
+        finally:
+            if handle is not None:
+                handle.close()
+
+    def export_csv(self, path: str, start: float | None = None, end: float | None = None,
+                   device_id: str | None = None) -> int:
+        """Writes the matching records to a CSV file. Returns the count."""
+        count = 0
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["timestamp", "username", "device_id", "direction", "opcode", "outcome", "raw"])
+            for rec in self.scan(start, end, device_id):
+                writer.writerow([
+                    f"{rec.ts:.6f}", rec.username, rec.device_id, "TX" if rec.direction == TX else "RX",
+                    f"0x{rec.opcode:02X}", OUTCOME_NAMES.get(rec.outcome, str(rec.outcome)), rec.raw.hex().upper(),
+                ])
+                count += 1
+        os.replace(tmp_path, path)
+        return count
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Blocks until every queued record is on disk and indexed."""
+        return self._writer.flush(timeout)
+
+    def close(self):
+        failed = self._writer.close()
+        if self._file is not None:
+            self._file.close()
+        if self._write_conn is not None:
+            self._write_conn.close()
+        self.conn.close()
+        return failed
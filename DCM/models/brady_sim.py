@@ -0,0 +1,182 @@
+# models/brady_sim.py
+"""
+Event-driven model of the bradycardia modes (AOO, VOO, AAI, VVI).
+
+Given the intrinsic beats of the paced chamber (times + amplitudes) it
+produces the pace/sense markers the board would generate and the resulting
+beat-to-beat rate. Rate-adaptive modes are simulated as their base mode at
+the Lower Rate Limit (see rate_response for the sensor-driven rate).
+
+The simulation jumps from event to event (next intrinsic beat or next
+escape-interval timeout), so cost scales with the number of beats, not with
+simulated time.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+
+from models.parameter_rules import PARAMETER_SPECS
+
+# Marker codes (see docs/egram_data_model.md)
+MARK_PACE = {"A": "AP", "V": "VP"}
+MARK_SENSE = {"A": "AS", "V": "VS"}
+MARK_REFRACTORY = "()"
+
+# With Hysteresis on, the escape interval after a sensed beat is stretched
+# to this many ppm below the LRL (never below 30 ppm)
+HYSTERESIS_RATE_DROP_PPM = 10
+
+
+@dataclass
+class BradyConfig:
+    mode: str               # AOO, VOO, AAI or VVI (an R suffix is ignored)
+    lrl: float              # ppm
+    amplitude: float        # V
+    pulse_width: float      # ms
+    sensitivity: float      # mV (inhibited modes only)
+    refractory_ms: float    # ARP/VRP (inhibited modes only)
+    hysteresis: bool
+
+    @property
+    def chamber(self) -> str:
+        return self.mode[0]
+
+    @property
+    def inhibited(self) -> bool:
+        return self.mode[1:3] in ("AI", "VI")
+
+
+@dataclass
+class BradyResult:
+    times: np.ndarray       # event times (s)
+    markers: np.ndarray     # marker code per event
+    rate: np.ndarray        # ppm from the previous pace/sense (nan for the first)
+    duration_s: float
+
+    @property
+    def paced(self) -> int:
+        return int(np.count_nonzero(np.char.endswith(self.markers, "P")))
+
+    @property
+    def sensed(self) -> int:
+        return int(np.count_nonzero(np.char.endswith(self.markers, "S")))
+
+    @property
+    def mean_rate(self) -> float:
+        beats = self.paced + self.sensed
+        return 60.0 * beats / self.duration_s if self.duration_s > 0 else 0.0
+
+    def summary_text(self) -> str:
+        beats = self.paced + self.sensed
+        pct = 100.0 * self.paced / beats if beats else 0.0
+        valid = self.rate[~np.isnan(self.rate)]
+        lo = valid.min() if valid.size else 0.0
+        hi = valid.max() if valid.size else 0.0
+        return (f"Paced: {self.paced} ({pct:.0f}%) | Sensed: {self.sensed}\n"
+                f"Mean rate: {self.mean_rate:.1f} ppm (range {lo:.0f}-{hi:.0f})")
+
+
+def config_from_settings(mode: str, data: Dict[str, str]) -> BradyConfig:
+    """Builds a config from a DataEntry settings dict (raises ValueError on bad input)."""
+    chamber = "Atrial" if mode.startswith("A") else "Ventricular"
+    refractory_key = "ARP" if mode.startswith("A") else "VRP"
+
+    def value(name: str) -> float:
+        # Parameters the mode doesn't use fall back to the schema default
+        return float(data.get(name) or PARAMETER_SPECS[name].default)
+
+    return BradyConfig(
+        mode=mode,
+        lrl=value("Lower Rate Limit"),
+        amplitude=value(f"{chamber} Amplitude"),
+        pulse_width=value(f"{chamber} Pulse Width"),
+        sensitivity=value(f"{chamber} Sensitivity"),
+        refractory_ms=value(refractory_key),
+        hysteresis=bool(int(data.get("Hysteresis", 0) or 0)),
+    )
+
+
+def synthetic_rhythm(rate_bpm: float, duration_s: float, amplitude_mv: float = 3.0,
+                     variability: float = 0.05, seed: int = 0):
+    """
+    Intrinsic beats at roughly rate_bpm with Gaussian beat-to-beat variability.
+    Returns (times, amplitudes). A rate of 0 means no intrinsic activity.
+    """
+    if rate_bpm <= 0:
+        return np.zeros(0), np.zeros(0)
+    rng = np.random.default_rng(seed)
+    mean_rr = 60.0 / rate_bpm
+    count = int(duration_s / mean_rr * 1.2) + 2
+    rr = np.maximum(mean_rr * (1.0 + variability * rng.standard_normal(count)), 0.2)
+    times = np.cumsum(rr)
+    times = times[times < duration_s]
+    amps = amplitude_mv * (1.0 + 0.1 * rng.standard_normal(times.size))
+    return times, amps
+
+
+def simulate(config: BradyConfig, intrinsic_times, intrinsic_amps, duration_s: float) -> BradyResult:
+    """Runs the mode over [0, duration_s) against the intrinsic beats."""
+    intrinsic_times = np.asarray(intrinsic_times, dtype=np.float64)
+    intrinsic_amps = np.asarray(intrinsic_amps, dtype=np.float64)
+    lri = 60.0 / config.lrl
+    pace_mark = MARK_PACE[config.chamber]
+
+    if not config.inhibited:
+        # Asynchronous: fixed-rate pacing, intrinsic beats are ignored
+        times = np.arange(0.0, duration_s, lri)
+        markers = np.full(times.size, pace_mark)
+        return _result(times, markers, duration_s)
+
+    # Beats below the sensitivity threshold are never seen by the board
+    seen = np.sort(intrinsic_times[intrinsic_amps >= config.sensitivity]).tolist()
+    sense_mark = MARK_SENSE[config.chamber]
+    refractory = config.refractory_ms / 1000.0
+    hyst_rate = max(30.0, config.lrl - HYSTERESIS_RATE_DROP_PPM)
+    escape_after_sense = 60.0 / hyst_rate if config.hysteresis else lri
+
+    out_t = []
+    out_m = []
+    n = len(seen)
+    i = 0
+    last = 0.0
+    escape = lri
+    while True:
+        # Beats inside the refractory period neither inhibit nor reset timing
+        blank_end = last + refractory
+        j = bisect_right(seen, blank_end, i)
+        if j > i and out_t:
+            out_t.extend(seen[i:j])
+            out_m.extend([MARK_REFRACTORY] * (j - i))
+        i = j
+
+        due = last + escape
+        if i < n and seen[i] < due:
+            last = seen[i]
+            if last >= duration_s:
+                break
+            out_t.append(last)
+            out_m.append(sense_mark)
+            escape = escape_after_sense
+            i += 1
+        else:
+            if due >= duration_s:
+                break
+            last = due
+            out_t.append(last)
+            out_m.append(pace_mark)
+            escape = lri
+
+    return _result(np.array(out_t), np.array(out_m, dtype="<U2"), duration_s)
+
+
+def _result(times, markers, duration_s) -> BradyResult:
+    beats = markers != MARK_REFRACTORY
+    rate = np.full(times.size, np.nan)
+    beat_times = times[beats]
+    if beat_times.size > 1:
+        beat_rate = np.full(beat_times.size, np.nan)
+        beat_rate[1:] = 60.0 / np.diff(beat_times)
+        rate[beats] = beat_rate
+    return BradyResult(times, markers.astype("<U2"), rate, duration_s)
@@ -0,0 +1,95 @@
+# models/egram_acquisition.py
+"""
+Egram acquisition on a worker thread.
+
+While running, the thread blocks on a frame source (the serial port, or
+anything else with its read_egram_frames(wait_s) method, e.g. a
+ReplaySource), or generates mock frames when no board is connected, and
+publishes every batch of decoded frames on the event bus as
+EGRAM_FRAMES. The UI only does work when a batch arrives. When the source
+runs out (or fails) EGRAM_ENDED is published.
+"""
+import math
+import random
+import threading
+import time
+
+import numpy as np
+
+from models.event_bus import EGRAM_ENDED, EGRAM_FRAMES, ERROR
+from models.serial_comms import EGRAM_ACTIVITY_SCALE, EGRAM_FRAME_DTYPE
+
+# How long one blocking read may wait, i.e. how quickly stop() takes effect
+READ_WAIT_S = 0.1
+MOCK_RATE_HZ = 50
+
+
+def mock_frames(seq: int, now: float) -> np.ndarray:
+    """One synthetic frame (sine/cosine egrams, slowly varying activity)."""
+    frames = np.zeros(1, dtype=EGRAM_FRAME_DTYPE)
+    frames["header"] = 0x01
+    frames["seq"] = seq % 65536
+    frames["atr"] = 2.5 + math.sin(now * 5) + random.uniform(-0.1, 0.1)
+    frames["vent"] = 2.0 + math.cos(now * 5) + random.uniform(-0.1, 0.1)
+    mock_activity = 1.0 + 2.0 * abs(math.sin(now * 0.2))
+    frames["act_raw"] = int(mock_activity * EGRAM_ACTIVITY_SCALE)
+    frames["sensor_rate"] = int(60 + 20 * max(0.0, mock_activity - 2.0))
+    return frames
+
+
+class EgramAcquisition:
+    def __init__(self, serial_manager, bus):
+        self.serial_manager = serial_manager
+        self.bus = bus
+        self._thread = None
+        self._source = serial_manager
+        self._mock = False
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def reading_serial(self) -> bool:
+        """True while the thread is reading the board (not a replay or mock frames)."""
+        return self.running and not self._mock and self._source is self.serial_manager
+
+    def start(self, mock: bool = False, source=None):
+        """Starts the reader thread on source (default: the serial port), or on mock frames."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._source = source if source is not None else self.serial_manager
+        self._mock = mock
+        target = self._run_mock if mock else self._run_source
+        self._thread = threading.Thread(target=target, name="egram-acquisition", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 1.0):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run_source(self):
+        source = self._source
+        while not self._stop.is_set():
+            result = source.read_egram_frames(wait_s=READ_WAIT_S)
+            if result is None:
+                if getattr(source, "finished", False):
+                    self.bus.publish(EGRAM_ENDED, "Replay finished.")
+                else:
+                    self.bus.publish(ERROR, "Egram Error", "Lost the egram stream (serial read failed).")
+                    self.bus.publish(EGRAM_ENDED, "Lost the egram stream.")
+                return
+            frames, resyncs, skipped = result
+            if len(frames) or resyncs or skipped:
+                self.bus.publish(EGRAM_FRAMES, frames, resyncs, skipped, time.perf_counter())
+
+    def _run_mock(self):
+        seq = 0
+        period = 1.0 / MOCK_RATE_HZ
+        while not self._stop.wait(period):
+            self.bus.publish(EGRAM_FRAMES, mock_frames(seq, time.time()), 0, 0, time.perf_counter())
+            seq += 1
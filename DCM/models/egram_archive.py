@@ -0,0 +1,166 @@
+# models/egram_archive.py
+"""
+Random access to recorded egram sessions for the review screen.
+
+The .egram file is memory-mapped, so opening a 12-hour session reads
+nothing up front. Next to it a min/max pyramid is kept in
+<name>.pyramid/: level 0 holds the min and max of every BASE_BLOCK
+samples of each channel, each further level reduces the one below by
+FACTOR. A view of any width is then answered from the coarsest level that
+still has a block per pixel column, so zooming out to the whole session
+touches a few thousand blocks and zooming in reads raw samples straight
+from the map. Levels are .npy files opened with mmap_mode="r" as well.
+
+The pyramid is built on first open (streaming over the map in chunks) and
+rebuilt if the recording no longer matches it. Blocks skip NaN samples
+(fmin/fmax), so a few dropped samples don't blank a whole zoomed-out view.
+"""
+import json
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+CHANNELS = ("atr", "vent", "activity", "sensor_rate")
+BASE_BLOCK = 16
+FACTOR = 8
+BUILD_CHUNK = BASE_BLOCK * 65536  # records per pass while building
+PYRAMID_VERSION = 2
+
+
+def _base_path(path: str) -> str:
+    for ext in (".egram", ".json"):
+        if path.endswith(ext):
+            return path[:-len(ext)]
+    return path
+
+
+class EgramArchive:
+    def __init__(self, path: str):
+        self.base = _base_path(path)
+        with open(self.base + ".json", "r") as f:
+            self.meta = json.load(f)
+        dtype = np.dtype([tuple(field) for field in self.meta["dtype"]])
+        count = os.path.getsize(self.base + ".egram") // dtype.itemsize
+        # Count from the file, not the sidecar: a session cut short still opens
+        self.records = (np.memmap(self.base + ".egram", dtype=dtype, mode="r", shape=(count,))
+                        if count else np.zeros(0, dtype=dtype))
+        self.channels = [c for c in CHANNELS if c in dtype.names]
+        self.levels: List[np.ndarray] = self._load_or_build()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    # ---------------- Pyramid ----------------
+    @property
+    def pyramid_dir(self) -> str:
+        return self.base + ".pyramid"
+
+    def _load_or_build(self) -> List[np.ndarray]:
+        info_path = os.path.join(self.pyramid_dir, "pyramid.json")
+        expected = {"version": PYRAMID_VERSION, "records": len(self), "channels": self.channels,
+                    "base_block": BASE_BLOCK, "factor": FACTOR}
+        try:
+            with open(info_path, "r") as f:
+                info = json.load(f)
+            if {k: info.get(k) for k in expected} == expected:
+                return [np.load(os.path.join(self.pyramid_dir, f"level_{k}.npy"), mmap_mode="r")
+                        for k in range(info["levels"])]
+        except (OSError, ValueError, KeyError):
+            pass
+        levels = self._build()
+        # Written last, so an interrupted build is redone next time
+        with open(info_path, "w") as f:
+            json.dump(dict(expected, levels=len(levels)), f)
+        return levels
+
+    def _build(self) -> List[np.ndarray]:
+        os.makedirs(self.pyramid_dir, exist_ok=True)
+        n, channels = len(self), len(self.channels)
+        if n == 0:
+            return []
+        blocks = -(-n // BASE_BLOCK)
+        level = np.lib.format.open_memmap(os.path.join(self.pyramid_dir, "level_0.npy"), mode="w+",
+                                          dtype=np.float32, shape=(blocks, channels, 2))
+        for start in range(0, n, BUILD_CHUNK):
+            stop = min(start + BUILD_CHUNK, n)
+            values = np.empty((stop - start, channels), dtype=np.float32)
+            for c, name in enumerate(self.channels):
+                values[:, c] = self.records[name][start:stop]
+            edges = np.arange(0, stop - start, BASE_BLOCK)
+            first = start // BASE_BLOCK
+            level[first:first + len(edges), :, 0] = np.fmin.reduceat(values, edges, axis=0)
+            level[first:first + len(edges), :, 1] = np.fmax.reduceat(values, edges, axis=0)
+        level.flush()
+        levels = [level]
+
+        k = 0
+        while len(levels[-1]) > 1:
+            prev = levels[-1]
+            edges = np.arange(0, len(prev), FACTOR)
+            k += 1
+            level = np.lib.format.open_memmap(os.path.join(self.pyramid_dir, f"level_{k}.npy"), mode="w+",
+                                              dtype=np.float32, shape=(len(edges), channels, 2))
+            level[:, :, 0] = np.fmin.reduceat(prev[:, :, 0], edges, axis=0)
+            level[:, :, 1] = np.fmax.reduceat(prev[:, :, 1], edges, axis=0)
+            level.flush()
+            levels.append(level)
+        return levels
+
+    # ---------------- Queries ----------------
+    def limits(self, channel: str) -> Tuple[float, float]:
+        """Overall (min, max) of a channel, from the top of the pyramid."""
+        if not len(self):
+            return 0.0, 1.0
+        c = self.channels.index(channel)
+        top = self.levels[-1]
+        lo, hi = float(np.fmin.reduce(top[:, c, 0])), float(np.fmax.reduce(top[:, c, 1]))
+        # A channel with no finite sample at all
+        if not (np.isfinite(lo) and np.isfinite(hi)):
+            return 0.0, 1.0
+        return lo, hi
+
+    def envelope(self, channel: str, start: int, stop: int, columns: int) -> np.ndarray:
+        """
+        What to draw for samples [start, stop) across `columns` pixel columns.
+
+        With at least one sample per column: the min and max of every
+        column, interleaved (2 * columns values), taken from the coarsest
+        pyramid level with at least one block per column (raw samples when
+        a column holds fewer than BASE_BLOCK). With fewer samples than
+        columns: the raw samples themselves.
+        """
+        start, stop = max(0, int(start)), min(len(self), int(stop))
+        if stop <= start:
+            return np.zeros(0, dtype=np.float32)
+        span = stop - start
+        if span <= columns:
+            return np.asarray(self.records[channel][start:stop], dtype=np.float32)
+
+        per_column = span / columns
+        if per_column < BASE_BLOCK:
+            values = np.asarray(self.records[channel][start:stop], dtype=np.float32)
+            edges = (np.arange(columns) * per_column).astype(np.intp)
+            lo = np.fmin.reduceat(values, edges)
+            hi = np.fmax.reduceat(values, edges)
+        else:
+            k = min(int(np.log(per_column / BASE_BLOCK) / np.log(FACTOR)), len(self.levels) - 1)
+            block = BASE_BLOCK * FACTOR ** k
+            first, last = start // block, -(-stop // block)
+            c = self.channels.index(channel)
+            blocks = np.asarray(self.levels[k][first:last, c])
+            edges = ((start + np.arange(columns) * per_column) // block - first).astype(np.intp)
+            lo = np.fmin.reduceat(blocks[:, 0], edges)
+            hi = np.fmax.reduceat(blocks[:, 1], edges)
+        return np.column_stack((lo, hi)).ravel()
+
+    def time_at(self, index: int) -> float:
+        """Arrival time (s since session start) of a record."""
+        if not len(self):
+            return 0.0
+        return float(self.records["t"][min(max(int(index), 0), len(self) - 1)])
+
+    def summary(self) -> Dict[str, object]:
+        return {"records": len(self), "duration_s": self.time_at(len(self) - 1),
+                "user": self.meta.get("user"), "device": self.meta.get("device"),
+                "started": self.meta.get("started")}
@@ -0,0 +1,67 @@
+# models/egram_autoscale.py
+"""
+Y-axis autoscaling with hysteresis for the live egram.
+
+Limits follow the min/max of the visible buffer, but change rarely:
+they grow at once when a sample would be clipped (with headroom, so a
+slowly rising signal doesn't move them every frame) and only shrink
+after the signal has used less than SHRINK_BELOW of the span for
+HOLD_S. Each change costs the view a partial re-render, so "rarely" is
+what keeps autoscaling close to the fixed-limit cost.
+"""
+import math
+from typing import Tuple
+
+import numpy as np
+
+DEFAULT_LIMITS = (-1.0, 6.0)
+MARGIN = 0.15        # headroom on each side, as a fraction of the data span
+SHRINK_BELOW = 0.5   # shrink once the data spans less than this much of the view...
+HOLD_S = 2.0         # ...for this long
+MIN_SPAN = 1.0       # never zoom in further than this (mV), so noise isn't magnified
+
+
+class AxisAutoscaler:
+    def __init__(self, initial: Tuple[float, float] = DEFAULT_LIMITS):
+        self.initial = initial
+        self.limits = initial
+        self._shrink_since: float | None = None
+
+    def reset(self):
+        self.limits = self.initial
+        self._shrink_since = None
+
+    def update(self, values: np.ndarray, now: float) -> Tuple[float, float] | None:
+        """Returns new (low, high) limits if they should change, else None."""
+        lo, hi = float(values.min()), float(values.max())
+        if not (math.isfinite(lo) and math.isfinite(hi)):
+            return None
+        cur_lo, cur_hi = self.limits
+        if lo < cur_lo or hi > cur_hi:
+            return self._change(lo, hi)
+        if hi - lo < SHRINK_BELOW * (cur_hi - cur_lo):
+            if self._shrink_since is None:
+                self._shrink_since = now
+            elif now - self._shrink_since >= HOLD_S:
+                limits = self._fit(lo, hi)
+                # Nothing to gain if the floor already stops it shrinking
+                if limits[1] - limits[0] < cur_hi - cur_lo:
+                    return self._change(lo, hi)
+                self._shrink_since = now
+            return None
+        self._shrink_since = None
+        return None
+
+    def _change(self, lo: float, hi: float) -> Tuple[float, float]:
+        self._shrink_since = None
+        self.limits = self._fit(lo, hi)
+        return self.limits
+
+    @staticmethod
+    def _fit(lo: float, hi: float) -> Tuple[float, float]:
+        span = hi - lo
+        if span < MIN_SPAN:
+            mid = (lo + hi) / 2
+            lo, hi, span = mid - MIN_SPAN / 2, mid + MIN_SPAN / 2, MIN_SPAN
+        pad = span * MARGIN
+        return lo - pad, hi + pad
@@ -0,0 +1,120 @@
+# models/egram_recorder.py
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any
+
+import numpy as np
+
+from models.serial_comms import egram_activity
+
+_DATA_DIR = os.environ.get("DCM_DATA_DIR") or os.path.dirname(os.path.abspath(__file__))
+RECORDINGS_DIR = os.path.join(_DATA_DIR, "recordings")
+
+RECORDING_FORMAT = 2
+
+# One record per received frame. Packed (no alignment) so the .egram file can
+# be opened later with np.memmap using this same dtype.
+RECORD_DTYPE = np.dtype([
+    ("t", "<f8"),      # arrival time, seconds since session start
+    ("seq", "<u2"),    # board frame counter
+    ("atr", "<f4"),
+    ("vent", "<f4"),
+    ("activity", "<f4"),  # accelerometer activity level (format 2+)
+    ("sensor_rate", "u1"),  # sensor-driven rate, ppm (format 2+)
+])
+
+
+def frames_to_records(frames, t) -> np.ndarray:
+    """Decoded frames (EGRAM_FRAME_DTYPE) -> records; t is one time or one per frame."""
+    records = np.empty(len(frames), dtype=RECORD_DTYPE)
+    records["t"] = t
+    records["seq"] = frames["seq"]
+    records["atr"] = frames["atr"]
+    records["vent"] = frames["vent"]
+    records["activity"] = egram_activity(frames)
+    records["sensor_rate"] = frames["sensor_rate"]
+    return records
+
+
+class EgramRecorder:
+    """
+    Records an egram session as two files:
+      <name>.egram - raw RECORD_DTYPE records, appended as frames arrive
+      <name>.json  - metadata (user, device, dtype, frame count, link stats)
+    """
+
+    def __init__(self, directory: str = RECORDINGS_DIR):
+        self.directory = directory
+        self.path: str | None = None
+        self._file = None
+        self._t0 = 0.0
+        self._meta: Dict[str, Any] = {}
+
+    @property
+    def is_recording(self) -> bool:
+        return self._file is not None
+
+    def start(self, username: str | None, device_id: str | None) -> str:
+        """Opens a new session file and returns its base path (no extension)."""
+        if self.is_recording:
+            self.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = os.path.join(self.directory, f"egram_{stamp}")
+        self._file = open(self.path + ".egram", "wb")
+        self._t0 = time.perf_counter()
+        self._meta = {
+            "format": RECORDING_FORMAT,
+            "dtype": RECORD_DTYPE.descr,
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "user": username,
+            "device": device_id,
+            "frames": 0,
+        }
+        return self.path
+
+    def append(self, frames, arrival: float | None = None):
+        """Appends a batch of decoded frames (EGRAM_FRAME_DTYPE)."""
+        if not self.is_recording or len(frames) == 0:
+            return
+        if arrival is None:
+            arrival = time.perf_counter()
+
+        records = frames_to_records(frames, arrival - self._t0)
+        self._file.write(records.tobytes())
+        self._meta["frames"] += len(records)
+
+    def stop(self, link_stats: Dict[str, Any] | None = None) -> str | None:
+        """Closes the session and writes the metadata sidecar."""
+        if not self.is_recording:
+            return None
+
+        self._file.close()
+        self._file = None
+        self._meta["duration_s"] = round(time.perf_counter() - self._t0, 3)
+        if link_stats is not None:
+            self._meta["link_stats"] = link_stats
+
+        with open(self.path + ".json", "w") as f:
+            json.dump(self._meta, f, indent=2)
+        return self.path
+
+
+def load_recording(path: str, mmap: bool = False):
+    """
+    Loads a recorded session. Returns (metadata dict, record array).
+    With mmap=True the records are memory-mapped instead of read.
+    """
+    base = path[:-len(".egram")] if path.endswith(".egram") else path
+    with open(base + ".json", "r") as f:
+        meta = json.load(f)
+    dtype = np.dtype([tuple(field) for field in meta["dtype"]])
+    if mmap and os.path.getsize(base + ".egram") >= dtype.itemsize:
+        count = os.path.getsize(base + ".egram") // dtype.itemsize
+        records = np.memmap(base + ".egram", dtype=dtype, mode="r", shape=(count,))
+    else:
+        records = np.fromfile(base + ".egram", dtype=dtype)
+    return meta, records
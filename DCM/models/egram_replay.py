@@ -0,0 +1,106 @@
+# models/egram_replay.py
+"""
+Replays a recorded egram session through the live pipeline.
+
+ReplaySource has the same read_egram_frames(wait_s) interface as
+SerialManager (and replays either a recording or the egram frames decoded
+from a raw serial capture), so EgramAcquisition, the link stats, the recorder and the
+renderers run exactly as they would on a board. Frames come back as
+EGRAM_FRAME_DTYPE, with the original seq numbers (so recorded drops show
+up again as drops).
+
+Pacing follows the recorded arrival times, scaled by speed, against one
+fixed start time, so sleep jitter never accumulates. With speed=None the
+session is replayed as fast as it can be read, in fixed batches of
+batch_frames, which is repeatable run to run and is the mode for
+benchmarking the rendering and analysis stages.
+"""
+import time
+from typing import Tuple
+
+import numpy as np
+
+from models.egram_recorder import load_recording
+from models.serial_comms import EGRAM_ACTIVITY_SCALE, EGRAM_FRAME_DTYPE
+
+SPEEDS = {"1×": 1.0, "10×": 10.0, "Max": None}
+# Most frames returned by one read (bounds the work per bus event)
+MAX_BATCH = 4096
+
+
+def records_to_frames(records) -> np.ndarray:
+    """Recorder records -> the frames the board would have sent."""
+    frames = np.zeros(len(records), dtype=EGRAM_FRAME_DTYPE)
+    frames["header"] = 0x01
+    frames["seq"] = records["seq"]
+    frames["atr"] = records["atr"]
+    frames["vent"] = records["vent"]
+    names = records.dtype.names
+    if "activity" in names:  # format 1 recordings have no activity channel
+        frames["act_raw"] = np.clip(np.round(records["activity"] * EGRAM_ACTIVITY_SCALE), 0, 65535)
+    if "sensor_rate" in names:
+        frames["sensor_rate"] = records["sensor_rate"]
+    return frames
+
+
+class ReplaySource:
+    def __init__(self, records, speed: float | None = 1.0, batch_frames: int = 256):
+        """records: recorder records (RECORD_DTYPE, may be a memmap); speed None = as fast as possible."""
+        self.records = records
+        self.speed = speed
+        self.batch_frames = batch_frames
+        self.position = 0
+        self.finished = False
+        self._start: float | None = None
+        self._t0 = float(records["t"][0]) if len(records) else 0.0
+
+    @classmethod
+    def from_recording(cls, path: str, speed: float | None = 1.0, batch_frames: int = 256):
+        _meta, records = load_recording(path, mmap=True)
+        return cls(records, speed, batch_frames)
+
+    @classmethod
+    def from_capture(cls, path: str, speed: float | None = 1.0, batch_frames: int = 256):
+        """Replays the egram frames of a raw serial capture, at their read times."""
+        from models.protocol_decoder import decode_capture
+        return cls(decode_capture(path).egram_records(), speed, batch_frames)
+
+    @classmethod
+    def from_path(cls, path: str, speed: float | None = 1.0, batch_frames: int = 256):
+        opener = cls.from_capture if path.endswith(".rawcap") else cls.from_recording
+        return opener(path, speed, batch_frames)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def read_egram_frames(self, wait_s: float = 0.0) -> Tuple[np.ndarray, int, int] | None:
+        """
+        Returns (frames, resyncs, skipped) like SerialManager.read_egram_frames:
+        the frames due by now, after waiting up to wait_s for the next one.
+        Returns None once the session has been played out (finished is set).
+        """
+        n = len(self.records)
+        if self.position >= n:
+            self.finished = True
+            return None
+        if self._start is None:
+            self._start = time.perf_counter()
+
+        if not self.speed:
+            stop = min(self.position + self.batch_frames, n)
+        else:
+            window = np.asarray(self.records["t"][self.position:self.position + MAX_BATCH], dtype=np.float64)
+            due = self._start + (window[0] - self._t0) / self.speed
+            now = time.perf_counter()
+            if due > now:
+                time.sleep(min(due - now, wait_s))
+                now = time.perf_counter()
+                if due > now:
+                    return np.zeros(0, dtype=EGRAM_FRAME_DTYPE), 0, 0
+            # Everything recorded up to the replay clock (always at least the due frame)
+            horizon = self._t0 + (now - self._start) * self.speed
+            stop = self.position + max(1, int(np.searchsorted(window, horizon, side="right")))
+
+        frames = records_to_frames(self.records[self.position:stop])
+        self.position = stop
+        return frames, 0, 0
@@ -0,0 +1,120 @@
+# models/egram_stats.py
+import math
+import time
+from typing import Dict, Any
+
+import numpy as np
+
+SEQ_MODULO = 65536
+# A forward jump larger than this is treated as a stale/reordered frame, not a gap
+_MAX_FORWARD_GAP = SEQ_MODULO // 2
+
+
+class EgramLinkStats:
+    """
+    Receive-side accounting for the egram stream.
+    Fed once per read with the decoded frame sequence numbers, it tracks:
+      - received / dropped / duplicate / out-of-order frames (from seq gaps)
+      - resync events and bytes skipped while looking for a header
+      - inter-arrival jitter of reads that delivered data
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.received = 0
+        self.dropped = 0
+        self.duplicates = 0
+        self.out_of_order = 0
+        self.resyncs = 0
+        self.skipped_bytes = 0
+
+        self._last_seq: int | None = None
+        self._first_arrival: float | None = None
+        self._last_arrival: float | None = None
+
+        # Running mean/variance of inter-arrival time (Welford)
+        self._gap_count = 0
+        self._gap_mean = 0.0
+        self._gap_m2 = 0.0
+        self.max_gap_s = 0.0
+
+    def update(self, seqs, resyncs: int = 0, skipped: int = 0, arrival: float | None = None):
+        """Accounts for one batch of frames (seqs in arrival order)."""
+        self.resyncs += int(resyncs)
+        self.skipped_bytes += int(skipped)
+
+        seqs = np.asarray(seqs, dtype=np.int64)
+        if seqs.size == 0:
+            return
+
+        if arrival is None:
+            arrival = time.perf_counter()
+        self._account_arrival(arrival)
+
+        # Sequence gaps across the batch (including the previous batch's last frame)
+        if self._last_seq is None:
+            steps = np.diff(seqs) % SEQ_MODULO
+        else:
+            steps = np.diff(seqs, prepend=self._last_seq) % SEQ_MODULO
+
+        forward = (steps >= 1) & (steps < _MAX_FORWARD_GAP)
+        self.dropped += int(np.sum(steps[forward] - 1))
+        self.duplicates += int(np.count_nonzero(steps == 0))
+        self.out_of_order += int(np.count_nonzero(steps >= _MAX_FORWARD_GAP))
+
+        self.received += int(seqs.size)
+        self._last_seq = int(seqs[-1])
+
+    def _account_arrival(self, arrival: float):
+        if self._first_arrival is None:
+            self._first_arrival = arrival
+        if self._last_arrival is not None:
+            gap = arrival - self._last_arrival
+            self._gap_count += 1
+            delta = gap - self._gap_mean
+            self._gap_mean += delta / self._gap_count
+            self._gap_m2 += delta * (gap - self._gap_mean)
+            self.max_gap_s = max(self.max_gap_s, gap)
+        self._last_arrival = arrival
+
+    @property
+    def loss_pct(self) -> float:
+        expected = self.received + self.dropped
+        return 100.0 * self.dropped / expected if expected else 0.0
+
+    @property
+    def jitter_ms(self) -> float:
+        """Standard deviation of the inter-arrival time, in ms."""
+        if self._gap_count < 2:
+            return 0.0
+        return 1000.0 * math.sqrt(self._gap_m2 / (self._gap_count - 1))
+
+    @property
+    def frame_rate_hz(self) -> float:
+        if self._first_arrival is None or self._last_arrival == self._first_arrival:
+            return 0.0
+        return self.received / (self._last_arrival - self._first_arrival)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain dict of the current counters (stored with recorded sessions)."""
+        return {
+            "received": self.received,
+            "dropped": self.dropped,
+            "duplicates": self.duplicates,
+            "out_of_order": self.out_of_order,
+            "resyncs": self.resyncs,
+            "skipped_bytes": self.skipped_bytes,
+            "loss_pct": round(self.loss_pct, 3),
+            "frame_rate_hz": round(self.frame_rate_hz, 2),
+            "mean_interval_ms": round(1000.0 * self._gap_mean, 3),
+            "jitter_ms": round(self.jitter_ms, 3),
+            "max_interval_ms": round(1000.0 * self.max_gap_s, 3),
+        }
+
+    def summary_text(self) -> str:
+        """One-line summary for the egram status bar."""
+        return (f"Rx: {self.received} | Drop: {self.dropped} ({self.loss_pct:.2f}%) | "
+                f"Dup: {self.duplicates} | Resync: {self.resyncs} | "
+                f"Rate: {self.frame_rate_hz:.1f} Hz | Jitter: {self.jitter_ms:.1f} ms")
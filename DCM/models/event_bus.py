@@ -0,0 +1,89 @@
+# models/event_bus.py
+"""
+Thread-safe event bus between worker threads and the Tk thread.
+
+Workers call publish(topic, *args) (or call(fn, *args)); the event is
+only queued. The Tk thread drains the queue on an after() tick it arms
+itself and runs the subscribers there. Workers never make a Tcl call:
+with threaded Tcl, event_generate from a worker blocks until the main loop
+services it, so a Tk thread waiting on that worker (a pool shutdown or a
+thread join on close) would deadlock.
+"""
+import queue
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+# How often the Tk thread drains the queue (an idle tick is one empty get)
+DISPATCH_INTERVAL_MS = 10
+
+# Topics
+COMM_STATUS = "comm_status"      # (connected: bool, device_id: str | None)
+EGRAM_FRAMES = "egram_frames"    # (frames, resyncs, skipped, arrival)
+EGRAM_ENDED = "egram_ended"      # (reason: str) the frame source ran out or failed
+VERIFY_RESULT = "verify_result"  # (text: str)
+ERROR = "error"                  # (title: str, message: str)
+NOTIFY = "notify"                # (severity: str, title: str, message: str)
+
+_CALL = "__call__"
+
+
+class EventBus:
+    def __init__(self):
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._subscribers: Dict[str, List[Callable]] = defaultdict(list)
+        self._root = None
+        self._tick_job = None
+
+    def attach(self, root):
+        """Binds the bus to the Tk root and starts draining it there (Tk thread)."""
+        self._root = root
+        self._tick()
+
+    def detach(self):
+        """Stops draining (Tk thread). Events published afterwards stay queued."""
+        if self._tick_job is not None:
+            try:
+                self._root.after_cancel(self._tick_job)
+            except Exception:
+                pass
+            self._tick_job = None
+        self._root = None
+
+    def subscribe(self, topic: str, callback: Callable) -> Callable[[], None]:
+        """Registers callback(*args) for a topic. Returns a function that unsubscribes it."""
+        self._subscribers[topic].append(callback)
+
+        def unsubscribe():
+            if callback in self._subscribers[topic]:
+                self._subscribers[topic].remove(callback)
+        return unsubscribe
+
+    def publish(self, topic: str, *args: Any):
+        """Queues an event. Safe to call from any thread; never blocks."""
+        self._queue.put((topic, args))
+
+    def call(self, fn: Callable, *args: Any):
+        """Runs fn(*args) on the Tk thread. Safe to call from any thread."""
+        self.publish(_CALL, fn, *args)
+
+    def _tick(self):
+        self.dispatch()
+        if self._root is not None:
+            self._tick_job = self._root.after(DISPATCH_INTERVAL_MS, self._tick)
+
+    def dispatch(self):
+        """Runs the subscribers of every queued event (Tk thread)."""
+        while True:
+            try:
+                topic, args = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if topic == _CALL:
+                callbacks, args = [args[0]], args[1:]
+            else:
+                callbacks = list(self._subscribers.get(topic, ()))
+            for callback in callbacks:
+                try:
+                    callback(*args)
+                except Exception as e:
+                    print(f"[EventBus] {topic} handler failed: {e}")
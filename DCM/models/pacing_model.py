@@ -1,63 +1,187 @@
 # models/pacing_model.py
+import itertools
 import json
 import os
-from typing import Dict, Any
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Iterator, List, Tuple
 
-# Get the absolute path to the 'models' directory
-_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-SETTINGS_FILE = os.path.join(_CURRENT_DIR, "pacing_settings.json")
+from models.persistence import WriteBehindWorker
 
-def _load_settings_file() -> Dict[str, Any]:
-    """Loads the pacing settings dictionary from the JSON file."""
-    if not os.path.exists(SETTINGS_FILE):
+# Data lives next to the models unless DCM_DATA_DIR says otherwise (the tests use a temp dir)
+_DATA_DIR = os.environ.get("DCM_DATA_DIR") or os.path.dirname(os.path.abspath(__file__))
+SETTINGS_DB = os.path.join(_DATA_DIR, "pacing_settings.db")
+# Legacy store, migrated into SETTINGS_DB on first start
+SETTINGS_FILE = os.path.join(_DATA_DIR, "pacing_settings.json")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pacing_settings (
+    username TEXT NOT NULL,
+    mode     TEXT NOT NULL,
+    data     TEXT NOT NULL,
+    updated  REAL NOT NULL,
+    PRIMARY KEY (username, mode)
+) WITHOUT ROWID;
+"""
+
+def _load_settings_file(path: str = SETTINGS_FILE) -> Dict[str, Any]:
+    """Loads the pacing settings dictionary from the legacy JSON file."""
+    if not os.path.exists(path):
         return {}
     try:
-        with open(SETTINGS_FILE, "r") as f:
+        with open(path, "r") as f:
             return json.load(f)
     except Exception:
         return {}
 
-def _save_settings_file(data: Dict[str, Any]) -> None:
-    """Saves the pacing settings dictionary to the JSON file."""
-    with open(SETTINGS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+def _connect(path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Opens the settings database in WAL mode and makes sure the table exists."""
+    conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL is still crash-safe; it just skips an fsync per commit
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+def migrate_json_settings(conn: sqlite3.Connection, json_path: str = SETTINGS_FILE) -> int:
+    """
+    Imports the legacy pacing_settings.json into the database and renames the
+    file to *.migrated so it is only imported once. Returns rows imported.
+    """
+    if not os.path.exists(json_path):
+        return 0
+    legacy = _load_settings_file(json_path)
+    now = time.time()
+    rows = [
+        (username, mode, json.dumps(data), now)
+        for username, modes in legacy.items()
+        for mode, data in modes.items()
+    ]
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO pacing_settings (username, mode, data, updated) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+    os.replace(json_path, json_path + ".migrated")
+    return len(rows)
 
 class PacingModel:
-    def __init__(self):
-        """
-        Loads all pacing settings for all users.
-        The data structure looks like:
-        {
-            "username1": {
-                "AOO": {"param": "value", ...},
-                "VVI": {"param": "value", ...}
-            },
-            "username2": {
-                "AOO": {"param": "value", ...}
-            }
-        }
-        """
-        self.settings = _load_settings_file()
+    def __init__(self, db_path: str = SETTINGS_DB, legacy_path: str = SETTINGS_FILE, on_write_error=None):
+        """
+        Opens the pacing settings database. Nothing is loaded up front; each
+        (username, mode) pair is one row holding that mode's parameter dict:
+            username | mode | data ({"param": "value", ...}) | updated
+        A legacy pacing_settings.json is migrated on first start.
+        Saves are written by a background worker; until a row is written,
+        load_settings serves it from the pending map (a save that keeps
+        failing stays there, and is reported to on_write_error).
+        """
+        self.db_path = db_path
+        self.conn = _connect(db_path)
+        migrate_json_settings(self.conn, legacy_path)
+
+        self._pending: Dict[tuple, Dict[str, str]] = {}
+        self._pending_lock = threading.Lock()
+        self._write_conn: sqlite3.Connection | None = None
+        self._writer = WriteBehindWorker("pacing-store", on_error=on_write_error)
+        self._bulk_ids = itertools.count()
 
     def load_settings(self, username: str, mode: str) -> Dict[str, str]:
         """
         Loads the specific parameters for a given user and mode.
         Returns an empty dict if no settings are found.
         """
-        user_settings = self.settings.get(username, {})
-        mode_settings = user_settings.get(mode, {})
-        return mode_settings
+        with self._pending_lock:
+            pending = self._pending.get((username, mode))
+        if pending is not None:
+            return dict(pending)
+
+        row = self.conn.execute(
+            "SELECT data FROM pacing_settings WHERE username = ? AND mode = ?",
+            (username, mode),
+        ).fetchone()
+        return json.loads(row[0]) if row else {}
 
     def save_settings(self, username: str, mode: str, data: Dict[str, str]):
         """
         Saves the specific parameters for a given user and mode.
+        Returns immediately; only that one row is written, in the background.
         """
-        # Ensure the user's dictionary exists
-        if username not in self.settings:
-            self.settings[username] = {}
-        
-        # Set the data for that mode
-        self.settings[username][mode] = data
-        
-        # Save the entire settings object back to the file
-        _save_settings_file(self.settings)
\ No newline at end of file
+        key = (username, mode)
+        data = dict(data)
+        with self._pending_lock:
+            self._pending[key] = data
+        self._writer.submit(key, lambda: self._write_row(key, data))
+
+    def _write_row(self, key: tuple, data: Dict[str, str]):
+        """Runs on the persistence worker thread (which owns _write_conn)."""
+        if self._write_conn is None:
+            self._write_conn = _connect(self.db_path, check_same_thread=False)
+        with self._write_conn:
+            self._write_conn.execute(
+                "INSERT OR REPLACE INTO pacing_settings (username, mode, data, updated) VALUES (?, ?, ?, ?)",
+                (key[0], key[1], json.dumps(data), time.time()),
+            )
+        with self._pending_lock:
+            # A newer save may have replaced this one while it was written
+            if self._pending.get(key) is data:
+                del self._pending[key]
+
+    def save_settings_bulk(self, records: List[Tuple[str, str, Dict[str, str]]]):
+        """
+        Saves many (username, mode, data) records in one background
+        transaction. Returns immediately, like save_settings.
+        """
+        records = [(username, mode, dict(data)) for username, mode, data in records]
+        with self._pending_lock:
+            for username, mode, data in records:
+                self._pending[(username, mode)] = data
+        self._writer.submit(("bulk", next(self._bulk_ids)), lambda: self._write_rows(records))
+
+    def _write_rows(self, records: List[Tuple[str, str, Dict[str, str]]]):
+        """Runs on the persistence worker thread (which owns _write_conn)."""
+        if self._write_conn is None:
+            self._write_conn = _connect(self.db_path, check_same_thread=False)
+        now = time.time()
+        with self._write_conn:
+            self._write_conn.executemany(
+                "INSERT OR REPLACE INTO pacing_settings (username, mode, data, updated) VALUES (?, ?, ?, ?)",
+                [(username, mode, json.dumps(data), now) for username, mode, data in records],
+            )
+        with self._pending_lock:
+            for username, mode, data in records:
+                if self._pending.get((username, mode)) is data:
+                    del self._pending[(username, mode)]
+
+    def iter_settings(self, username: str | None = None) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+        """
+        Streams (username, mode, data) rows in key order without loading the
+        table. Uses its own connection, so it can run off the Tk thread.
+        """
+        self.flush()
+        conn = _connect(self.db_path, check_same_thread=False)
+        try:
+            if username is None:
+                cursor = conn.execute("SELECT username, mode, data FROM pacing_settings ORDER BY username, mode")
+            else:
+                cursor = conn.execute(
+                    "SELECT username, mode, data FROM pacing_settings WHERE username = ? ORDER BY mode",
+                    (username,),
+                )
+            for user, mode, data in cursor:
+                yield user, mode, json.loads(data)
+        finally:
+            conn.close()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Blocks until pending settings writes are committed."""
+        return self._writer.flush(timeout)
+
+    def close(self):
+        """Writes what is pending and closes. Returns the saves that failed (key -> error)."""
+        failed = self._writer.close()
+        if self._write_conn is not None:
+            self._write_conn.close()
+        self.conn.close()
+        return failed
@@ -0,0 +1,310 @@
+# models/param_history.py
+"""
+Append-only history of every parameter set programmed into a board.
+
+Each send is one row. Rows form a chain per (username, device, mode), and
+the sent values are stored as a delta against the previous row of the
+chain; every KEYFRAME_INTERVAL-th row stores the full set so rebuilding a
+version never replays more than that many deltas. Echo-verified values are
+attached to the row they verify, as a delta against its sent values.
+"""
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, List
+
+from models.pacing_model import SETTINGS_DB, _connect
+from models.persistence import WriteBehindWorker
+
+KEYFRAME_INTERVAL = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS param_history (
+    id          INTEGER PRIMARY KEY,
+    username    TEXT NOT NULL,
+    device_id   TEXT NOT NULL,
+    mode        TEXT NOT NULL,
+    ts          REAL NOT NULL,
+    keyframe    INTEGER NOT NULL,
+    sent        TEXT NOT NULL,
+    verified    TEXT,
+    verified_ts REAL
+);
+CREATE INDEX IF NOT EXISTS idx_history_user   ON param_history (username, ts);
+CREATE INDEX IF NOT EXISTS idx_history_device ON param_history (device_id, ts);
+CREATE INDEX IF NOT EXISTS idx_history_mode   ON param_history (mode, ts);
+CREATE INDEX IF NOT EXISTS idx_history_chain  ON param_history (username, device_id, mode, id);
+"""
+
+
+@dataclass
+class HistoryEntry:
+    id: int
+    username: str
+    device_id: str
+    mode: str
+    ts: float
+    sent: Dict[str, Any]
+    verified: Dict[str, Any] | None
+    verified_ts: float | None
+
+
+def make_delta(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Keys whose value changed; removed keys map to None."""
+    delta = {k: v for k, v in new.items() if old.get(k, None) != v or k not in old}
+    delta.update({k: None for k in old if k not in new})
+    return delta
+
+
+def apply_delta(base: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(base)
+    for k, v in delta.items():
+        if v is None:
+            out.pop(k, None)
+        else:
+            out[k] = v
+    return out
+
+
+class ParameterHistory:
+    def __init__(self, db_path: str = SETTINGS_DB, on_write_error=None):
+        self.db_path = db_path
+        self.conn = _connect(db_path)
+        self.conn.executescript(_SCHEMA)
+
+        row = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM param_history").fetchone()
+        self._ids = itertools.count(row[0] + 1)
+        self._lock = threading.Lock()
+        # chain -> (last full sent values, rows since the last keyframe), as
+        # committed; only the persistence worker touches it
+        self._heads: Dict[tuple, tuple] = {}
+        # (username, device_id) -> (row id, full sent values) of the latest
+        # committed send; loaded from the table the first time a pair is
+        # verified (see _latest_send)
+        self._latest: Dict[tuple, tuple] = {}
+
+        self._write_conn: sqlite3.Connection | None = None
+        # (sql, args) in order; sends are (None, send) and become SQL at write time
+        self._statements: List[tuple] = []
+        self._writer = WriteBehindWorker("param-history", on_error=on_write_error)
+
+    # ---------------- Writes ----------------
+    def _chain_head(self, chain: tuple):
+        """Committed head of a chain (persistence worker thread)."""
+        head = self._heads.get(chain)
+        if head is None:
+            rows = self._chain_rows(chain, upto_id=None, conn=self._write_conn)
+            if rows:
+                values, since = {}, 0
+                for _id, keyframe, sent in rows:
+                    values = json.loads(sent) if keyframe else apply_delta(values, json.loads(sent))
+                    since = 0 if keyframe else since + 1
+                head = (values, since)
+            else:
+                head = ({}, None)
+            self._heads[chain] = head
+        return head
+
+    def record_sent(self, username: str, device_id: str, mode: str,
+                    values: Dict[str, Any], ts: float | None = None) -> int:
+        """
+        Appends one programmed parameter set. Returns its history id.
+        Whether the row is a keyframe or a delta is decided when it is
+        written, against the chain as committed.
+        """
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            row_id = next(self._ids)
+        self._enqueue(None, (row_id, username, device_id, mode, ts, dict(values)))
+        return row_id
+
+    def _send_row(self, send: tuple, heads: Dict[tuple, tuple], latest: Dict[tuple, tuple]) -> tuple:
+        """(sql, args) that stores a send; heads/latest collect what it advances (persistence worker)."""
+        row_id, username, device_id, mode, ts, values = send
+        chain = (username, device_id, mode)
+        prev, since = heads[chain] if chain in heads else self._chain_head(chain)
+        keyframe = since is None or since + 1 >= KEYFRAME_INTERVAL
+        stored = values if keyframe else make_delta(prev, values)
+        heads[chain] = (values, 0 if keyframe else since + 1)
+        latest[(username, device_id)] = (row_id, values)
+        return ("INSERT INTO param_history (id, username, device_id, mode, ts, keyframe, sent) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (row_id, username, device_id, mode, ts, int(keyframe), json.dumps(stored)))
+
+    def record_verified(self, username: str, device_id: str, values: Dict[str, Any],
+                        ts: float | None = None) -> int | None:
+        """
+        Attaches echo-verified values (parameter_rules.decode_echo) to the
+        latest send to this device. May be called off the Tk thread. Records
+        nothing (returns None) while a send can't be written.
+        """
+        ts = time.time() if ts is None else ts
+        # The send being verified may still be queued
+        if not self._writer.flush():
+            return None
+        latest = self._latest_send(username, device_id)
+        if latest is None:
+            return None
+        row_id, sent = latest
+        delta = json.dumps(make_delta(sent, dict(values)))
+        self._enqueue("UPDATE param_history SET verified = ?, verified_ts = ? WHERE id = ?",
+                      (delta, ts, row_id))
+        return row_id
+
+    def _latest_send(self, username: str, device_id: str) -> tuple | None:
+        """(row id, full sent values) of the latest send, from memory or, after a restart, the table."""
+        key = (username, device_id)
+        with self._lock:
+            latest = self._latest.get(key)
+        if latest is not None:
+            return latest
+
+        # Own connection: verify runs on a worker thread
+        conn = _connect(self.db_path, check_same_thread=False)
+        try:
+            row = conn.execute(
+                "SELECT id, mode FROM param_history WHERE username = ? AND device_id = ? "
+                "ORDER BY id DESC LIMIT 1",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            values: Dict[str, Any] = {}
+            for _id, keyframe, sent in self._chain_rows(key + (row[1],), row[0], conn=conn):
+                values = json.loads(sent) if keyframe else apply_delta(values, json.loads(sent))
+        finally:
+            conn.close()
+
+        with self._lock:
+            # A send recorded meanwhile is newer than anything on disk
+            return self._latest.setdefault(key, (row[0], values))
+
+    def _enqueue(self, sql: str | None, args: tuple):
+        # Statements queue in order; the single "drain" key coalesces them
+        # into one transaction per worker pass
+        with self._lock:
+            self._statements.append((sql, args))
+        self._writer.submit("drain", self._drain)
+
+    def _drain(self):
+        """Runs on the persistence worker thread (which owns _write_conn)."""
+        with self._lock:
+            statements, self._statements = self._statements, []
+        if not statements:
+            return
+        heads: Dict[tuple, tuple] = {}
+        latest: Dict[tuple, tuple] = {}
+        try:
+            if self._write_conn is None:
+                self._write_conn = _connect(self.db_path, check_same_thread=False)
+            with self._write_conn:
+                for sql, args in statements:
+                    if sql is None:
+                        sql, args = self._send_row(args, heads, latest)
+                    self._write_conn.execute(sql, args)
+        except Exception:
+            # Nothing was committed: put the batch back ahead of anything queued since
+            with self._lock:
+                self._statements[:0] = statements
+            raise
+        with self._lock:
+            self._heads.update(heads)
+            self._latest.update(latest)
+
+    # ---------------- Queries ----------------
+    def _chain_rows(self, chain: tuple, upto_id: int | None, from_id: int | None = None,
+                    conn: sqlite3.Connection | None = None):
+        """(id, keyframe, sent) rows of a chain from the keyframe at/before from_id."""
+        conn = conn or self.conn
+        username, device_id, mode = chain
+        if from_id is None:
+            from_id = upto_id
+        start = conn.execute(
+            "SELECT MAX(id) FROM param_history WHERE username = ? AND device_id = ? AND mode = ? "
+            "AND keyframe = 1" + (" AND id <= ?" if from_id is not None else ""),
+            chain + ((from_id,) if from_id is not None else ()),
+        ).fetchone()[0]
+        if start is None:
+            return []
+        sql = ("SELECT id, keyframe, sent FROM param_history "
+               "WHERE username = ? AND device_id = ? AND mode = ? AND id >= ?")
+        args = [username, device_id, mode, start]
+        if upto_id is not None:
+            sql += " AND id <= ?"
+            args.append(upto_id)
+        return conn.execute(sql + " ORDER BY id", args).fetchall()
+
+    def query(self, username: str | None = None, device_id: str | None = None,
+              mode: str | None = None, start: float | None = None, end: float | None = None,
+              limit: int | None = None) -> List[HistoryEntry]:
+        """
+        Programmed parameter sets matching every given filter, oldest first,
+        with full sent/verified values rebuilt from the deltas.
+        """
+        self._writer.flush()
+
+        clauses, args = [], []
+        for column, value in (("username", username), ("device_id", device_id), ("mode", mode)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        if start is not None:
+            clauses.append("ts >= ?")
+            args.append(start)
+        if end is not None:
+            clauses.append("ts <= ?")
+            args.append(end)
+
+        sql = ("SELECT id, username, device_id, mode, ts, verified, verified_ts FROM param_history"
+               + (" WHERE " + " AND ".join(clauses) if clauses else "") + " ORDER BY ts, id")
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        rows = self.conn.execute(sql, args).fetchall()
+
+        # Rebuild each chain once, from the keyframe before its first match
+        by_chain: Dict[tuple, List[int]] = {}
+        for r in rows:
+            by_chain.setdefault((r[1], r[2], r[3]), []).append(r[0])
+        full: Dict[int, Dict[str, Any]] = {}
+        for chain, ids in by_chain.items():
+            wanted = set(ids)
+            values: Dict[str, Any] = {}
+            for row_id, keyframe, sent in self._chain_rows(chain, max(ids), min(ids)):
+                values = json.loads(sent) if keyframe else apply_delta(values, json.loads(sent))
+                if row_id in wanted:
+                    full[row_id] = values
+
+        return [
+            HistoryEntry(r[0], r[1], r[2], r[3], r[4], full[r[0]],
+                         apply_delta(full[r[0]], json.loads(r[5])) if r[5] else None, r[6])
+            for r in rows
+        ]
+
+    def programmed_at(self, username: str, device_id: str, mode: str, when: float) -> HistoryEntry | None:
+        """The last parameter set sent to the device in this mode at or before `when`."""
+        self._writer.flush()
+        chain = (username, device_id, mode)
+        row = self.conn.execute(
+            "SELECT id, ts, verified, verified_ts FROM param_history "
+            "WHERE username = ? AND device_id = ? AND mode = ? AND ts <= ? "
+            "ORDER BY ts DESC, id DESC LIMIT 1",
+            chain + (when,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        values: Dict[str, Any] = {}
+        for _id, keyframe, sent in self._chain_rows(chain, row[0]):
+            values = json.loads(sent) if keyframe else apply_delta(values, json.loads(sent))
+        verified = apply_delta(values, json.loads(row[2])) if row[2] else None
+        return HistoryEntry(row[0], username, device_id, mode, row[1], values, verified, row[3])
+
+    def close(self):
+        failed = self._writer.close()
+        if self._write_conn is not None:
+            self._write_conn.close()
+        self.conn.close()
+        return failed
@@ -0,0 +1,331 @@
+# models/parameter_rules.py
+"""
+Parameter schema: the one place that describes every programmable parameter
+(range, type, default, and where/how it is packed into the 18-byte
+parameter packet).
+
+At import time the schema is compiled into a table per pacing mode, so
+validating, quantizing and packing a settings record is a single pass over
+that mode's fields. PARAMETER_MAP, PARAMETER_VALIDATION_RULES and
+ACT_THRESH_MAP are kept for the UI and profile import.
+
+Packet layout (all u8):
+  [0x16][0x55][mode][a_pw x100][v_pw x100][lrl][a_amp x10][v_amp x10]
+  [a_ref /10][v_ref /10][a_sens x10][v_sens x10][recov][resp_fact][msr]
+  [act_thresh x10][react_time][hyst]
+
+Verify echo (16 bytes, all u8, same wire units, board order):
+  [mode][resp_fact][recov][react_time][msr][lrl][act_thresh x10][v_sens x10]
+  [v_ref /10][v_pw x100][v_amp x10][a_sens x10][a_ref /10][a_pw x100][a_amp x10][hyst]
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+PACKET_SIZE = 18
+PACKET_HEADER = b"\x16\x55"
+MODE_OFFSET = 2
+
+# Activity Threshold dropdown levels
+ACT_THRESH_MAP = {
+    "V-Low": 1.5,
+    "Low": 2.0,
+    "Med-Low": 2.5,
+    "Med": 3.0,
+    "Med-High": 3.5,
+    "High": 4.0,
+    "V-High": 4.5
+}
+
+MODE_CODES = {
+    "AOO": 0, "VOO": 1, "AAI": 2, "VVI": 3,
+    "AOOR": 4, "VOOR": 5, "AAIR": 6, "VVIR": 7
+}
+MODE_NAMES = {code: name for name, code in MODE_CODES.items()}
+
+# Parameters per mode, in the order DataEntry shows them
+PARAMETER_MAP = {
+    "AOO": ["Lower Rate Limit", "Upper Rate Limit", "Atrial Amplitude", "Atrial Pulse Width"],
+    "VOO": ["Lower Rate Limit", "Upper Rate Limit", "Ventricular Amplitude", "Ventricular Pulse Width"],
+    "AAI": ["Lower Rate Limit", "Upper Rate Limit", "Atrial Amplitude", "Atrial Pulse Width", "Atrial Sensitivity", "ARP", "Hysteresis"],
+    "VVI": ["Lower Rate Limit", "Upper Rate Limit", "Ventricular Amplitude", "Ventricular Pulse Width", "Ventricular Sensitivity", "VRP", "Hysteresis"],
+
+    # Rate Adaptive Modes
+    "AOOR": ["Lower Rate Limit", "Upper Rate Limit", "Maximum Sensor Rate", "Atrial Amplitude", "Atrial Pulse Width", "Activity Threshold", "Reaction Time", "Response Factor", "Recovery Time"],
+    "VOOR": ["Lower Rate Limit", "Upper Rate Limit", "Maximum Sensor Rate", "Ventricular Amplitude", "Ventricular Pulse Width", "Activity Threshold", "Reaction Time", "Response Factor", "Recovery Time"],
+    "AAIR": ["Lower Rate Limit", "Upper Rate Limit", "Maximum Sensor Rate", "Atrial Amplitude", "Atrial Pulse Width", "Atrial Sensitivity", "ARP", "Hysteresis", "Activity Threshold", "Reaction Time", "Response Factor", "Recovery Time"],
+    "VVIR": ["Lower Rate Limit", "Upper Rate Limit", "Maximum Sensor Rate", "Ventricular Amplitude", "Ventricular Pulse Width", "Ventricular Sensitivity", "VRP", "Hysteresis", "Activity Threshold", "Reaction Time", "Response Factor", "Recovery Time"],
+}
+
+
+@dataclass(frozen=True)
+class ParamSpec:
+    name: str                # settings key / UI label
+    key: str | None          # key in the params dict (None = not sent to the board)
+    min_val: float = 0
+    max_val: float = 0
+    data_type: type = int
+    default: float = 0       # params value sent when the mode doesn't use it
+    offset: int | None = None  # byte in the packet
+    scale: float = 1         # wire byte = round(params value * scale)
+    choices: Dict[str, float] | None = None  # label -> params value (dropdowns)
+
+
+# Every parameter, in DataEntry order. Defaults are valid values (not 0)
+# so the firmware doesn't reject a packet over a field the mode ignores.
+PARAMETER_SPECS: Dict[str, ParamSpec] = {spec.name: spec for spec in [
+    ParamSpec("Lower Rate Limit", "lrl", 30, 175, int, default=60, offset=5),
+    ParamSpec("Upper Rate Limit", None, 50, 175, int),
+    ParamSpec("Maximum Sensor Rate", "msr", 50, 175, int, default=120, offset=14),
+    ParamSpec("Atrial Amplitude", "a_amp", 0.1, 5.0, float, default=3.5, offset=6, scale=10),
+    ParamSpec("Atrial Pulse Width", "a_pw", 0.05, 2, float, default=1.0, offset=3, scale=100),
+    ParamSpec("Atrial Sensitivity", "a_sens", 0, 5.0, float, default=2.5, offset=10, scale=10),
+    ParamSpec("Ventricular Amplitude", "v_amp", 0.1, 5.0, float, default=3.5, offset=7, scale=10),
+    ParamSpec("Ventricular Pulse Width", "v_pw", 0.05, 2, float, default=1.0, offset=4, scale=100),
+    ParamSpec("Ventricular Sensitivity", "v_sens", 0, 5.0, float, default=2.5, offset=11, scale=10),
+    ParamSpec("VRP", "v_ref", 150, 500, int, default=320, offset=9, scale=0.1),
+    ParamSpec("ARP", "a_ref", 150, 500, int, default=250, offset=8, scale=0.1),
+    ParamSpec("PVARP", None, 150, 500, int),
+    ParamSpec("Hysteresis", "hyst", 0, 1, int, default=0, offset=17),
+    # Sent as the level x10 (Med = 30)
+    ParamSpec("Activity Threshold", "act_thresh", default=30, offset=15,
+              choices={label: round(level * 10) for label, level in ACT_THRESH_MAP.items()}),
+    ParamSpec("Reaction Time", "react_time", 10, 50, int, default=30, offset=16),      # 10-50 sec
+    ParamSpec("Response Factor", "resp_fact", 1, 16, int, default=8, offset=13),       # 1-16
+    ParamSpec("Recovery Time", "recov", 2, 16, int, default=5, offset=12),             # 2-16 min
+]}
+
+# (name, must be >= name, message)
+CROSS_CHECKS = [
+    ("Upper Rate Limit", "Lower Rate Limit", "Error: URL cannot be less than LRL."),
+]
+
+# name -> (min, max, type); Activity Threshold is a dropdown, so it has no range
+PARAMETER_VALIDATION_RULES = {
+    spec.name: (spec.min_val, spec.max_val, spec.data_type)
+    for spec in PARAMETER_SPECS.values() if spec.choices is None
+}
+
+
+def _quantize(value: float, scale: float) -> int:
+    # Round half up; plain int() truncated 0.29 * 100 to 28
+    return int(value * scale + 0.5)
+
+
+# ---------------- Compiled tables ----------------
+@dataclass(frozen=True)
+class _CompiledMode:
+    code: int
+    # (name, offset, min, max, is_int, scale, choices) for the mode's parameters
+    fields: Tuple[tuple, ...]
+    # Packet with the header, mode code and every default already filled in
+    template: bytes
+    cross: Tuple[tuple, ...]
+
+
+def _compile_mode(mode: str) -> _CompiledMode:
+    template = bytearray(PACKET_SIZE)
+    template[0:2] = PACKET_HEADER
+    template[MODE_OFFSET] = MODE_CODES[mode]
+    for spec in PARAMETER_SPECS.values():
+        if spec.offset is not None:
+            template[spec.offset] = _quantize(spec.default, spec.scale)
+
+    names = PARAMETER_MAP[mode]
+    fields = tuple(
+        (spec.name, spec.offset, spec.min_val, spec.max_val, spec.data_type is int, spec.scale, spec.choices)
+        for spec in (PARAMETER_SPECS[name] for name in names)
+    )
+    cross = tuple(check for check in CROSS_CHECKS if check[0] in names and check[1] in names)
+    return _CompiledMode(MODE_CODES[mode], fields, bytes(template), cross)
+
+
+_COMPILED: Dict[str, _CompiledMode] = {mode: _compile_mode(mode) for mode in PARAMETER_MAP}
+
+# (key, offset, scale) of every field on the wire, for decoding
+_WIRE_FIELDS = tuple(
+    (spec.key, spec.offset, spec.scale) for spec in PARAMETER_SPECS.values() if spec.offset is not None
+)
+
+ECHO_SIZE = 16
+ECHO_LAYOUT = ("mode", "resp_fact", "recov", "react_time", "msr", "lrl", "act_thresh", "v_sens",
+               "v_ref", "v_pw", "v_amp", "a_sens", "a_ref", "a_pw", "a_amp", "hyst")
+_SCALES = {spec.key: spec.scale for spec in PARAMETER_SPECS.values() if spec.key is not None}
+_ECHO_FIELDS = tuple((key, offset, _SCALES[key]) for offset, key in enumerate(ECHO_LAYOUT) if key != "mode")
+
+
+# ---------------- Single record ----------------
+def _parse(raw: str, is_int: bool) -> float:
+    return int(raw) if is_int else float(raw)
+
+
+def _check_into(compiled: _CompiledMode, data: Dict[str, str], packet: bytearray) -> List[str]:
+    """Validates data and writes its wire bytes into packet. Returns the errors."""
+    errors = []
+    values = {}
+    for name, offset, min_val, max_val, is_int, scale, choices in compiled.fields:
+        raw = data.get(name, "")
+        if raw == "":
+            errors.append(f"Missing '{name}'.")
+            continue
+        if choices is not None:
+            value = choices.get(raw)
+            if value is None:
+                errors.append(f"Invalid {name} '{raw}'.")
+                continue
+        else:
+            try:
+                value = _parse(raw, is_int)
+            except ValueError:
+                errors.append(f"Error in '{name}': Value must be a number.")
+                continue
+            if not (min_val <= value <= max_val):
+                errors.append(f"Error in '{name}': Value must be between {min_val} and {max_val}.")
+                continue
+        values[name] = value
+        if offset is not None:
+            packet[offset] = _quantize(value, scale)
+
+    for name, other, message in compiled.cross:
+        if name in values and other in values and values[name] < values[other]:
+            errors.append(message)
+    return errors
+
+
+def validate_settings(mode: str, data: Dict[str, str]) -> List[str]:
+    """Every problem with a settings record (empty list = valid)."""
+    compiled = _COMPILED.get(mode)
+    if compiled is None:
+        return [f"Unknown mode '{mode}'."]
+    return _check_into(compiled, data, bytearray(compiled.template))
+
+
+def encode_settings(mode: str, data: Dict[str, str]) -> bytes:
+    """
+    Validates a DataEntry settings record and packs it into the 18-byte
+    parameter packet. Raises ValueError with the first problem found.
+    """
+    compiled = _COMPILED.get(mode)
+    if compiled is None:
+        raise ValueError(f"Unknown mode '{mode}'.")
+    packet = bytearray(compiled.template)
+    errors = _check_into(compiled, data, packet)
+    if errors:
+        raise ValueError(errors[0])
+    return bytes(packet)
+
+
+def decode_packet(packet: bytes) -> Dict[str, float]:
+    """The params dict (lrl, a_amp, act_thresh, ...) a packet carries, as quantized."""
+    params = {"mode": packet[MODE_OFFSET]}
+    for key, offset, scale in _WIRE_FIELDS:
+        value = round(packet[offset] / scale, 2)
+        params[key] = int(value) if value.is_integer() else value
+    return params
+
+
+def decode_echo(echo: bytes) -> Dict[str, float]:
+    """The params dict a verify echo reports, in decode_packet's keys and units."""
+    if len(echo) != ECHO_SIZE:
+        raise ValueError(f"Echo must be {ECHO_SIZE} bytes, got {len(echo)}.")
+    params = {"mode": echo[0]}
+    for key, offset, scale in _ECHO_FIELDS:
+        value = round(echo[offset] / scale, 2)
+        params[key] = int(value) if value.is_integer() else value
+    return params
+
+
+# ---------------- Batches ----------------
+def _parse_column(values: np.ndarray, is_int: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """Parses an object column of strings like _parse does. Returns (numbers, parse_ok)."""
+    try:
+        # Calls int()/float() per cell in C; far faster than a str-dtype array
+        numbers = values.astype(np.int64 if is_int else np.float64).astype(np.float64)
+        return numbers, np.ones(values.size, dtype=bool)
+    except (ValueError, OverflowError):
+        pass
+    # Some cells are not numbers; fall back per cell for this column only
+    numbers = np.full(values.size, np.nan)
+    ok = np.zeros(values.size, dtype=bool)
+    for i, v in enumerate(values.tolist()):
+        try:
+            numbers[i] = _parse(v, is_int)
+            ok[i] = True
+        except (ValueError, OverflowError):
+            pass
+    return numbers, ok
+
+
+def _check_batch(modes: Sequence[str], settings: Sequence[Dict[str, str]]):
+    """
+    Column-wise version of _check_into. Returns (errors per record,
+    (n, PACKET_SIZE) uint8 packets); rows with errors are not meaningful.
+    """
+    n = len(modes)
+    errors: List[List[str]] = [[] for _ in range(n)]
+    packets = np.zeros((n, PACKET_SIZE), dtype=np.uint8)
+    if n == 0:
+        return errors, packets
+
+    mode_arr = np.array(modes)
+    for i in np.flatnonzero(~np.isin(mode_arr, list(_COMPILED))):
+        errors[i].append(f"Unknown mode '{modes[i]}'.")
+
+    for mode, compiled in _COMPILED.items():
+        rows = np.flatnonzero(mode_arr == mode)
+        if rows.size == 0:
+            continue
+        packets[rows] = np.frombuffer(compiled.template, dtype=np.uint8)
+        records = [settings[i] for i in rows.tolist()]
+        parsed: Dict[str, np.ndarray] = {}
+        for name, offset, min_val, max_val, is_int, scale, choices in compiled.fields:
+            cells = np.empty(rows.size, dtype=object)
+            cells[:] = [record.get(name, "") for record in records]
+            present = cells != ""
+            for i in rows[~present]:
+                errors[i].append(f"Missing '{name}'.")
+
+            if choices is not None:
+                numbers = np.array([choices.get(c, np.nan) for c in cells.tolist()], dtype=np.float64)
+                ok = ~np.isnan(numbers)
+                for i in rows[present & ~ok]:
+                    errors[i].append(f"Invalid {name} '{settings[i][name]}'.")
+            else:
+                numbers, ok = _parse_column(cells, is_int)
+                for i in rows[present & ~ok]:
+                    errors[i].append(f"Error in '{name}': Value must be a number.")
+                # Written as not-in-range so NaN/inf are rejected like in _check_into
+                out_of_range = present & ok & ~((numbers >= min_val) & (numbers <= max_val))
+                for i in rows[out_of_range]:
+                    errors[i].append(f"Error in '{name}': Value must be between {min_val} and {max_val}.")
+                ok &= ~out_of_range
+
+            numbers = np.where(ok, numbers, np.nan)
+            parsed[name] = numbers
+            if offset is not None:
+                packets[rows[ok], offset] = np.floor(numbers[ok] * scale + 0.5).astype(np.uint8)
+
+        for name, other, message in compiled.cross:
+            # NaN comparisons are False, so bad values are not double-reported
+            for i in rows[parsed[name] < parsed[other]]:
+                errors[i].append(message)
+    return errors, packets
+
+
+def validate_batch(modes: Sequence[str], settings: Sequence[Dict[str, str]]) -> List[List[str]]:
+    """Validates many records at once. Returns the errors per record."""
+    return _check_batch(modes, settings)[0]
+
+
+def encode_batch(modes: Sequence[str], settings: Sequence[Dict[str, str]]) -> bytes:
+    """
+    Packs many records into one contiguous buffer of len(modes) packets
+    (record i is at i * PACKET_SIZE). Raises ValueError naming the first
+    invalid record.
+    """
+    errors, packets = _check_batch(modes, settings)
+    for i, errs in enumerate(errors):
+        if errs:
+            raise ValueError(f"Record {i}: {errs[0]}")
+    return packets.tobytes()
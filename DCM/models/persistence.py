@@ -0,0 +1,145 @@
+# models/persistence.py
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+# Tries per write before it is reported as failed
+WRITE_ATTEMPTS = 3
+
+
+def atomic_write_json(path: str, data: Any) -> None:
+    """
+    Writes JSON to a temp file in the same directory, fsyncs it, then renames
+    it over path. A crash mid-write leaves the previous file intact.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class WriteBehindWorker:
+    """
+    Background writer that coalesces updates by key.
+
+    submit(key, fn) returns immediately; if fn has not run yet for that key
+    it is replaced, so a burst of saves to the same target costs one write.
+    Pending writes run on a single daemon thread after a short delay.
+    flush() is a barrier: it blocks until everything submitted so far has
+    been written. close() flushes and stops the thread.
+
+    A write that raises is retried (WRITE_ATTEMPTS in all, a delay apart).
+    If it still fails it is kept in failed (until a newer submit for its
+    key replaces it), on_error(name, key, error) is called on the worker
+    thread, and flush() / close() report it.
+    """
+
+    def __init__(self, name: str = "persistence", delay_s: float = 0.05,
+                 on_error: Callable[[str, Hashable, Exception], None] | None = None):
+        self.name = name
+        self.delay_s = delay_s
+        self.on_error = on_error
+        # key -> (fn, the error it last failed with)
+        self.failed: Dict[Hashable, Tuple[Callable[[], None], Exception]] = {}
+        self._pending: Dict[Hashable, Callable[[], None]] = {}
+        self._attempts: Dict[Hashable, int] = {}
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, key: Hashable, fn: Callable[[], None]) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehindWorker is closed.")
+            # Re-inserting moves the key to the back, so writes keep submit order
+            self._pending.pop(key, None)
+            self._pending[key] = fn
+            self._attempts.pop(key, None)
+            self.failed.pop(key, None)
+            self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Waits until all submitted writes have run. Returns False on timeout,
+        or if any write has failed for good (see failed).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return not self.failed
+
+    def close(self, timeout: float | None = 5.0) -> Dict[Hashable, Exception]:
+        """Flushes and stops the thread. Returns the writes that failed for good (key -> error)."""
+        with self._cond:
+            if not self._closed:
+                self._closed = True
+                self._cond.notify_all()
+        self._thread.join(timeout)
+        with self._cond:
+            return {key: error for key, (_fn, error) in self.failed.items()}
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                # Give a burst of saves a moment to coalesce (skipped when closing)
+                if not self._closed:
+                    self._cond.wait(self.delay_s)
+                batch = self._pending
+                self._pending = {}
+                self._busy = True
+
+            errors = []
+            for key, fn in batch.items():
+                try:
+                    fn()
+                except Exception as e:
+                    errors.append((key, fn, e))
+
+            given_up = []
+            with self._cond:
+                failed_keys = {key for key, _fn, _e in errors}
+                for key in batch:
+                    if key not in failed_keys:
+                        self._attempts.pop(key, None)
+                for key, fn, e in errors:
+                    if key in self._pending:
+                        continue  # superseded by a newer submit while it ran
+                    attempts = self._attempts.get(key, 0) + 1
+                    if attempts < WRITE_ATTEMPTS:
+                        self._attempts[key] = attempts
+                        self._pending[key] = fn
+                    else:
+                        self._attempts.pop(key, None)
+                        self.failed[key] = (fn, e)
+                        given_up.append((key, e))
+                self._busy = False
+                self._cond.notify_all()
+            for key, e in given_up:
+                print(f"[Persistence] {self.name}: write {key!r} failed: {e}")
+                if self.on_error is not None:
+                    try:
+                        self.on_error(self.name, key, e)
+                    except Exception as report_error:
+                        print(f"[Persistence] Error handler failed: {report_error}")
@@ -0,0 +1,175 @@
+# models/profile_io.py
+"""
+Streaming bulk import/export of patient parameter profiles.
+
+A profile is one (username, mode, settings) record:
+  JSON lines: {"username": "...", "mode": "AAI", "settings": {"Lower Rate Limit": "60", ...}}
+  CSV:        username, mode, then one column per parameter (blank = unused)
+
+Records are read and validated in fixed-size chunks, so memory stays
+constant regardless of file size. Each chunk is validated column by column
+with NumPy against the parameter schema (the same rules DataEntry applies),
+and the valid records are saved in one bulk write.
+"""
+import csv
+import itertools
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from models import parameter_rules
+from models.parameter_rules import PARAMETER_MAP
+
+# Column order for CSV (every parameter any mode uses)
+ALL_PARAMETERS = list(dict.fromkeys(p for params in PARAMETER_MAP.values() for p in params))
+CSV_FIELDS = ["username", "mode"] + ALL_PARAMETERS
+
+CHUNK_SIZE = 5000
+# Errors kept in the report (the rest are only counted / written to errors_path)
+MAX_REPORTED_ERRORS = 100
+
+Record = Tuple[str, str, Dict[str, str]]
+
+
+@dataclass
+class ImportReport:
+    total: int = 0
+    imported: int = 0
+    rejected: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)  # (record number, message)
+
+    def summary_text(self) -> str:
+        return f"Read {self.total} profiles: {self.imported} imported, {self.rejected} rejected."
+
+
+def _detect_format(path: str, fmt: str | None) -> str:
+    if fmt:
+        return fmt.lower()
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+# ---------------- Readers / writers ----------------
+def _read_jsonl(f) -> Iterator[Record | str]:
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+            settings = obj.get("settings", {})
+            yield (str(obj.get("username", "")).strip(), str(obj.get("mode", "")).strip(),
+                   {k: str(v) for k, v in settings.items()})
+        except (ValueError, AttributeError) as e:
+            yield f"Malformed JSON line: {e}"
+
+
+def _read_csv(f) -> Iterator[Record | str]:
+    for row in csv.DictReader(f):
+        settings = {k: v.strip() for k, v in row.items() if k in ALL_PARAMETERS and v and v.strip()}
+        yield (row.get("username") or "").strip(), (row.get("mode") or "").strip(), settings
+
+
+def iter_profiles(path: str, fmt: str | None = None) -> Iterator[Record | str]:
+    """Yields records (or an error string for an unreadable line) one at a time."""
+    reader = _read_csv if _detect_format(path, fmt) == "csv" else _read_jsonl
+    with open(path, "r", newline="") as f:
+        yield from reader(f)
+
+
+# ---------------- Validation ----------------
+def validate_batch(records: List[Record]) -> List[List[str]]:
+    """
+    Validates a chunk of records against the parameter schema. Returns a
+    list of error messages per record (empty list = valid).
+    """
+    errors = parameter_rules.validate_batch([r[1] for r in records], [r[2] for r in records])
+    for errs, record in zip(errors, records):
+        if not record[0]:
+            errs.insert(0, "Missing username.")
+    return errors
+
+
+# ---------------- Import / export ----------------
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_profiles(path: str, pacing_model, fmt: str | None = None,
+                    chunk_size: int = CHUNK_SIZE, errors_path: str | None = None) -> ImportReport:
+    """
+    Imports profiles into the PacingModel. Only the mode's own parameters are
+    stored. Per-record errors go into the report (first MAX_REPORTED_ERRORS)
+    and, if errors_path is given, to a CSV of every rejected record.
+    """
+    report = ImportReport()
+    err_file = open(errors_path, "w", newline="") if errors_path else None
+    err_writer = csv.writer(err_file) if err_file else None
+    if err_writer:
+        err_writer.writerow(["record", "username", "mode", "error"])
+
+    try:
+        for chunk in _chunks(iter_profiles(path, fmt), chunk_size):
+            base = report.total + 1
+            report.total += len(chunk)
+            records: List[Record] = []
+            numbers: List[int] = []
+            for offset, item in enumerate(chunk):
+                if isinstance(item, str):
+                    _report(report, err_writer, base + offset, ("", "", {}), [item])
+                else:
+                    records.append(item)
+                    numbers.append(base + offset)
+
+            valid: List[Record] = []
+            for number, record, errs in zip(numbers, records, validate_batch(records)):
+                if errs:
+                    _report(report, err_writer, number, record, errs)
+                else:
+                    username, mode, settings = record
+                    valid.append((username, mode, {k: settings[k] for k in PARAMETER_MAP[mode]}))
+
+            if valid:
+                # One chunk in flight at a time keeps memory bounded
+                pacing_model.flush()
+                pacing_model.save_settings_bulk(valid)
+                report.imported += len(valid)
+        pacing_model.flush()
+    finally:
+        if err_file:
+            err_file.close()
+    return report
+
+
+def _report(report: ImportReport, err_writer, number: int, record: Record, errs: List[str]):
+    report.rejected += 1
+    message = " ".join(errs)
+    if len(report.errors) < MAX_REPORTED_ERRORS:
+        report.errors.append((number, message))
+    if err_writer:
+        err_writer.writerow([number, record[0], record[1], message])
+
+
+def export_profiles(path: str, pacing_model, fmt: str | None = None, username: str | None = None) -> int:
+    """Streams every stored profile (or one user's) to a file. Returns the count."""
+    fmt = _detect_format(path, fmt)
+    count = 0
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for user, mode, settings in pacing_model.iter_settings(username):
+                writer.writerow({"username": user, "mode": mode, **settings})
+                count += 1
+        else:
+            for user, mode, settings in pacing_model.iter_settings(username):
+                f.write(json.dumps({"username": user, "mode": mode, "settings": settings}) + "\n")
+                count += 1
+    os.replace(tmp_path, path)
+    return count
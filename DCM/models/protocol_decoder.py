@@ -0,0 +1,234 @@
+# models/protocol_decoder.py
+"""
+Offline decoder for raw serial captures (models/serial_capture).
+
+Splits a capture into the packets the DCM and the board exchange, using
+the same layouts SerialManager builds and parses:
+
+  TX  [16][55] 11 B  LED set             TX  [16][55] 18 B  parameters
+  TX  [16][22] 11 B  LED echo request    TX  [16][22] 18 B  parameter echo request
+  TX  [16][33] 16 B  egram start         TX  [16][34] 16 B  egram stop
+  RX  9 B  LED echo                      RX  16 B  parameter echo
+  RX  [01] ... 16 B egram frames (EGRAM_FRAME_DTYPE)
+
+Commands are one chunk each (one write), so they are classified by header,
+opcode and length in one vectorized pass over the chunk table. Echo
+replies are checked against the request that preceded them. The egram
+reads are joined into one byte stream and framed exactly as the live
+reader frames them (serial_comms.frame_egram_stream): a window of aligned
+frames per step, growing while it stays full, so a healthy stream costs a
+handful of NumPy calls per megabyte. Frames are views of the mapped
+capture until they are gathered into one array.
+
+Anything that does not fit is reported rather than dropped: malformed
+commands, short or unexpected replies, resync points (where and how many
+bytes were skipped) and egram frames with non-finite samples.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+
+from models.audit_log import RX, TX
+from models.egram_recorder import frames_to_records
+from models.egram_stats import SEQ_MODULO
+from models.serial_capture import load_capture
+from models.serial_comms import EGRAM_FRAME_DTYPE, EGRAM_FRAME_SIZE, EGRAM_HEADER, frame_egram_stream
+
+COMMAND_HEADER = 0x16
+
+LED_SET = 0
+PARAMS_SET = 1
+LED_ECHO_REQUEST = 2
+PARAMS_ECHO_REQUEST = 3
+EGRAM_START = 4
+EGRAM_STOP = 5
+LED_ECHO = 6
+PARAMS_ECHO = 7
+EGRAM_FRAME = 8
+UNKNOWN = 9
+
+KIND_NAMES = {
+    LED_SET: "LED set (0x55)", PARAMS_SET: "Parameters (0x55)",
+    LED_ECHO_REQUEST: "LED echo request (0x22)", PARAMS_ECHO_REQUEST: "Param echo request (0x22)",
+    EGRAM_START: "Egram start (0x33)", EGRAM_STOP: "Egram stop (0x34)",
+    LED_ECHO: "LED echo", PARAMS_ECHO: "Param echo", EGRAM_FRAME: "Egram frame", UNKNOWN: "Unknown",
+}
+
+# (opcode, length) -> kind of every command the DCM sends
+COMMAND_LAYOUTS = {
+    (0x55, 11): LED_SET, (0x55, 18): PARAMS_SET,
+    (0x22, 11): LED_ECHO_REQUEST, (0x22, 18): PARAMS_ECHO_REQUEST,
+    (0x33, 16): EGRAM_START, (0x34, 16): EGRAM_STOP,
+}
+# request kind -> (reply kind, reply length)
+REPLY_LAYOUTS = {LED_ECHO_REQUEST: (LED_ECHO, 9), PARAMS_ECHO_REQUEST: (PARAMS_ECHO, 16)}
+
+PACKET_DTYPE = np.dtype([
+    ("t", "<f8"),
+    ("direction", "u1"),
+    ("kind", "u1"),
+    ("ok", "?"),
+    ("offset", "<i8"),    # byte offset in the .rawcap file
+    ("length", "<u4"),
+])
+RESYNC_DTYPE = np.dtype([
+    ("t", "<f8"),
+    ("offset", "<i8"),    # byte offset in the .rawcap file of the first skipped byte
+    ("skipped", "<u4"),
+])
+
+
+@dataclass
+class DecodedCapture:
+    packets: np.ndarray            # PACKET_DTYPE, commands and replies (not egram frames)
+    frames: np.ndarray             # EGRAM_FRAME_DTYPE
+    frame_t: np.ndarray            # arrival time of each frame
+    resyncs: np.ndarray            # RESYNC_DTYPE
+    bad_frames: np.ndarray         # indices into frames with non-finite samples
+    trailing_bytes: int = 0        # partial (or unconfirmed) frame at the end of the egram stream
+    dropped_frames: int = 0        # from seq gaps
+    total_bytes: int = 0
+    decode_s: float = 0.0
+    counts: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def summary_lines(self) -> List[str]:
+        rate = self.total_bytes / self.decode_s / 1e6 if self.decode_s > 0 else float("inf")
+        lines = [f"{self.total_bytes:,} bytes decoded in {self.decode_s * 1000:.1f} ms ({rate:.0f} MB/s)",
+                 f"{'packet':<28}{'count':>12}{'malformed':>11}"]
+        for name, c in self.counts.items():
+            lines.append(f"{name:<28}{c['count']:>12,}{c['malformed']:>11,}")
+        skipped = int(self.resyncs["skipped"].sum()) if len(self.resyncs) else 0
+        lines.append(f"Resyncs: {len(self.resyncs):,} ({skipped:,} bytes skipped), "
+                     f"dropped frames (seq gaps): {self.dropped_frames:,}, trailing bytes: {self.trailing_bytes}")
+        return lines
+
+    def anomaly_lines(self, data: np.ndarray, limit: int = 20) -> List[str]:
+        """The first `limit` problems, oldest first, with their bytes in hex."""
+        events = []
+        for p in self.packets[~self.packets["ok"]]:
+            raw = bytes(data[p["offset"]:p["offset"] + min(int(p["length"]), 32)])
+            events.append((p["t"], f"{'TX' if p['direction'] == TX else 'RX'} malformed "
+                                   f"{KIND_NAMES[int(p['kind'])]} ({p['length']} B) @ {p['offset']}: {raw.hex().upper()}"))
+        for r in self.resyncs[:limit]:
+            raw = bytes(data[r["offset"]:r["offset"] + min(int(r["skipped"]), 32)])
+            events.append((r["t"], f"RX resync, skipped {r['skipped']} B @ {r['offset']}: {raw.hex().upper()}"))
+        for i in self.bad_frames[:limit]:
+            events.append((self.frame_t[i], f"RX egram frame seq {self.frames['seq'][i]} has non-finite samples"))
+        events.sort(key=lambda e: e[0])
+        return [f"{t:10.3f} s  {text}" for t, text in events[:limit]]
+
+    def egram_records(self) -> np.ndarray:
+        """The egram frames as recorder records (for ReplaySource)."""
+        return frames_to_records(self.frames, self.frame_t)
+
+
+def _stream_to_file(positions, stream_starts, file_starts):
+    """Maps positions in the joined egram stream back to capture file offsets (and chunk numbers)."""
+    j = np.searchsorted(stream_starts, positions, side="right") - 1
+    return file_starts[j] + (positions - stream_starts[j]), j
+
+
+def decode(chunks: np.ndarray, data: np.ndarray, checksum: bool = False) -> DecodedCapture:
+    """checksum: frame egram reads by header and checksum (see SerialManager.egram_checksum)."""
+    t_start = time.perf_counter()
+    lengths = chunks["length"].astype(np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(chunks) else np.zeros(0, np.int64)
+    is_egram = (chunks["direction"] == RX) & (chunks["opcode"] == EGRAM_HEADER)
+
+    # ---- Commands: one write each ----
+    tx = np.flatnonzero(chunks["direction"] == TX)
+    tx_kind = np.full(tx.size, UNKNOWN, dtype=np.uint8)
+    tx_ok = np.zeros(tx.size, dtype=bool)
+    if tx.size:
+        head = data[starts[tx]]
+        opcode = data[np.minimum(starts[tx] + 1, data.size - 1)]
+        for (op, length), kind in COMMAND_LAYOUTS.items():
+            match = (head == COMMAND_HEADER) & (opcode == op) & (lengths[tx] == length)
+            tx_kind[match] = kind
+            tx_ok |= match
+
+    # ---- Replies: checked against the request before them ----
+    rx = np.flatnonzero((chunks["direction"] == RX) & ~is_egram)
+    rx_kind = np.full(rx.size, UNKNOWN, dtype=np.uint8)
+    rx_ok = np.zeros(rx.size, dtype=bool)
+    if rx.size and tx.size:
+        before = np.searchsorted(tx, rx) - 1
+        request = np.where(before >= 0, tx_kind[np.maximum(before, 0)], UNKNOWN)
+        for req, (kind, length) in REPLY_LAYOUTS.items():
+            expected = request == req
+            rx_kind[expected] = kind
+            rx_ok |= expected & (lengths[rx] == length)
+
+    index = np.concatenate((tx, rx))
+    packets = np.zeros(index.size, dtype=PACKET_DTYPE)
+    packets["t"] = chunks["t"][index]
+    packets["direction"] = chunks["direction"][index]
+    packets["kind"] = np.concatenate((tx_kind, rx_kind))
+    packets["ok"] = np.concatenate((tx_ok, rx_ok))
+    packets["offset"] = starts[index]
+    packets["length"] = lengths[index]
+    packets = packets[np.argsort(index, kind="stable")]
+
+    # ---- Egram stream: every egram read, joined ----
+    egram = np.flatnonzero(is_egram)
+    others = np.flatnonzero(~is_egram)
+    # Commands and replies are a sliver of the bytes: join the spans between them
+    # (a capture that is all egram reads stays a view of the map)
+    cuts = np.concatenate(([0], np.column_stack((starts[others], starts[others] + lengths[others])).ravel(),
+                           [int(lengths.sum())]))
+    spans = [np.asarray(data[a:b]) for a, b in zip(cuts[0::2], cuts[1::2]) if b > a]
+    stream = spans[0] if len(spans) == 1 else np.concatenate(spans) if spans else np.zeros(0, np.uint8)
+    stream_starts = np.concatenate(([0], np.cumsum(lengths[egram])[:-1])) if egram.size else np.zeros(1, np.int64)
+    file_starts = starts[egram] if egram.size else np.zeros(1, np.int64)
+    egram_t = chunks["t"][egram] if egram.size else np.zeros(1)
+
+    runs, gaps, end = frame_egram_stream(stream, checksum, final=True)
+    if runs:
+        frames = np.concatenate([stream[s:s + c * EGRAM_FRAME_SIZE] for s, c in runs]).view(EGRAM_FRAME_DTYPE)
+        # A frame arrives with the read that delivered its last byte
+        run_starts = np.array([s for s, _ in runs], dtype=np.int64)
+        run_counts = np.array([c for _, c in runs], dtype=np.int64)
+        frames_before = np.concatenate(([0], np.cumsum(run_counts)))
+        chunk_ends = stream_starts + lengths[egram] if egram.size else np.zeros(1, np.int64)
+        last_byte = chunk_ends - EGRAM_FRAME_SIZE  # a frame starting at or before this is complete
+        r = np.searchsorted(run_starts, last_byte, side="right") - 1
+        inside = np.clip((last_byte - run_starts[np.maximum(r, 0)]) // EGRAM_FRAME_SIZE + 1,
+                         0, run_counts[np.maximum(r, 0)])
+        done = np.where(r >= 0, frames_before[np.maximum(r, 0)] + inside, 0)
+        frame_t = np.repeat(egram_t, np.diff(done, prepend=0))
+    else:
+        frames = np.zeros(0, dtype=EGRAM_FRAME_DTYPE)
+        frame_t = np.zeros(0)
+
+    resyncs = np.zeros(len(gaps), dtype=RESYNC_DTYPE)
+    if gaps:
+        gap_pos = np.array([g[0] for g in gaps], dtype=np.int64)
+        resyncs["offset"], j = _stream_to_file(gap_pos, stream_starts, file_starts)
+        resyncs["t"] = egram_t[j]
+        resyncs["skipped"] = [g[1] for g in gaps]
+
+    bad_frames = np.flatnonzero(~(np.isfinite(frames["atr"]) & np.isfinite(frames["vent"])))
+    steps = np.diff(frames["seq"].astype(np.int64)) % SEQ_MODULO
+    dropped = int((steps[(steps > 1) & (steps < SEQ_MODULO // 2)] - 1).sum())
+
+    counts: Dict[str, Dict[str, int]] = {}
+    for kind, name in KIND_NAMES.items():
+        if kind == EGRAM_FRAME:
+            count, malformed = len(frames), len(bad_frames)
+        else:
+            of_kind = packets["kind"] == kind
+            count, malformed = int(of_kind.sum()), int((of_kind & ~packets["ok"]).sum())
+        if count:
+            counts[name] = {"count": count, "malformed": malformed}
+
+    return DecodedCapture(packets=packets, frames=frames, frame_t=frame_t, resyncs=resyncs,
+                          bad_frames=bad_frames, trailing_bytes=int(stream.size - end),
+                          dropped_frames=dropped, total_bytes=int(lengths.sum()),
+                          decode_s=time.perf_counter() - t_start, counts=counts)
+
+
+def decode_capture(path: str) -> DecodedCapture:
+    meta, chunks, data = load_capture(path)
+    return decode(chunks, data, meta.get("egram_checksum", False))
@@ -0,0 +1,174 @@
+# models/rate_response.py
+"""
+Offline model of the board's rate-adaptive logic.
+
+Mirrors the Simulink rate adaptation block:
+  1. activity level is smoothed with a moving average
+  2. desired rate = LRL + response factor * (activity - threshold), saturated
+     to [LRL, MSR]
+  3. the pacing rate ramps towards the desired rate, climbing LRL -> MSR in
+     the Reaction Time and falling MSR -> LRL in the Recovery Time
+
+Parameters use the same keys and units as the dict packed by
+DCMApp._send_settings_to_board (act_thresh is x10, recov is minutes).
+"""
+from dataclasses import dataclass
+from typing import Dict, Any
+
+import numpy as np
+
+RATE_ADAPTIVE_MODES = {4, 5, 6, 7}  # AOOR, VOOR, AAIR, VVIR
+
+# ppm added per unit of activity above threshold, per response factor step
+RATE_PER_ACTIVITY = 2.0
+# Width of the accelerometer moving average (seconds)
+AVERAGE_WINDOW_S = 1.0
+# How often the modelled rate is updated (seconds)
+CONTROL_PERIOD_S = 1.0
+
+# Control steps per target block in simulate_batch
+_BATCH_BLOCK = 1024
+
+
+@dataclass
+class RateResponse:
+    """Result of a simulation, sampled every control period."""
+    t: np.ndarray          # seconds
+    activity: np.ndarray   # smoothed activity level
+    target: np.ndarray     # desired (saturated) sensor rate, ppm
+    rate: np.ndarray       # pacing rate after reaction/recovery ramps, ppm
+
+
+def smooth_activity(activity, fs: float, window_s: float = AVERAGE_WINDOW_S) -> np.ndarray:
+    """Trailing moving average of the activity trace (cumsum based)."""
+    activity = np.asarray(activity, dtype=np.float64)
+    n = max(1, int(round(window_s * fs)))
+    csum = np.cumsum(activity)
+    out = np.empty_like(activity)
+    out[:n] = csum[:n] / np.arange(1, min(n, activity.size) + 1)
+    out[n:] = (csum[n:] - csum[:-n]) / n
+    return out
+
+
+def decimate(trace, fs: float, period_s: float = CONTROL_PERIOD_S) -> np.ndarray:
+    """Block-averages a trace down to one value per control period."""
+    trace = np.asarray(trace, dtype=np.float64)
+    step = max(1, int(round(period_s * fs)))
+    blocks = trace.size // step
+    head = trace[:blocks * step].reshape(blocks, step).mean(axis=1)
+    if trace.size % step:
+        head = np.append(head, trace[blocks * step:].mean())
+    return head
+
+
+def desired_rate(activity, lrl, msr, act_thresh, resp_fact) -> np.ndarray:
+    """Saturated target rate. Parameters broadcast against activity."""
+    threshold = np.asarray(act_thresh, dtype=np.float64) / 10.0
+    excess = np.maximum(np.asarray(activity, dtype=np.float64) - threshold, 0.0)
+    target = lrl + np.asarray(resp_fact, dtype=np.float64) * RATE_PER_ACTIVITY * excess
+    return np.clip(target, lrl, msr)
+
+
+def ramp_steps(lrl, msr, react_time, recov, period_s: float = CONTROL_PERIOD_S):
+    """Largest rate change (ppm) per control period when rising and falling."""
+    span = np.maximum(np.asarray(msr, dtype=np.float64) - lrl, 0.0)
+    up = span * period_s / np.asarray(react_time, dtype=np.float64)
+    down = span * period_s / (np.asarray(recov, dtype=np.float64) * 60.0)
+    return up, down
+
+
+def _ramp(target: np.ndarray, up: float, down: float, start: float) -> np.ndarray:
+    """Slew-limits one target trace (scalar loop; one step per control period)."""
+    out = np.empty(target.size)
+    y = start
+    for i, x in enumerate(target.tolist()):
+        if x > y + up:
+            y += up
+        elif x < y - down:
+            y -= down
+        else:
+            y = x
+        out[i] = y
+    return out
+
+
+def simulate(activity, params: Dict[str, Any], fs: float = 50.0,
+             period_s: float = CONTROL_PERIOD_S) -> RateResponse:
+    """
+    Predicts the pacing-rate curve for one parameter set.
+    activity: accelerometer activity level sampled at fs Hz.
+    params: dict as packed by _send_settings_to_board.
+    """
+    smoothed = activity_profile(activity, fs, period_s)
+    t = np.arange(smoothed.size) * period_s
+
+    lrl = float(params.get("lrl", 60))
+    if int(params.get("mode", 0)) not in RATE_ADAPTIVE_MODES:
+        flat = np.full(smoothed.size, lrl)
+        return RateResponse(t, smoothed, flat, flat.copy())
+
+    msr = float(params.get("msr", 120))
+    target = desired_rate(smoothed, lrl, msr,
+                          params.get("act_thresh", 30), params.get("resp_fact", 8))
+    up, down = ramp_steps(lrl, msr, params.get("react_time", 30),
+                          params.get("recov", 5), period_s)
+    rate = _ramp(target, float(up), float(down), lrl)
+    return RateResponse(t, smoothed, target, rate)
+
+
+def simulate_batch(activity, params: Dict[str, np.ndarray], fs: float = 50.0,
+                   period_s: float = CONTROL_PERIOD_S, reference=None) -> np.ndarray:
+    """
+    Evaluates many parameter sets against one activity trace at once.
+    params maps lrl/msr/act_thresh/resp_fact/react_time/recov to equal-length
+    arrays (one entry per set); the time loop runs once with every set
+    advanced together.
+    With reference=None returns the (n_steps, n_sets) rate matrix. With a
+    reference rate trace (same control grid) returns the per-set RMS error
+    instead, without keeping the full matrix in memory.
+    """
+    return ramp_batch(activity_profile(activity, fs, period_s), params, period_s, reference)
+
+
+def activity_profile(activity, fs: float, period_s: float = CONTROL_PERIOD_S) -> np.ndarray:
+    """Smoothed activity on the control grid (the input to the rate logic)."""
+    return decimate(smooth_activity(activity, fs), fs, period_s)
+
+
+def ramp_batch(smoothed, params: Dict[str, np.ndarray], period_s: float = CONTROL_PERIOD_S,
+               reference=None) -> np.ndarray:
+    """simulate_batch on an already smoothed/decimated activity profile."""
+    smoothed = np.asarray(smoothed, dtype=np.float64)
+    lrl = np.asarray(params["lrl"], dtype=np.float64)
+    msr = np.asarray(params["msr"], dtype=np.float64)
+    up, down = ramp_steps(lrl, msr, params["react_time"], params["recov"], period_s)
+
+    steps = smoothed.size
+    if reference is not None:
+        reference = np.asarray(reference, dtype=np.float64)
+        steps = min(steps, reference.size)
+        sq_err = np.zeros_like(lrl)
+        diff = np.empty_like(lrl)
+    else:
+        rates = np.empty((steps, lrl.size))
+
+    y = lrl.copy()
+    lo = np.empty_like(lrl)
+    # Targets are built a block of control steps at a time to bound memory
+    for start in range(0, steps, _BATCH_BLOCK):
+        stop = min(start + _BATCH_BLOCK, steps)
+        target = desired_rate(smoothed[start:stop, None], lrl, msr,
+                              params["act_thresh"], params["resp_fact"])
+        for i in range(stop - start):
+            np.subtract(y, down, out=lo)
+            np.add(y, up, out=y)
+            np.minimum(np.maximum(target[i], lo, out=lo), y, out=y)
+            if reference is None:
+                rates[start + i] = y
+            else:
+                np.subtract(y, reference[start + i], out=diff)
+                sq_err += diff * diff
+
+    if reference is None:
+        return rates
+    return np.sqrt(sq_err / max(1, steps))
@@ -0,0 +1,184 @@
+# models/rate_sweep.py
+"""
+Parameter sweep over the rate-adaptive settings.
+
+Every combination of Response Factor, Reaction Time, Recovery Time and
+Activity Threshold is run through the rate-response model against one or
+more activity traces and ranked by RMS error against the trace's target
+rate. Combinations are split across a process pool; errors are cached per
+trace hash so a repeated sweep only evaluates new combinations.
+"""
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Any
+
+import numpy as np
+
+from models.parameter_rules import ACT_THRESH_MAP, PARAMETER_SPECS
+from models.rate_response import (
+    CONTROL_PERIOD_S, RATE_ADAPTIVE_MODES, activity_profile, decimate, ramp_batch
+)
+
+_DATA_DIR = os.environ.get("DCM_DATA_DIR") or os.path.dirname(os.path.abspath(__file__))
+SWEEP_CACHE_DIR = os.path.join(_DATA_DIR, "sweep_cache")
+# Part of every cache key: bump when the rate-response model or the error
+# metric changes, so errors cached by an older model are never reused
+SWEEP_MODEL_VERSION = 1
+
+# Default grid: the full programmable range of each parameter
+RESP_FACT_VALUES = list(range(1, 17))      # 1-16
+REACT_TIME_VALUES = [10, 20, 30, 40, 50]   # 10-50 sec, inc 10
+RECOV_VALUES = list(range(2, 17))          # 2-16 min
+THRESH_VALUES = list(ACT_THRESH_MAP.keys())
+# Dropdown label -> act_thresh as packed (level x10)
+_THRESH_PARAM = PARAMETER_SPECS["Activity Threshold"].choices
+
+
+@dataclass
+class ActivityTrace:
+    """An activity trace and the rate the board actually paced at."""
+    activity: np.ndarray    # activity level samples
+    target_rate: np.ndarray # target/observed rate samples (same length)
+    fs: float               # samples per second
+
+    def digest(self) -> str:
+        h = hashlib.sha256()
+        h.update(np.ascontiguousarray(self.activity, dtype=np.float32).tobytes())
+        h.update(np.ascontiguousarray(self.target_rate, dtype=np.float32).tobytes())
+        h.update(repr(float(self.fs)).encode())
+        return h.hexdigest()[:32]
+
+
+@dataclass
+class SweepResult:
+    params: Dict[str, Any]  # packed keys, as sent by _send_settings_to_board
+    threshold: str          # Activity Threshold label
+    rms_error: float        # mean RMS tracking error over all traces (ppm)
+
+
+def trace_from_recording(path: str) -> ActivityTrace:
+    """Builds a trace from a recorded egram session (format 2+)."""
+    from models.egram_recorder import load_recording
+
+    meta, records = load_recording(path)
+    if "activity" not in records.dtype.names:
+        raise ValueError("Recording has no activity channel (format 1).")
+    duration = float(meta.get("duration_s") or 0.0)
+    fs = len(records) / duration if duration > 0 else 50.0
+    return ActivityTrace(records["activity"].astype(np.float64),
+                         records["sensor_rate"].astype(np.float64), fs)
+
+
+def build_grid(resp_facts=None, react_times=None, recovs=None, thresholds=None) -> List[Tuple]:
+    """All (resp_fact, react_time, recov, threshold label) combinations."""
+    return list(itertools.product(
+        resp_facts or RESP_FACT_VALUES,
+        react_times or REACT_TIME_VALUES,
+        recovs or RECOV_VALUES,
+        thresholds or THRESH_VALUES,
+    ))
+
+
+def _combo_key(mode: int, lrl: int, msr: int, period_s: float, combo: Tuple) -> str:
+    rf, react, recov, thresh = combo
+    return f"v{SWEEP_MODEL_VERSION}|{mode}|{lrl}|{msr}|{float(period_s)!r}|{rf}|{react}|{recov}|{thresh}"
+
+
+def _load_cache(digest: str, cache_dir: str) -> Dict[str, float]:
+    path = os.path.join(cache_dir, f"{digest}.json")
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save_cache(digest: str, cache: Dict[str, float], cache_dir: str) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, f"{digest}.json"), "w") as f:
+        json.dump(cache, f)
+
+
+def _evaluate_chunk(profile, reference, mode, lrl, msr, combos, period_s):
+    """Worker: RMS error of each combo against one trace profile."""
+    if mode not in RATE_ADAPTIVE_MODES:
+        # Fixed-rate modes ignore the sensor; every combo paces at LRL
+        steps = min(profile.size, reference.size)
+        err = float(np.sqrt(np.mean((lrl - reference[:steps]) ** 2))) if steps else 0.0
+        return [err] * len(combos)
+
+    rf, react, recov, thresh = zip(*combos)
+    n = len(combos)
+    params = {
+        "lrl": np.full(n, lrl, dtype=np.float64),
+        "msr": np.full(n, msr, dtype=np.float64),
+        "resp_fact": np.array(rf, dtype=np.float64),
+        "react_time": np.array(react, dtype=np.float64),
+        "recov": np.array(recov, dtype=np.float64),
+        "act_thresh": np.array([_THRESH_PARAM[t] for t in thresh], dtype=np.float64),
+    }
+    return ramp_batch(profile, params, period_s, reference=reference).tolist()
+
+
+def run_sweep(traces: List[ActivityTrace], mode: int = 4, lrl: int = 60, msr: int = 120,
+              grid: List[Tuple] | None = None, workers: int | None = None,
+              period_s: float = CONTROL_PERIOD_S, cache_dir: str = SWEEP_CACHE_DIR,
+              top: int | None = None) -> List[SweepResult]:
+    """
+    Evaluates every grid combination against every trace and returns the
+    results ranked best first (lowest mean RMS error).
+    mode is the integer from mode_map; lrl/msr are held fixed.
+    """
+    grid = grid if grid is not None else build_grid()
+    workers = workers or os.cpu_count() or 1
+    totals = np.zeros(len(grid))
+
+    for trace in traces:
+        digest = trace.digest()
+        cache = _load_cache(digest, cache_dir)
+        keys = [_combo_key(mode, lrl, msr, period_s, c) for c in grid]
+        missing = [i for i, k in enumerate(keys) if k not in cache]
+
+        if missing:
+            profile = activity_profile(trace.activity, trace.fs, period_s)
+            reference = decimate(trace.target_rate, trace.fs, period_s)
+            chunk = max(1, -(-len(missing) // workers))
+            slices = [missing[i:i + chunk] for i in range(0, len(missing), chunk)]
+
+            if workers > 1 and len(slices) > 1:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(_evaluate_chunk, profile, reference, mode, lrl, msr,
+                                           [grid[i] for i in idx], period_s) for idx in slices]
+                    results = [f.result() for f in futures]
+            else:
+                results = [_evaluate_chunk(profile, reference, mode, lrl, msr,
+                                           [grid[i] for i in idx], period_s) for idx in slices]
+
+            for idx, errors in zip(slices, results):
+                for i, err in zip(idx, errors):
+                    cache[keys[i]] = err
+            _save_cache(digest, cache, cache_dir)
+
+        totals += np.array([cache[k] for k in keys])
+
+    mean_err = totals / max(1, len(traces))
+    order = np.argsort(mean_err, kind="stable")
+    if top is not None:
+        order = order[:top]
+
+    ranked = []
+    for i in order:
+        rf, react, recov, thresh = grid[i]
+        params = {
+            "mode": mode, "lrl": lrl, "msr": msr,
+            "resp_fact": rf, "react_time": react, "recov": recov,
+            "act_thresh": _THRESH_PARAM[thresh],
+        }
+        ranked.append(SweepResult(params, thresh, float(mean_err[i])))
+    return ranked
@@ -0,0 +1,146 @@
+# models/serial_capture.py
+"""
+Raw serial capture: every byte written to or read from the port, teed to
+disk with a timestamp, for offline decoding (see models/protocol_decoder).
+
+A capture is three files:
+  <name>.rawcap - the bytes, in the order they crossed the port
+  <name>.chunks - one CHUNK_DTYPE record per write/read: when, which way,
+                  the opcode the call site was handling, and how many bytes
+  <name>.json   - metadata (user, device, dtype, chunk and byte counts)
+
+Chunks keep the write/read boundaries, which is what tells an 11-byte LED
+command from an 18-byte parameter packet with the same opcode. Both data
+files are append-only and packed, so they can be memory-mapped while the
+capture is still growing.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+_DATA_DIR = os.environ.get("DCM_DATA_DIR") or os.path.dirname(os.path.abspath(__file__))
+CAPTURES_DIR = os.path.join(_DATA_DIR, "captures")
+
+CAPTURE_FORMAT = 1
+
+CHUNK_DTYPE = np.dtype([
+    ("t", "<f8"),          # seconds since capture start
+    ("direction", "u1"),   # audit_log.TX / audit_log.RX
+    ("opcode", "u1"),      # as passed to SerialManager._audit
+    ("length", "<u4"),     # bytes of this chunk in the .rawcap file
+])
+
+
+def _base_path(path: str) -> str:
+    for ext in (".rawcap", ".chunks", ".json"):
+        if path.endswith(ext):
+            return path[:-len(ext)]
+    return path
+
+
+class RawCapture:
+    """Tees serial traffic to disk. write() may be called from any thread."""
+
+    def __init__(self, directory: str = CAPTURES_DIR):
+        self.directory = directory
+        self.path: str | None = None
+        self._data = None
+        self._chunks = None
+        self._t0 = 0.0
+        self._meta: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def is_capturing(self) -> bool:
+        return self._data is not None
+
+    def start(self, username: str | None, device_id: str | None, egram_checksum: bool = False) -> str:
+        """
+        Opens a new capture and returns its base path (no extension).
+        egram_checksum records how the board frames egram data, for the decoder.
+        """
+        if self.is_capturing:
+            self.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"capture_{stamp}")
+        with self._lock:
+            self.path = path
+            self._data = open(path + ".rawcap", "wb")
+            self._chunks = open(path + ".chunks", "wb")
+            self._t0 = time.perf_counter()
+            self._meta = {
+                "format": CAPTURE_FORMAT,
+                "dtype": CHUNK_DTYPE.descr,
+                "started": datetime.now().isoformat(timespec="seconds"),
+                "user": username,
+                "device": device_id,
+                "egram_checksum": egram_checksum,
+                "chunks": 0,
+                "bytes": 0,
+            }
+        return path
+
+    def write(self, direction: int, opcode: int, raw: bytes):
+        """Appends one write/read worth of bytes."""
+        if not raw:
+            return
+        record = np.zeros(1, dtype=CHUNK_DTYPE)
+        record["direction"] = direction
+        record["opcode"] = opcode
+        record["length"] = len(raw)
+        with self._lock:
+            if self._data is None:
+                return
+            record["t"] = time.perf_counter() - self._t0
+            self._data.write(raw)
+            self._chunks.write(record.tobytes())
+            self._meta["chunks"] += 1
+            self._meta["bytes"] += len(raw)
+
+    def stop(self) -> str | None:
+        """Closes the capture and writes the metadata sidecar."""
+        with self._lock:
+            if self._data is None:
+                return None
+            self._data.close()
+            self._chunks.close()
+            self._data = self._chunks = None
+            self._meta["duration_s"] = round(time.perf_counter() - self._t0, 3)
+            meta, path = self._meta, self.path
+
+        with open(path + ".json", "w") as f:
+            json.dump(meta, f, indent=2)
+        return path
+
+
+def load_capture(path: str) -> Tuple[Dict[str, Any], np.ndarray, np.ndarray]:
+    """
+    Opens a capture. Returns (metadata, chunks, data): chunk records and the
+    raw bytes as uint8, both memory-mapped. A capture cut short (no
+    sidecar, or a torn last record) opens up to its last whole chunk.
+    """
+    base = _base_path(path)
+    try:
+        with open(base + ".json", "r") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        meta = {"format": CAPTURE_FORMAT, "dtype": CHUNK_DTYPE.descr}
+    dtype = np.dtype([tuple(field) for field in meta["dtype"]])
+
+    count = os.path.getsize(base + ".chunks") // dtype.itemsize
+    size = os.path.getsize(base + ".rawcap")
+    chunks = (np.memmap(base + ".chunks", dtype=dtype, mode="r", shape=(count,))
+              if count else np.zeros(0, dtype=dtype))
+    data = np.memmap(base + ".rawcap", dtype=np.uint8, mode="r") if size else np.zeros(0, dtype=np.uint8)
+
+    # Drop chunks whose bytes never made it to disk
+    ends = np.cumsum(chunks["length"], dtype=np.int64)
+    whole = int(np.searchsorted(ends, size, side="right"))
+    return meta, chunks[:whole], data
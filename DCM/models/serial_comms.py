@@ -1,15 +1,342 @@
 import serial
 import serial.tools.list_ports
 import struct
+import threading
 import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+import numpy as np
+
+from models.audit_log import TX, RX, OUTCOME_OK, OUTCOME_FAILED, OUTCOME_TIMEOUT
+
+# --- Egram Frame Layout (16 Bytes) ---
+# [01] [2 Seq] [2 Act] [1 Rate] [2 Pad] [4 Atr] [4 Vent]
+# Seq is a uint16 frame counter from the board (wraps at 65536) so the DCM
+# can tell dropped or repeated frames apart from a quiet signal.
+# Act is the accelerometer activity level x100 (same units as the Activity
+# Threshold levels) and Rate is the current sensor-driven rate in ppm.
+EGRAM_HEADER = 0x01
+EGRAM_FRAME_SIZE = 16
+EGRAM_ACTIVITY_SCALE = 100.0
+EGRAM_FRAME_DTYPE = np.dtype([
+    ("header", "u1"),
+    ("seq", "<u2"),
+    ("act_raw", "<u2"),
+    ("sensor_rate", "u1"),
+    ("pad", "V2"),
+    ("atr", "<f4"),
+    ("vent", "<f4"),
+])
+
+
+# Checked framing: the 2 pad bytes carry a Fletcher-16 (mod 255) of the 13
+# payload bytes (seq, act, rate, atr, vent), [sum1][sum2]. Boards that leave
+# the pad zeroed are framed by header alone (SerialManager.egram_checksum).
+EGRAM_CHECKSUM_OFFSET = 6
+_PAYLOAD_COLUMNS = np.r_[1:EGRAM_CHECKSUM_OFFSET, EGRAM_CHECKSUM_OFFSET + 2:EGRAM_FRAME_SIZE]
+# (16, 2): column 0 sums the payload bytes, column 1 weights them 13..1 (Fletcher's running sum)
+_CHECKSUM_WEIGHTS = np.zeros((EGRAM_FRAME_SIZE, 2), dtype=np.float32)
+_CHECKSUM_WEIGHTS[_PAYLOAD_COLUMNS, 0] = 1
+_CHECKSUM_WEIGHTS[_PAYLOAD_COLUMNS, 1] = np.arange(_PAYLOAD_COLUMNS.size, 0, -1)
+_FLETCHER_STEPS = tuple(range(_PAYLOAD_COLUMNS.size, 0, -1))
+
+# Frames tested per aligned step, and bytes searched per resync step; both
+# start small and double while nothing stops them
+_FIRST_RUN_WINDOW = 1024
+_FIRST_WINDOW = 32
+# Up to this many header bytes in a search window are checked one at a time
+_SCALAR_CANDIDATES = 16
+_HEADER_BYTE = bytes([EGRAM_HEADER])
+_SCAN_WINDOW = 65536
+_SEARCH_WINDOW = 65536
+
+
+def egram_activity(frames):
+    """Activity level of each frame (scaled back from the raw uint16)."""
+    return frames["act_raw"] / EGRAM_ACTIVITY_SCALE
+
+
+def egram_checksum(frame_bytes: np.ndarray) -> np.ndarray:
+    """Checksum bytes of each frame: (count, 16) uint8 -> (count, 2) uint8."""
+    # Both sums in one float32 matmul (exact: the largest is 13 * 13 * 255)
+    sums = frame_bytes.astype(np.float32) @ _CHECKSUM_WEIGHTS
+    return np.fmod(sums, 255).astype(np.uint8)
+
+
+def add_egram_checksum(frames: np.ndarray):
+    """Fills the pad of EGRAM_FRAME_DTYPE frames with their checksum (in place)."""
+    frame_bytes = frames.view(np.uint8).reshape(-1, EGRAM_FRAME_SIZE)
+    frame_bytes[:, EGRAM_CHECKSUM_OFFSET:EGRAM_CHECKSUM_OFFSET + 2] = egram_checksum(frame_bytes)
+
+
+def _seq(raw: np.ndarray, pos: int) -> int:
+    return int(raw[pos + 1]) | int(raw[pos + 2]) << 8
+
+
+def _seqs(frame_bytes: np.ndarray) -> np.ndarray:
+    return frame_bytes[:, 1] | frame_bytes[:, 2].astype(np.uint16) << 8
+
+
+def _follows(seq, prev) -> bool:
+    return seq == (prev + 1) % 65536
+
+
+def _frames_ok(frame_bytes: np.ndarray, checksum: bool) -> np.ndarray:
+    """Checked framing: header and checksum. Header framing: header, and seq one on from the frame before."""
+    ok = frame_bytes[:, 0] == EGRAM_HEADER
+    if checksum:
+        pad = frame_bytes[:, EGRAM_CHECKSUM_OFFSET:EGRAM_CHECKSUM_OFFSET + 2]
+        ok &= (pad == egram_checksum(frame_bytes)).all(axis=1)
+    else:
+        seq = _seqs(frame_bytes)
+        ok[1:] &= np.diff(seq) == 1  # uint16, so 65535 -> 0 is a step of 1
+    return ok
+
+
+def _pair_ok(spans: np.ndarray) -> np.ndarray:
+    """(count, 19) bytes from each candidate: header there and 16 on, second seq one on from the first."""
+    step = _seqs(spans[:, EGRAM_FRAME_SIZE:]) - _seqs(spans)
+    return (spans[:, 0] == EGRAM_HEADER) & (spans[:, EGRAM_FRAME_SIZE] == EGRAM_HEADER) & (step == 1)
+
+
+def _span_ok(span: bytes, checksum: bool) -> bool:
+    """_frames_ok / _pair_ok for a single candidate, on plain ints (no NumPy call overhead)."""
+    if span[0] != EGRAM_HEADER:
+        return False
+    if checksum:
+        payload = span[1:EGRAM_CHECKSUM_OFFSET] + span[EGRAM_CHECKSUM_OFFSET + 2:EGRAM_FRAME_SIZE]
+        sum2 = sum(weight * value for weight, value in zip(_FLETCHER_STEPS, payload))
+        return span[EGRAM_CHECKSUM_OFFSET] == sum(payload) % 255 and span[EGRAM_CHECKSUM_OFFSET + 1] == sum2 % 255
+    return (span[EGRAM_FRAME_SIZE] == EGRAM_HEADER
+            and ((span[17] | span[18] << 8) - (span[1] | span[2] << 8)) % 65536 == 1)
+
+
+def _find_frame_start(raw: np.ndarray, pos: int, checksum: bool):
+    """
+    First position at or after pos where a frame checks out: a valid
+    checksum, or (header framing) a next frame 16 bytes on that carries on
+    its seq. Returns (position, True), or (position, False) for the first
+    candidate that can't be checked until more bytes arrive, or
+    (len(raw), False).
+    """
+    n = raw.size
+    need = EGRAM_FRAME_SIZE if checksum else EGRAM_FRAME_SIZE + 3
+    window = _FIRST_WINDOW
+    while pos < n:
+        chunk = raw[pos:pos + window].tobytes()
+        if chunk.count(_HEADER_BYTE) <= _SCALAR_CANDIDATES:
+            # Usual case: a few candidates, checked one by one
+            at = chunk.find(_HEADER_BYTE)
+            while at >= 0:
+                if pos + at + need > n:
+                    return pos + at, False
+                if _span_ok(raw[pos + at:pos + at + need].tobytes(), checksum):
+                    return pos + at, True
+                at = chunk.find(_HEADER_BYTE, at + 1)
+        else:
+            candidates = np.flatnonzero(raw[pos:pos + window] == EGRAM_HEADER) + pos
+            whole = candidates[candidates + need <= n]
+            spans = raw[whole[:, None] + np.arange(need)]
+            hit = np.flatnonzero(_frames_ok(spans, True) if checksum else _pair_ok(spans))
+            if hit.size:
+                return int(whole[hit[0]]), True
+            if whole.size < candidates.size:
+                return int(candidates[whole.size]), False
+        pos += len(chunk)
+        window = min(window * 2, _SEARCH_WINDOW)
+    return n, False
+
+
+def _run_length(raw: np.ndarray, pos: int, checksum: bool) -> Tuple[int, bool]:
+    """Valid back-to-back frames from pos, a window at a time. Returns (count, waiting on bytes)."""
+    n = raw.size
+    if not checksum:
+        # Without a checksum a run has to open on a confirmed pair
+        if n - pos < EGRAM_FRAME_SIZE + 3:
+            return 0, True
+        if not _span_ok(raw[pos:pos + EGRAM_FRAME_SIZE + 3].tobytes(), False):
+            return 0, False
+    run, window, prev = 0, _FIRST_RUN_WINDOW, None
+    while True:
+        at = pos + run * EGRAM_FRAME_SIZE
+        count = min(window, (n - at) // EGRAM_FRAME_SIZE)
+        if count == 0:
+            return run, False
+        block = raw[at:at + count * EGRAM_FRAME_SIZE].reshape(count, EGRAM_FRAME_SIZE)
+        ok = _frames_ok(block, checksum)
+        if not checksum:
+            if prev is not None:
+                ok[0] &= _follows(_seq(raw, at), prev)
+            prev = _seq(raw, at + (count - 1) * EGRAM_FRAME_SIZE)
+        if not ok.all():
+            return run + int(ok.argmin()), False
+        run += count
+        window = min(window * 2, _SCAN_WINDOW)
+
+
+def frame_egram_stream(raw: np.ndarray, checksum: bool = False, final: bool = False):
+    """
+    Finds the egram frames in a byte buffer.
+
+    With checksum=True a frame is valid by its header and checksum alone.
+    Without one, a stray 0x01 inside a float payload is common, so a frame
+    is valid by its header and a seq one on from the frame before, and a
+    run of frames has to open on such a pair; the last frame before a
+    break is dropped if the next valid frame starts inside it and carries
+    on its seq (it was cut short), so the last frames in the buffer are
+    held back until the bytes after them arrive. Aligned frames are tested
+    a window at a time, the window doubling while it keeps coming back
+    valid; once alignment is lost the search for the next valid start
+    grows the same way. final=True means raw is the whole stream (an
+    offline capture): nothing more is coming, so nothing is held back.
+
+    Returns (runs, gaps, end): runs as [start, count] of back-to-back
+    frames, gaps as (start, skipped) and end, the first byte not consumed
+    (a partial frame, or bytes waiting on what would confirm them).
+    """
+    n = raw.size
+    pos = 0
+    runs: List[List[int]] = []
+    gaps: List[Tuple[int, int]] = []
+
+    def drop_last(count=1):
+        runs[-1][1] -= count
+        if not runs[-1][1]:
+            runs.pop()
+
+    def hold_back(last):
+        # Give back the last frame, and the one before it so that the next
+        # call can open its run on that pair again
+        count = 2 if runs[-1][1] > 1 else 1
+        drop_last(count)
+        return last - (count - 1) * EGRAM_FRAME_SIZE
+
+    while n - pos >= EGRAM_FRAME_SIZE:
+        run, waiting = _run_length(raw, pos, checksum)
+        if waiting:
+            break
+        if run:
+            if runs and runs[-1][0] + runs[-1][1] * EGRAM_FRAME_SIZE == pos:
+                runs[-1][1] += run
+            else:
+                runs.append([pos, run])
+            pos += run * EGRAM_FRAME_SIZE
+        suspect = not checksum and run > 0
+        last = pos - EGRAM_FRAME_SIZE
+        if n - pos < EGRAM_FRAME_SIZE:
+            if suspect and not final:
+                pos = hold_back(last)
+            break
+
+        start, confirmed = _find_frame_start(raw, last + 1 if suspect else pos + 1, checksum)
+        if suspect and confirmed and start < pos:
+            if _follows(_seq(raw, start), _seq(raw, last)):
+                drop_last()
+                pos = last
+            else:
+                start, confirmed = _find_frame_start(raw, pos + 1, checksum)
+        if not confirmed and start < n:
+            # Retry from here once more bytes are in
+            if suspect and start < pos and not final:
+                pos = hold_back(last)
+            break
+        if start > pos:
+            gaps.append((pos, start - pos))
+        # (start == pos: the board skipped seq numbers, with no bytes lost;
+        # that is a drop for the seq accounting, not a resync)
+        pos = start
+    return runs, gaps, pos
+
+
+def decode_egram_frames(raw_bytes, checksum: bool = False):
+    """
+    Splits a byte buffer into egram frames (see frame_egram_stream).
+    Returns (frames, resyncs, skipped_bytes, consumed_bytes). Any trailing
+    partial frame is left unconsumed for the next read.
+    """
+    raw = np.frombuffer(bytes(raw_bytes), dtype=np.uint8)
+    runs, gaps, consumed = frame_egram_stream(raw, checksum)
+    if runs:
+        frames = np.concatenate([raw[s:s + c * EGRAM_FRAME_SIZE] for s, c in runs]).view(EGRAM_FRAME_DTYPE)
+    else:
+        frames = np.zeros(0, dtype=EGRAM_FRAME_DTYPE)
+    return frames, len(gaps), sum(skipped for _, skipped in gaps), consumed
+
+
+# Egram stream control opcodes, and how long in-flight frames take to stop
+# arriving after a stop command
+EGRAM_START = 0x33
+EGRAM_STOP = 0x34
+_STREAM_SETTLE_S = 0.05
+
 
 class SerialManager:
+    """
+    The board link. Every port transaction runs under one lock, so the
+    egram reader thread and command round trips (Tk thread, comm pool)
+    never interleave on the wire; a round trip made while the board is
+    streaming pauses the stream around it (see _round_trip).
+    """
+
     def __init__(self, baudrate=115200):
         self.ser = None
         self.baudrate = baudrate
         self.HEADER = b'\x16'
         self.FMT_11_BYTES = '<BBBBBfH'
         self.FMT_18_BYTES = '<BBBBBBBBBBBBBBBBBB' 
+        self._egram_buf = bytearray()
+        # True once the board fills the frame pad with egram_checksum
+        self.egram_checksum = False
+        # Optional AuditLog; every write/read is queued to it (see _audit)
+        self.audit = None
+        # Optional RawCapture; bytes that crossed the port are teed to it
+        self.capture = None
+        self._lock = threading.RLock()
+        # True between start_egram_stream and stop_egram_stream
+        self.streaming = False
+
+    def _audit(self, direction: int, opcode: int, raw: bytes, outcome: int = OUTCOME_OK):
+        if self.audit is not None:
+            self.audit.log(direction, opcode, raw, outcome)
+        if self.capture is not None and outcome != OUTCOME_FAILED:
+            self.capture.write(direction, opcode, raw)
+
+    def _write(self, data: bytes):
+        """Writes a command packet and logs it (opcode = 2nd byte)."""
+        try:
+            self.ser.write(data)
+        except Exception:
+            self._audit(TX, data[1], data, OUTCOME_FAILED)
+            raise
+        self._audit(TX, data[1], data)
+
+    def _stream_command(self, opcode: int):
+        # 2 bytes command + 14 bytes pad = 16 Bytes Total
+        self._write(struct.pack('<BB14x', 0x16, opcode))
+
+    @contextmanager
+    def _round_trip(self):
+        """
+        Holds the port for one command/reply exchange. If the board is
+        streaming egrams, the stream is stopped first (and its in-flight
+        bytes flushed) so the reply isn't mixed with frames, then restarted.
+        """
+        with self._lock:
+            paused = self.streaming
+            if paused:
+                self._stream_command(EGRAM_STOP)
+                time.sleep(_STREAM_SETTLE_S)
+            try:
+                yield
+            finally:
+                if paused and self.ser and self.ser.is_open:
+                    try:
+                        self.ser.reset_input_buffer()
+                        self._egram_buf.clear()
+                        self._stream_command(EGRAM_START)
+                    except Exception as e:
+                        print(f"[Serial] Error resuming stream: {e}")
 
     def get_ports(self):
         ports = serial.tools.list_ports.comports()
@@ -17,20 +344,25 @@ class SerialManager:
 
     def connect(self, port_name_str):
         actual_port = port_name_str.split(":")[0] if ":" in port_name_str else port_name_str
-        try:
-            if self.ser and self.ser.is_open:
-                self.ser.close()
-            self.ser = serial.Serial(actual_port, self.baudrate, timeout=1)
-            self.ser.reset_input_buffer()
-            return True
-        except serial.SerialException as e:
-            print(f"Connection Error: {e}")
-            return False
+        with self._lock:
+            try:
+                if self.ser and self.ser.is_open:
+                    self.ser.close()
+                self.streaming = False
+                self.ser = serial.Serial(actual_port, self.baudrate, timeout=1)
+                self.ser.reset_input_buffer()
+                self._egram_buf.clear()
+                return True
+            except serial.SerialException as e:
+                print(f"Connection Error: {e}")
+                return False
 
     def disconnect(self):
-        if self.ser:
-            self.ser.close()
-            self.ser = None
+        with self._lock:
+            self.streaming = False
+            if self.ser:
+                self.ser.close()
+                self.ser = None
 
     def send_color_command(self, color_code: int):
         if not self.ser or not self.ser.is_open: return False
@@ -39,41 +371,29 @@ class SerialManager:
                                1 if color_code==1 else 0, 
                                1 if color_code==2 else 0, 
                                1 if color_code==3 else 0, 0.5, 200)
-            self.ser.write(data)
+            with self._lock:
+                self._write(data)
             return True
         except Exception: return False
 
-    def send_params(self, params: dict):
+    def send_params(self, packet: bytes):
+        """Writes an 18-byte parameter packet built by parameter_rules.encode_settings."""
         if not self.ser or not self.ser.is_open: return False
+        if len(packet) != 18: return False
         try:
-            data = struct.pack(self.FMT_18_BYTES, 
-                               0x16, 0x55, 
-                               int(params.get("mode", 0)),
-                               int(params.get("a_pw", 0) * 100),
-                               int(params.get("v_pw", 0) * 100),
-                               int(params.get("lrl", 60)),
-                               int(params.get("a_amp", 0) * 10),
-                               int(params.get("v_amp", 0) * 10),
-                               int(params.get("a_ref", 0) / 10),
-                               int(params.get("v_ref", 0) / 10),
-                               int(params.get("a_sens", 0) * 10),
-                               int(params.get("v_sens", 0) * 10),
-                               int(params.get("recov", 0)),
-                               int(params.get("resp_fact", 0)),
-                               int(params.get("msr", 0)),
-                               int(params.get("act_thresh", 0)),
-                               int(params.get("react_time", 0)),
-                               int(params.get("hyst", 0)))
-            self.ser.write(data)
+            with self._lock:
+                self._write(packet)
             return True
         except Exception: return False
 
     def get_echo(self):
         if not self.ser or not self.ser.is_open: return None
         try:
-            self.ser.reset_input_buffer()
-            self.ser.write(struct.pack(self.FMT_11_BYTES, 0x16, 0x22, 0,0,0,0.0,0))
-            resp = self.ser.read(9)
+            with self._round_trip():
+                self.ser.reset_input_buffer()
+                self._write(struct.pack(self.FMT_11_BYTES, 0x16, 0x22, 0,0,0,0.0,0))
+                resp = self.ser.read(9)
+            self._audit(RX, 0x22, resp, OUTCOME_OK if len(resp) == 9 else OUTCOME_TIMEOUT)
             if len(resp) != 9: return None
             u = struct.unpack('<BBBHf', resp)
             return {"red": u[0], "green": u[1], "blue": u[2], "switch_time": u[3], "off_time": u[4]}
@@ -83,9 +403,11 @@ class SerialManager:
         if not self.ser or not self.ser.is_open:
             return {"error": "Not Connected"}
         try:
-            self.ser.reset_input_buffer()
-            self.ser.write(struct.pack(self.FMT_18_BYTES, 0x16, 0x22, *([0]*16)))
-            response = self.ser.read(16)
+            with self._round_trip():
+                self.ser.reset_input_buffer()
+                self._write(struct.pack(self.FMT_18_BYTES, 0x16, 0x22, *([0]*16)))
+                response = self.ser.read(16)
+            self._audit(RX, 0x22, response, OUTCOME_OK if len(response) == 16 else OUTCOME_TIMEOUT)
             raw_hex = response.hex().upper()
             if len(response) != 16:
                 return {"error": f"Timeout.\nRx: {len(response)} B\nRaw: {raw_hex}"}
@@ -100,9 +422,11 @@ class SerialManager:
         """Sends 16 bytes: 16 (Head), 51 (Code), + 14 Zeros."""
         if not self.ser or not self.ser.is_open: return False
         try:
-            self.ser.reset_input_buffer()
-            # 2 bytes command + 14 bytes pad = 16 Bytes Total
-            self.ser.write(struct.pack('<BB14x', 0x16, 0x33)) 
+            with self._lock:
+                self.ser.reset_input_buffer()
+                self._egram_buf.clear()
+                self._stream_command(EGRAM_START)
+                self.streaming = True
             print("[Serial] Sent Start Egram (16 bytes)")
             return True
         except Exception as e: 
@@ -113,7 +437,9 @@ class SerialManager:
         """Sends 16 bytes: 16 (Head), 52 (Code), + 14 Zeros."""
         if not self.ser or not self.ser.is_open: return False
         try:
-            self.ser.write(struct.pack('<BB14x', 0x16, 0x34))
+            with self._lock:
+                self.streaming = False
+                self._stream_command(EGRAM_STOP)
             print("[Serial] Sent Stop Egram (16 bytes)")
             return True
         except Exception as e:
@@ -122,40 +448,53 @@ class SerialManager:
 
     def read_egram_sample(self):
         """
-        SYNC READ (16 Bytes Total):
-        1. Reads until Header (0x01) is found.
-        2. Reads next 15 bytes.
-        Structure: [01] [7 Pad] [4 Atr] [4 Vent]
+        Latest (atr, vent) sample, or None if no whole frame has arrived.
+        Goes through the same buffered framing as read_egram_frames, so a
+        0x01 byte inside a payload is never taken for a frame start.
+        """
+        result = self.read_egram_frames()
+        if not result or len(result[0]) == 0:
+            return None
+        frame = result[0][-1]
+        return float(frame["atr"]), float(frame["vent"])
+
+    def read_egram_frames(self, wait_s: float = 0.0):
+        """
+        BULK READ: drains everything waiting on the port and decodes every
+        complete frame at once (see decode_egram_frames).
+        With wait_s > 0 and nothing waiting, blocks up to wait_s for the
+        next byte (for a reader thread; the UI thread should pass 0).
+        Returns (frames, resyncs, skipped_bytes) or None if not connected.
         """
+        with self._lock:
+            return self._read_egram_frames(wait_s)
+
+    def _read_egram_frames(self, wait_s: float):
         if not self.ser or not self.ser.is_open: return None
-        
-        # Need at least 16 bytes
-        if self.ser.in_waiting < 16: return None
 
         try:
-            # --- SYNC LOOP ---
-            while True:
-                if self.ser.in_waiting < 16: return None
-                
-                header = self.ser.read(1)
-                
-                if header == b'\x01':
-                    # Found header, read rest of packet (15 bytes)
-                    payload = self.ser.read(15)
-                    break
-            
-            # --- DEBUG: Print Raw Hex ---
-            total_packet = header + payload
-            print(f"[Raw] {total_packet.hex().upper()}")
-
-            # Unpack Payload (15 bytes):
-            # 7x = Skip 7 bytes (Padding)
-            # f  = Float (Atrial)
-            # f  = Float (Ventricular)
-            val_atr, val_vent = struct.unpack('<7xff', payload)
-            
-            return (val_atr, val_vent)
-
+            waiting = self.ser.in_waiting
+            chunk = b""
+            if waiting:
+                chunk = self.ser.read(waiting)
+            elif wait_s > 0:
+                timeout = self.ser.timeout
+                self.ser.timeout = wait_s
+                try:
+                    chunk = self.ser.read(1)
+                finally:
+                    self.ser.timeout = timeout
+                waiting = self.ser.in_waiting
+                if chunk and waiting:
+                    chunk += self.ser.read(waiting)
+            if chunk:
+                self._egram_buf.extend(chunk)
+                # One record per read chunk, not per frame, keeps the log cheap at stream rate
+                self._audit(RX, EGRAM_HEADER, chunk)
         except Exception as e:
             print(f"[Serial] Egram read error: {e}")
-            return None
\ No newline at end of file
+            return None
+
+        frames, resyncs, skipped, consumed = decode_egram_frames(self._egram_buf, self.egram_checksum)
+        del self._egram_buf[:consumed]
+        return frames, resyncs, skipped
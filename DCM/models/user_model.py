@@ -1,70 +1,217 @@
+import hashlib
+import hmac
 import json
 import os
-from typing import Tuple
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Tuple
 
-_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-USER_FILE = os.path.join(_CURRENT_DIR, "users.json")
+from models.persistence import WriteBehindWorker
 
-MAX_USERS = 10
+_DATA_DIR = os.environ.get("DCM_DATA_DIR") or os.path.dirname(os.path.abspath(__file__))
+USER_DB = os.path.join(_DATA_DIR, "users.db")
+# Legacy plaintext store, migrated (and removed) on first start
+USER_FILE = os.path.join(_DATA_DIR, "users.json")
 
-def _load_users() -> dict:
-    """Loads the user dictionary from the JSON file."""
-    if not os.path.exists(USER_FILE):
+MAX_USERS = 100_000
+
+# PBKDF2-HMAC-SHA256 work factor for new hashes
+KDF_ITERATIONS = 200_000
+KDF_SALT_BYTES = 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username   TEXT PRIMARY KEY,
+    salt       BLOB NOT NULL,
+    hash       BLOB NOT NULL,
+    iterations INTEGER NOT NULL,
+    created    REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+def hash_password(password: str, salt: bytes | None = None,
+                  iterations: int = KDF_ITERATIONS) -> Tuple[bytes, bytes, int]:
+    """Returns (salt, hash, iterations) for a password."""
+    salt = salt or os.urandom(KDF_SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return salt, digest, iterations
+
+def _load_users(path: str = USER_FILE) -> dict:
+    """Loads the legacy username -> password dictionary from the JSON file."""
+    if not os.path.exists(path):
         return {}
     try:
-        with open(USER_FILE, "r") as f:
+        with open(path, "r") as f:
             return json.load(f)
     except Exception:
         return {}
 
-def _save_users(users: dict) -> None:
-    """Saves the user dictionary to the JSON file."""
-    with open(USER_FILE, "w") as f:
-        json.dump(users, f, indent=2)
+def _connect(path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+def migrate_json_users(conn: sqlite3.Connection, json_path: str = USER_FILE) -> int:
+    """
+    Hashes the users from the legacy plaintext users.json into the database,
+    then deletes the file so no plaintext passwords remain on disk.
+    """
+    if not os.path.exists(json_path):
+        return 0
+    now = time.time()
+    rows = [(name, *hash_password(pw), now) for name, pw in _load_users(json_path).items()]
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (username, salt, hash, iterations, created) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+    os.remove(json_path)
+    return len(rows)
+
+def _done(result: Tuple[bool, str]) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
 
 class UserModel:
-    def __init__(self):
-        # The dictionary stores: username -> password
-        self.users = _load_users()  
+    def __init__(self, db_path: str = USER_DB, legacy_path: str = USER_FILE, kdf_workers: int = 2,
+                 on_write_error=None):
+        """
+        Users live in an indexed SQLite table (username primary key), so a
+        lookup is a B-tree search regardless of how many accounts exist.
+        Passwords are stored as salted PBKDF2 hashes. Hashing/verification
+        runs on a small thread pool (hashlib releases the GIL), and new
+        accounts are written by the background persistence worker.
+        """
+        self.db_path = db_path
+        self.conn = _connect(db_path)
+        migrate_json_users(self.conn, legacy_path)
+        self._count = self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[bytes, bytes, int]] = {}
+        self._reserved: set = set()
+        self._registering: set = set()
+        self._write_conn: sqlite3.Connection | None = None
+        self._writer = WriteBehindWorker("user-store", on_error=on_write_error)
+        self._kdf_pool = ThreadPoolExecutor(max_workers=kdf_workers, thread_name_prefix="kdf")
+
+        # Verified logins for this session: username -> keyed digest of the password
+        self._session_key = os.urandom(32)
+        self._verified: Dict[str, bytes] = {}
 
     def get_user_count(self) -> int:
-        return len(self.users)
-        
-    def register_user(self, username: str, password: str) -> Tuple[bool, str]:
+        return self._count
+
+    def _lookup(self, username: str) -> Tuple[bytes, bytes, int] | None:
+        with self._lock:
+            pending = self._pending.get(username)
+        if pending is not None:
+            return pending
+        return self.conn.execute(
+            "SELECT salt, hash, iterations FROM users WHERE username = ?", (username,)
+        ).fetchone()
+
+    def _session_digest(self, password: str) -> bytes:
+        return hmac.new(self._session_key, password.encode("utf-8"), "sha256").digest()
+
+    def register_user_async(self, username: str, password: str) -> Future:
         """
-        Registers a new user with a plaintext password.
-        Returns (success: bool, message: str)
+        Registers a new user. Returns a Future of (success: bool, message: str);
+        input errors resolve immediately, otherwise it completes once the
+        password has been hashed on the KDF pool.
         """
         username = username.strip()
         if not username or not password:
-            return False, "Both fields are required."
+            return _done((False, "Both fields are required."))
 
-        if len(self.users) >= MAX_USERS:
-            return False, "User limit reached. Maximum of 10 users."
+        if self._count >= MAX_USERS:
+            return _done((False, f"User limit reached. Maximum of {MAX_USERS} users."))
 
-        if username in self.users:
-            return False, "That username is already registered."
+        with self._lock:
+            taken = username in self._reserved
+        if taken or self._lookup(username) is not None:
+            return _done((False, "That username is already registered."))
 
-        self.users[username] = password
-        
-        _save_users(self.users)
+        with self._lock:
+            self._reserved.add(username)
+        self._count += 1
+        future = self._kdf_pool.submit(self._register, username, password)
+        self._registering.add(future)
+        future.add_done_callback(self._registering.discard)
+        return future
+
+    def _register(self, username: str, password: str) -> Tuple[bool, str]:
+        """Runs on the KDF pool."""
+        record = hash_password(password)
+        with self._lock:
+            self._pending[username] = record
+            self._reserved.discard(username)
+        self._writer.submit(username, lambda: self._write_user(username, record))
         return True, f"User '{username}' registered."
 
-    def authenticate(self, username: str, password: str) -> Tuple[bool, str]:
+    def _write_user(self, username: str, record: Tuple[bytes, bytes, int]):
+        """Runs on the persistence worker thread (which owns _write_conn)."""
+        if self._write_conn is None:
+            self._write_conn = _connect(self.db_path, check_same_thread=False)
+        with self._write_conn:
+            self._write_conn.execute(
+                "INSERT OR IGNORE INTO users (username, salt, hash, iterations, created) VALUES (?, ?, ?, ?, ?)",
+                (username, *record, time.time()),
+            )
+        with self._lock:
+            self._pending.pop(username, None)
+
+    def authenticate_async(self, username: str, password: str) -> Future:
         """
-        Authenticates a user against the plaintext password.
-        Returns (success: bool, message: str)
+        Authenticates a user. Returns a Future of (success: bool, message: str).
+        Logins already verified this session are answered without the KDF.
         """
         username = username.strip()
-        
-        # Get the stored password for the user
-        stored_password = self.users.get(username)
-        
-        if not stored_password:
+        session_digest = self._session_digest(password)
+        cached = self._verified.get(username)
+        if cached is not None and hmac.compare_digest(cached, session_digest):
+            return _done((True, "Login successful."))
+
+        record = self._lookup(username)
+        return self._kdf_pool.submit(self._verify, username, record, password, session_digest)
+
+    def _verify(self, username, record, password, session_digest) -> Tuple[bool, str]:
+        """Runs on the KDF pool."""
+        if record is None:
+            # Spend the same time on unknown users so they can't be probed
+            hash_password(password)
+            return False, "Invalid username or password."
+
+        salt, stored, iterations = record
+        _, digest, _ = hash_password(password, bytes(salt), iterations)
+        if not hmac.compare_digest(digest, bytes(stored)):
             return False, "Invalid username or password."
 
-        # Do a simple string comparison
-        if password == stored_password:
-            return True, "Login successful."
-        else:
-            return False, "Invalid username or password."
\ No newline at end of file
+        self._verified[username] = session_digest
+        return True, "Login successful."
+
+    def register_user(self, username: str, password: str) -> Tuple[bool, str]:
+        """Blocking form of register_user_async."""
+        return self.register_user_async(username, password).result()
+
+    def authenticate(self, username: str, password: str) -> Tuple[bool, str]:
+        """Blocking form of authenticate_async."""
+        return self.authenticate_async(username, password).result()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Blocks until pending registrations are hashed and written to disk."""
+        wait(list(self._registering), timeout)
+        return self._writer.flush(timeout)
+
+    def close(self):
+        self._kdf_pool.shutdown(wait=True)
+        failed = self._writer.close()
+        if self._write_conn is not None:
+            self._write_conn.close()
+        self.conn.close()
+        return failed
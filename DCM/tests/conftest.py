@@ -0,0 +1,36 @@
+# tests/conftest.py
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# The app imports its packages relative to DCM/ (from models.x import ...)
+DCM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DCM_DIR)
+
+# Set before any model module is imported: the stores (users.db,
+# pacing_settings.db, audit/, recordings/, ...) resolve their paths from it
+# at import time, so nothing a test does reaches the real ones
+DATA_DIR = tempfile.mkdtemp(prefix="dcm-tests-")
+os.environ["DCM_DATA_DIR"] = DATA_DIR
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def app():
+    """A DCMApp on the Welcome screen; skipped without customtkinter or a display."""
+    pytest.importorskip("customtkinter")
+    import tkinter as tk
+    from controller import DCMApp
+    try:
+        dcm = DCMApp()
+    except tk.TclError as e:
+        pytest.skip(f"No display: {e}")
+    yield dcm
+    if dcm.winfo_exists():
+        dcm._on_close()
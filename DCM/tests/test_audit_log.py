@@ -0,0 +1,90 @@
+# tests/test_audit_log.py
+"""Audit log: scans by time/device, crash recovery, and failed index writes."""
+import os
+import sqlite3
+
+import pytest
+
+import models.audit_log as audit_log
+from models.audit_log import RX, TX, AuditLog, encode_record
+
+
+class _FlakyIndex:
+    """Index connection whose first executemany fails (a locked database)."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.failures = 1
+
+    def executemany(self, *args):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self.conn.executemany(*args)
+
+    def __enter__(self):
+        return self.conn.__enter__()
+
+    def __exit__(self, *args):
+        return self.conn.__exit__(*args)
+
+    def close(self):
+        self.conn.close()
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = AuditLog(str(tmp_path))
+    yield log
+    log.close()
+
+
+def test_scan_filters_by_time_and_device(log):
+    for i in range(100):
+        log.set_context("alice", "dev-a" if i % 2 else "dev-b")
+        log.log(TX if i % 3 else RX, 0x55, bytes([i]), ts=1000.0 + i * 0.25)
+    records = list(log.scan())
+    assert [r.raw[0] for r in records] == list(range(100))
+
+    window = list(log.scan(start=1005.0, end=1010.0, device_id="dev-a"))
+    assert [r.ts for r in window] == [1000.0 + i * 0.25 for i in range(20, 41) if i % 2]
+    assert {(r.username, r.device_id) for r in window} == {("alice", "dev-a")}
+
+
+def test_reopen_recovers_unindexed_tail(tmp_path, log):
+    for i in range(10):
+        log.log(TX, 0x55, bytes([i]), ts=1000.0 + i)
+    log.close()
+
+    # Killed mid-batch: one record written but not indexed, then a torn one
+    segment = audit_log._segment_path(str(tmp_path), 1)
+    with open(segment, "ab") as f:
+        f.write(encode_record(1010.0, RX, 0x56, 0, "", "", b"\x0a"))
+        f.write(encode_record(1011.0, RX, 0x56, 0, "", "", b"\x0b")[:-3])
+
+    reopened = AuditLog(str(tmp_path))
+    try:
+        assert [r.raw[0] for r in reopened.scan()] == list(range(11))
+        reopened.log(TX, 0x55, b"\x0c", ts=1012.0)
+        assert [r.raw[0] for r in reopened.scan(start=1009.5)] == [10, 12]
+    finally:
+        reopened.close()
+
+
+def test_failed_index_write_is_retried_without_duplicates(tmp_path, monkeypatch, log):
+    # Small segments so the retried batch also has to rotate
+    monkeypatch.setattr(audit_log, "SEGMENT_BYTES", 2000)
+    log._write_conn = _FlakyIndex(audit_log._connect(log.index_path, check_same_thread=False))
+    for i in range(300):
+        log.log(TX, 0x55, bytes([i % 256]) * 5, ts=1000.0 + i)
+    assert log.flush(timeout=10)
+    assert log._write_conn.failures == 0
+    assert [r.ts for r in log.scan()] == [1000.0 + i for i in range(300)]
+    log.close()
+
+    assert len(os.listdir(tmp_path)) > 3
+    reopened = AuditLog(str(tmp_path))
+    try:
+        assert [r.ts for r in reopened.scan()] == [1000.0 + i for i in range(300)]
+    finally:
+        reopened.close()
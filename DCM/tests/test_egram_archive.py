@@ -0,0 +1,62 @@
+# tests/test_egram_archive.py
+"""Egram archive: pyramid envelopes match the raw samples at every zoom."""
+import numpy as np
+import pytest
+
+from models.egram_archive import BASE_BLOCK, FACTOR, EgramArchive
+from models.egram_recorder import EgramRecorder
+from models.egram_stress import sent_frames
+
+FRAMES = BASE_BLOCK * FACTOR ** 3 + 123
+
+
+def _record(directory, frames):
+    recorder = EgramRecorder(str(directory))
+    recorder.start("alice", "dev-1")
+    for at in range(0, len(frames), 1000):
+        recorder.append(frames[at:at + 1000], arrival=recorder._t0 + at / 1000)
+    return recorder.stop()
+
+
+@pytest.fixture
+def frames():
+    frames = sent_frames(FRAMES, False, np.random.default_rng(0))
+    frames["vent"][::97] = np.nan  # dropped samples
+    return frames
+
+
+def _expected(values, start, stop, columns):
+    edges = (np.arange(columns + 1) * (stop - start) / columns).astype(np.intp) + start
+    edges[-1] = stop
+    return np.array([[np.nanmin(values[a:b]), np.nanmax(values[a:b])] for a, b in zip(edges, edges[1:])]).ravel()
+
+
+def test_envelope_matches_raw_samples(tmp_path, frames):
+    archive = EgramArchive(_record(tmp_path, frames))
+    assert len(archive) == FRAMES and archive.summary()["user"] == "alice"
+    vent = frames["vent"]
+    level_1 = BASE_BLOCK * FACTOR
+    # Fewer samples than columns, raw min/max, then pyramid levels (columns on block edges)
+    np.testing.assert_array_equal(archive.envelope("vent", 10, 50, 100), vent[10:50])
+    for start, stop, columns in [(0, 3000, 500), (3 * level_1, 43 * level_1, 40), (0, 64 * level_1, 16)]:
+        np.testing.assert_array_equal(archive.envelope("vent", start, stop, columns),
+                                      _expected(vent, start, stop, columns))
+    # Off block edges the columns snap to blocks, but still skip the NaN samples
+    assert np.isfinite(archive.envelope("vent", 100, FRAMES - 7, 40)).all()
+
+
+def test_limits_skip_nan(tmp_path, frames):
+    frames["atr"] = np.nan
+    archive = EgramArchive(_record(tmp_path, frames))
+    assert archive.limits("vent") == (float(np.nanmin(frames["vent"])), float(np.nanmax(frames["vent"])))
+    assert archive.limits("atr") == (0.0, 1.0)
+
+
+def test_pyramid_rebuilt_when_recording_grows(tmp_path, frames):
+    base = _record(tmp_path, frames[:1000])
+    assert EgramArchive(base).limits("atr") == (0.0, 999.0)
+    with open(base + ".egram", "ab") as f:
+        extra = EgramArchive(base).records[:1].copy()
+        extra["atr"] = 5000.0
+        f.write(extra.tobytes())
+    assert EgramArchive(base).limits("atr") == (0.0, 5000.0)
@@ -0,0 +1,36 @@
+# tests/test_notify_cadence.py
+"""Toasts raised mid-stream don't stall the egram redraws."""
+import time
+
+# Longest egram redraw gap allowed while toasts are showing
+CADENCE_BUDGET_S = 0.1
+CADENCE_RUN_S = 3.0
+TOASTS_AT_S = 0.5
+
+
+def test_redraw_cadence_with_toasts(app, monkeypatch):
+    from views import notifications
+    app.show_frame("EgramView")
+    view = app.frames["EgramView"]
+    draws = []
+    draw = view.renderer.draw
+
+    def timed_draw(*args, **kwargs):
+        draws.append(time.perf_counter())
+        return draw(*args, **kwargs)
+    monkeypatch.setattr(view.renderer, "draw", timed_draw)
+
+    # Not connected, so the stream is mock frames
+    view.btn_start.invoke()
+    shown_at = time.perf_counter() + TOASTS_AT_S
+    app.after(int(TOASTS_AT_S * 1000), app.notify, notifications.ERROR, "Comm Error", "Error while streaming.")
+    app.after(int(TOASTS_AT_S * 1000) + 100, app.notify, notifications.SUCCESS, "Result",
+              "Confirmation while streaming.")
+    app.after(int(CADENCE_RUN_S * 1000), app.quit)
+    app.mainloop()
+    view.btn_stop.invoke()
+
+    times = [t for t in draws if t >= shown_at]
+    assert len(times) > 1, "No redraws while the toasts were showing"
+    worst = max(b - a for a, b in zip(times, times[1:]))
+    assert worst <= CADENCE_BUDGET_S, f"Worst redraw gap {worst * 1000:.1f} ms with toasts shown"
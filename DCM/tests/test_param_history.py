@@ -0,0 +1,87 @@
+# tests/test_param_history.py
+"""Parameter history: delta chains rebuild every version, across restarts and failed writes."""
+import sqlite3
+
+import pytest
+
+from models.param_history import KEYFRAME_INTERVAL, ParameterHistory, apply_delta, make_delta
+
+SENDS = KEYFRAME_INTERVAL * 2 + 5
+
+
+def _values(i):
+    values = {"lrl": 60 + i % 40, "a_amp": 3.5, "a_pw": round(0.1 * (i % 7 + 1), 2)}
+    if i % 5 == 0:
+        values["hyst"] = 1  # comes and goes, so deltas also remove keys
+    return values
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "history.db")
+
+
+def test_delta_round_trip():
+    old, new = {"a": 1, "b": 2, "c": 3}, {"a": 1, "b": 5, "d": 4}
+    assert apply_delta(old, make_delta(old, new)) == new
+
+
+def test_query_rebuilds_every_version(db_path):
+    history = ParameterHistory(db_path)
+    try:
+        ids = [history.record_sent("alice", "dev-1", "AOO", _values(i), ts=1000.0 + i) for i in range(SENDS)]
+        history.record_sent("alice", "dev-2", "AOO", {"lrl": 99}, ts=1000.5)
+
+        entries = history.query(device_id="dev-1")
+        assert [e.id for e in entries] == ids
+        assert [e.sent for e in entries] == [_values(i) for i in range(SENDS)]
+        keyframes = history.conn.execute("SELECT COUNT(*) FROM param_history WHERE keyframe = 1 "
+                                         "AND device_id = 'dev-1'").fetchone()[0]
+        assert keyframes == -(-SENDS // KEYFRAME_INTERVAL)
+
+        # A window in the middle of the chain starts from the keyframe before it
+        middle = history.query(device_id="dev-1", start=1040.0, end=1045.0)
+        assert [e.sent for e in middle] == [_values(i) for i in range(40, 46)]
+        assert history.programmed_at("alice", "dev-1", "AOO", 1050.5).sent == _values(50)
+    finally:
+        history.close()
+
+
+def test_verify_and_restart(db_path):
+    history = ParameterHistory(db_path)
+    for i in range(KEYFRAME_INTERVAL + 3):
+        history.record_sent("alice", "dev-1", "AOO", _values(i), ts=1000.0 + i)
+    history.close()
+
+    # After a restart the chain and the latest send come from the table
+    history = ParameterHistory(db_path)
+    try:
+        echoed = dict(_values(KEYFRAME_INTERVAL + 2), lrl=61)
+        row_id = history.record_verified("alice", "dev-1", echoed, ts=2000.0)
+        history.record_sent("alice", "dev-1", "AOO", _values(100), ts=2001.0)
+
+        entries = history.query(device_id="dev-1")
+        assert entries[-2].id == row_id and entries[-2].verified == echoed
+        assert [e.sent for e in entries] == [_values(i) for i in range(KEYFRAME_INTERVAL + 3)] + [_values(100)]
+    finally:
+        history.close()
+
+
+def test_failed_write_is_requeued(db_path, monkeypatch):
+    history = ParameterHistory(db_path)
+    send_row = history._send_row
+    failures = [sqlite3.OperationalError("database is locked")]
+
+    def flaky_send_row(*args):
+        if failures:
+            raise failures.pop()
+        return send_row(*args)
+    monkeypatch.setattr(history, "_send_row", flaky_send_row)
+    try:
+        for i in range(5):
+            history.record_sent("alice", "dev-1", "AOO", _values(i), ts=1000.0 + i)
+        assert history._writer.flush(timeout=5)
+        assert not failures
+        assert [e.sent for e in history.query()] == [_values(i) for i in range(5)]
+    finally:
+        history.close()
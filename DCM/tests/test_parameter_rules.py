@@ -0,0 +1,63 @@
+# tests/test_parameter_rules.py
+"""Parameter packets: validation, encoding and decoding agree with each other."""
+import pytest
+
+from models.parameter_rules import (_WIRE_FIELDS, ECHO_LAYOUT, MODE_CODES, MODE_OFFSET, PACKET_HEADER,
+                                    PACKET_SIZE, decode_echo, decode_packet, encode_batch, encode_settings,
+                                    validate_batch, validate_settings)
+
+VVIR = {
+    "Lower Rate Limit": "55", "Upper Rate Limit": "130", "Maximum Sensor Rate": "140",
+    "Ventricular Amplitude": "4.2", "Ventricular Pulse Width": "0.35", "Ventricular Sensitivity": "1.5",
+    "VRP": "300", "Hysteresis": "1", "Activity Threshold": "Med-High", "Reaction Time": "25",
+    "Response Factor": "12", "Recovery Time": "7",
+}
+AOO = {"Lower Rate Limit": "70", "Upper Rate Limit": "120", "Atrial Amplitude": "2.5",
+       "Atrial Pulse Width": "0.4"}
+
+
+def test_encode_decode_round_trip():
+    packet = encode_settings("VVIR", VVIR)
+    assert len(packet) == PACKET_SIZE and packet.startswith(PACKET_HEADER)
+    params = decode_packet(packet)
+    assert params["mode"] == MODE_CODES["VVIR"]
+    assert (params["lrl"], params["msr"], params["react_time"], params["resp_fact"], params["recov"]) == \
+        (55, 140, 25, 12, 7)
+    assert (params["v_amp"], params["v_pw"], params["v_sens"]) == (4.2, 0.35, 1.5)
+    assert (params["v_ref"], params["hyst"], params["act_thresh"]) == (300, 1, 35)
+    # Fields the mode doesn't use carry valid defaults, not 0
+    assert params["a_amp"] == 3.5 and params["a_ref"] == 250
+
+
+def test_echo_decodes_like_the_packet():
+    packet = encode_settings("VVIR", VVIR)
+    # The board echoes the same wire bytes in its own order
+    wire = {key: packet[offset] for key, offset, _ in _WIRE_FIELDS}
+    wire["mode"] = packet[MODE_OFFSET]
+    echo = bytes(wire[key] for key in ECHO_LAYOUT)
+    assert decode_echo(echo) == decode_packet(packet)
+    with pytest.raises(ValueError):
+        decode_echo(echo[:-1])
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"Upper Rate Limit": "50"}, "URL cannot be less than LRL"),
+    ({"Lower Rate Limit": "20"}, "between 30 and 175"),
+    ({"Ventricular Amplitude": "x"}, "must be a number"),
+    ({"Activity Threshold": "Extreme"}, "Invalid Activity Threshold"),
+    ({"VRP": ""}, "Missing 'VRP'"),
+])
+def test_invalid_settings(change, message):
+    data = dict(VVIR, **change)
+    errors = validate_settings("VVIR", data)
+    assert any(message in e for e in errors), errors
+    with pytest.raises(ValueError):
+        encode_settings("VVIR", data)
+
+
+def test_batch_matches_single_records():
+    modes, settings = ["VVIR", "AOO", "VVIR"], [VVIR, AOO, dict(VVIR, **{"Lower Rate Limit": "90"})]
+    buffer = encode_batch(modes, settings)
+    assert buffer == b"".join(encode_settings(m, s) for m, s in zip(modes, settings))
+    assert validate_batch(modes + ["AOO"], settings + [dict(AOO, **{"Upper Rate Limit": "60"})])[-1] == \
+        validate_settings("AOO", dict(AOO, **{"Upper Rate Limit": "60"}))
@@ -0,0 +1,72 @@
+# tests/test_persistence.py
+"""Write-behind worker: coalescing, retries and failure reporting."""
+import json
+import threading
+
+from models.persistence import WRITE_ATTEMPTS, WriteBehindWorker, atomic_write_json
+
+
+def test_atomic_write_json(tmp_path):
+    path = tmp_path / "data.json"
+    atomic_write_json(str(path), {"a": 1})
+    atomic_write_json(str(path), {"a": 2})
+    assert json.loads(path.read_text()) == {"a": 2}
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+
+def test_submits_coalesce_by_key():
+    worker = WriteBehindWorker("test", delay_s=0.2)
+    written = []
+    for i in range(5):
+        worker.submit("k", lambda i=i: written.append(i))
+    assert worker.flush(timeout=5)
+    assert written == [4]
+    assert worker.close() == {}
+
+
+def test_transient_failure_is_retried():
+    worker = WriteBehindWorker("test", delay_s=0)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < WRITE_ATTEMPTS:
+            raise OSError("disk busy")
+    worker.submit("k", flaky)
+    assert worker.flush(timeout=5)
+    assert len(calls) == WRITE_ATTEMPTS
+    assert worker.close() == {}
+
+
+def test_lasting_failure_is_reported_until_resubmitted():
+    errors = []
+    reported = threading.Event()
+
+    def on_error(*args):
+        errors.append(args)
+        reported.set()
+    worker = WriteBehindWorker("test", delay_s=0, on_error=on_error)
+
+    def broken():
+        raise OSError("disk full")
+    worker.submit("k", broken)
+    assert not worker.flush(timeout=5)
+    # on_error runs on the worker thread, after flush() is released
+    assert reported.wait(5)
+    assert [(name, key) for name, key, _e in errors] == [("test", "k")]
+    assert "k" in worker.failed
+
+    # A newer write for the key replaces the failed one
+    worker.submit("k", lambda: None)
+    assert worker.flush(timeout=5)
+    assert worker.close() == {}
+
+
+def test_close_returns_failed_writes():
+    worker = WriteBehindWorker("test", delay_s=0)
+
+    def broken():
+        raise OSError("disk full")
+    worker.submit("k", broken)
+    failed = worker.close()
+    assert list(failed) == ["k"] and isinstance(failed["k"], OSError)
@@ -0,0 +1,67 @@
+# tests/test_profile_io.py
+"""Profile import/export: chunked validation, error reports, and format round trips."""
+import csv
+import json
+
+import pytest
+
+from models.pacing_model import PacingModel
+from models.profile_io import export_profiles, import_profiles, iter_profiles
+
+AAI = {"Lower Rate Limit": "60", "Upper Rate Limit": "120", "Atrial Amplitude": "3.5",
+       "Atrial Pulse Width": "0.4", "Atrial Sensitivity": "1.5", "ARP": "250", "Hysteresis": "0"}
+
+
+@pytest.fixture
+def model(tmp_path):
+    model = PacingModel(str(tmp_path / "settings.db"), legacy_path=str(tmp_path / "legacy.json"))
+    yield model
+    model.close()
+
+
+def _write_jsonl(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write((record if isinstance(record, str) else json.dumps(record)) + "\n")
+
+
+def test_import_validates_in_chunks(tmp_path, model):
+    records = [{"username": f"user{i}", "mode": "AAI", "settings": dict(AAI, **{"Lower Rate Limit": str(50 + i)})}
+               for i in range(10)]
+    records[3]["settings"]["Upper Rate Limit"] = "40"      # below LRL
+    records[6]["username"] = ""
+    records.insert(8, "{not json")
+    source = tmp_path / "profiles.jsonl"
+    _write_jsonl(source, records)
+
+    report = import_profiles(str(source), model, chunk_size=4, errors_path=str(tmp_path / "errors.csv"))
+    assert (report.total, report.imported, report.rejected) == (11, 8, 3)
+    assert [number for number, _message in report.errors] == [4, 7, 9]
+    with open(tmp_path / "errors.csv", newline="") as f:
+        assert [row["record"] for row in csv.DictReader(f)] == ["4", "7", "9"]
+    assert model.load_settings("user9", "AAI") == dict(AAI, **{"Lower Rate Limit": "59"})
+    assert model.load_settings("user3", "AAI") == {}
+
+
+def test_import_keeps_only_the_modes_parameters(tmp_path, model):
+    source = tmp_path / "profiles.jsonl"
+    _write_jsonl(source, [{"username": "alice", "mode": "AAI", "settings": dict(AAI, VRP="300")}])
+    assert import_profiles(str(source), model).imported == 1
+    assert model.load_settings("alice", "AAI") == AAI
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl"])
+def test_export_import_round_trip(tmp_path, model, suffix):
+    model.save_settings("alice", "AAI", AAI)
+    model.save_settings("bob", "AAI", dict(AAI, ARP="300"))
+    model.flush()
+    exported = tmp_path / ("profiles" + suffix)
+    assert export_profiles(str(exported), model) == 2
+    assert sorted(r[0] for r in iter_profiles(str(exported))) == ["alice", "bob"]
+
+    copy = PacingModel(str(tmp_path / "copy.db"), legacy_path=str(tmp_path / "none.json"))
+    try:
+        assert import_profiles(str(exported), copy).imported == 2
+        assert list(copy.iter_settings()) == list(model.iter_settings())
+    finally:
+        copy.close()
@@ -0,0 +1,47 @@
+# tests/test_serial_framing.py
+"""Egram framing: reads of any size frame the stream like one pass over it."""
+import numpy as np
+import pytest
+
+from models.egram_stress import _decode_chunked, make_stream, sent_frames
+from models.serial_comms import EGRAM_FRAME_SIZE, decode_egram_frames, frame_egram_stream
+
+DAMAGE = dict(noise=0.01, truncate=0.01, false_header=0.02, burst=0.002)
+
+
+@pytest.mark.parametrize("checksum", [False, True])
+def test_clean_stream(checksum):
+    sent = sent_frames(5000, checksum, np.random.default_rng(0))
+    runs, gaps, end = frame_egram_stream(np.frombuffer(sent.tobytes(), dtype=np.uint8), checksum, final=True)
+    assert runs == [[0, 5000]] and gaps == [] and end == 5000 * EGRAM_FRAME_SIZE
+
+
+@pytest.mark.parametrize("checksum", [False, True])
+@pytest.mark.parametrize("read_size", [1, 7, 100, 4096])
+def test_chunked_matches_one_shot(checksum, read_size):
+    rng = np.random.default_rng(1)
+    sent = sent_frames(3000 if read_size > 1 else 300, checksum, rng)
+    stream, _starts, _intact, _events = make_stream(sent, rng, **DAMAGE)
+    whole, _resyncs, _skipped, _consumed = decode_egram_frames(stream.tobytes(), checksum)
+    chunked, _elapsed = _decode_chunked(stream, checksum, read_size)
+    assert chunked.tobytes() == whole.tobytes()
+
+
+@pytest.mark.parametrize("checksum", [False, True])
+def test_seq_jump_is_not_a_resync(checksum):
+    sent = sent_frames(25, checksum, np.random.default_rng(2))
+    # The board dropped seq 10-14; every byte that arrived is a whole frame
+    stream = np.concatenate([sent[:10], sent[15:]]).tobytes()
+    frames, resyncs, skipped, _consumed = decode_egram_frames(stream, checksum)
+    assert (resyncs, skipped) == (0, 0)
+    assert list(frames["seq"][:12]) == list(range(10)) + [15, 16]
+
+
+@pytest.mark.parametrize("checksum", [False, True])
+def test_junk_between_frames_is_skipped(checksum):
+    sent = sent_frames(20, checksum, np.random.default_rng(3))
+    junk = bytes([0x01, 0x7F, 0x01, 0x00, 0x02])
+    stream = sent[:10].tobytes() + junk + sent[10:].tobytes()
+    runs, gaps, _end = frame_egram_stream(np.frombuffer(stream, dtype=np.uint8), checksum, final=True)
+    assert sum(count for _start, count in runs) == 20
+    assert gaps == [(10 * EGRAM_FRAME_SIZE, len(junk))]
@@ -0,0 +1,33 @@
+# tests/test_startup.py
+"""Cold start to an idle Welcome screen stays within budget."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import DCM_DIR
+
+STARTUP_BUDGET_S = 1.5
+
+# Fresh interpreter, so the imports the app pulls in at startup are counted
+_MEASURE = """
+import time
+start = time.perf_counter()
+from controller import DCMApp
+app = DCMApp()
+app.update_idletasks()
+print(time.perf_counter() - start)
+app._on_close()
+"""
+
+
+def test_startup_within_budget(tmp_path):
+    pytest.importorskip("customtkinter")
+    env = dict(os.environ, DCM_DATA_DIR=str(tmp_path))
+    run = subprocess.run([sys.executable, "-c", _MEASURE], cwd=DCM_DIR, env=env, capture_output=True, text=True)
+    if run.returncode != 0 and "TclError" in run.stderr:
+        pytest.skip("No display")
+    assert run.returncode == 0, run.stderr
+    elapsed = float(run.stdout.strip().splitlines()[-1])
+    assert elapsed <= STARTUP_BUDGET_S, f"Startup to Welcome took {elapsed:.3f} s"
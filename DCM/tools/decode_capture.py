@@ -0,0 +1,30 @@
+# tools/decode_capture.py
+"""
+Prints the packet summary and the first anomalies of a raw serial capture.
+Offline: no window, and nothing from the UI is imported.
+
+    python tools/decode_capture.py models/captures/capture_<stamp>
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.protocol_decoder import decode
+from models.serial_capture import load_capture
+
+
+def main(path: str):
+    meta, chunks, data = load_capture(path)
+    decoded = decode(chunks, data, meta.get("egram_checksum", False))
+    print("\n".join(decoded.summary_lines()))
+    anomalies = decoded.anomaly_lines(data)
+    if anomalies:
+        print("\nFirst anomalies:")
+        print("\n".join(anomalies))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python tools/decode_capture.py <capture path>")
+    main(sys.argv[1])
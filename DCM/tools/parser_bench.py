@@ -0,0 +1,24 @@
+# tools/parser_bench.py
+"""
+Egram framing under each corruption profile (models/egram_stress),
+header-only vs header + checksum.
+
+    python tools/parser_bench.py [frames]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.egram_stress import benchmark
+
+
+def main(frames: int = 200_000):
+    print(f"{'profile':<15}{'framing':<12}{'MB/s':>8}{'recovered':>11}{'misframes/10k':>15}{'relock':>8}")
+    for name, framing, r in benchmark(frames):
+        print(f"{name:<15}{framing:<12}{r['mb_s']:>8.1f}{r['recovered'] * 100:>10.2f}%"
+              f"{r['misframes']:>15.2f}{r['relock']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,26 @@
+# tools/renderer_bench.py
+"""
+Mean frame time of each egram renderer at 2, 4 and 8 channels.
+
+    python tools/renderer_bench.py
+"""
+import os
+import sys
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from views.egram_renderers import benchmark
+
+
+def main():
+    root = tk.Tk()
+    root.withdraw()
+    print(f"{'renderer':<12}{'channels':>9}{'ms/frame':>10}")
+    for name, channels, ms in benchmark(root):
+        print(f"{name:<12}{channels:>9}{ms:>10.2f}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# views/blit_cache.py
+"""
+Background cache for blitting animated matplotlib artists.
+
+A background is the rendered axes without its animated artists. It goes
+stale whenever the figure is fully redrawn at a different size or layout:
+window resize, toolbar zoom/pan, tight_layout() after a font change,
+showing or hiding an axes. Rather than each of those call sites
+remembering to recapture, the cache listens for matplotlib's draw_event
+(every full draw) and recaptures there, and treats a Tk <Configure> on the
+canvas as "stale until the next full draw". blit() never does a full
+draw itself, so the per-frame cost stays the same through a resize; while
+the cache is stale it skips the frame instead of blitting garbage.
+
+When one axes changes on its own (e.g. new y limits), rerender(ax)
+redraws just that axes and its tick labels instead of the whole figure.
+"""
+from typing import Dict, List, Sequence, Tuple
+
+from matplotlib.patches import Rectangle
+from matplotlib.transforms import Bbox, IdentityTransform
+
+
+class BlitCache:
+    def __init__(self, canvas, regions: Sequence[Tuple[object, Sequence[object]]]):
+        """
+        regions: (axes, animated artists) pairs; each axes' bbox is restored
+        and blitted as a unit. Artists may belong to a twin of the axes.
+        """
+        self.canvas = canvas
+        self.regions: List[Tuple[object, Sequence[object]]] = list(regions)
+        self._backgrounds: Dict[object, object] = {}
+        self._valid = False
+        canvas.mpl_connect("draw_event", self._on_draw)
+        canvas.get_tk_widget().bind("<Configure>", self._invalidate, add="+")
+
+    @property
+    def valid(self) -> bool:
+        return self._valid
+
+    def _invalidate(self, _event=None):
+        self._valid = False
+
+    def _on_draw(self, _event):
+        # Runs inside every full draw, before the result reaches the screen
+        figure = self.canvas.figure
+        self._backgrounds = {}
+        for ax, artists in self.regions:
+            if not ax.get_visible():
+                continue
+            self._backgrounds[ax] = self.canvas.copy_from_bbox(ax.bbox)
+            # Animated artists are left out of full draws; put them back on top
+            for artist in artists:
+                figure.draw_artist(artist)
+        self._valid = True
+
+    def rerender(self, ax):
+        """
+        Re-renders one region's axes (frame, grid, ticks, labels, twins) and
+        recaptures its background; the other regions are untouched. Call
+        blit() afterwards to put the animated artists back.
+        """
+        if not self._valid or not ax.get_visible():
+            return  # a pending full draw will pick the change up
+        artists = next(a for region_ax, a in self.regions if region_ax is ax)
+        axes = [ax] + [t for t in {a.axes for a in artists} if t is not ax]
+        figure = self.canvas.figure
+        renderer = self.canvas.get_renderer()
+
+        # Tick labels sit outside ax.bbox, so clear and blit the tight box
+        region = Bbox.union([a.get_tightbbox(renderer) for a in axes]).padded(2)
+        region = Bbox.intersection(region, figure.bbox) or figure.bbox
+        eraser = Rectangle((region.x0, region.y0), region.width, region.height,
+                           transform=IdentityTransform(), facecolor=figure.get_facecolor(),
+                           edgecolor="none")
+        eraser.set_figure(figure)
+        figure.draw_artist(eraser)
+        for a in axes:
+            a.draw(renderer)  # animated artists are skipped
+        self._backgrounds[ax] = self.canvas.copy_from_bbox(ax.bbox)
+        self.canvas.blit(region)
+
+    def blit(self) -> bool:
+        """Redraws just the animated artists. Returns False if the frame was skipped."""
+        if not self._valid:
+            # Tk normally schedules this itself on resize; make sure one is coming
+            self.canvas.draw_idle()
+            return False
+        figure = self.canvas.figure
+        for ax, artists in self.regions:
+            background = self._backgrounds.get(ax)
+            if background is None:
+                continue
+            self.canvas.restore_region(background)
+            for artist in artists:
+                figure.draw_artist(artist)
+            self.canvas.blit(ax.bbox)
+        return True
@@ -0,0 +1,279 @@
+import tkinter as tk
+from tkinter import filedialog
+import time
+
+import customtkinter as ctk
+import numpy as np
+
+from models.egram_archive import EgramArchive
+from models.egram_recorder import RECORDINGS_DIR
+from views import notifications
+from views.egram_renderers import FIGURE_BG, GRID_COLOR, PANEL_BG, _rgb, trace_spans
+
+# (channel, title, colour) of each review panel
+REVIEW_CHANNELS = [("atr", "Atrium", "orange"), ("vent", "Ventricle", "cyan"), ("activity", "Activity", "green")]
+MINIMAP_CHANNEL = "atr"
+MINIMAP_HEIGHT = 60
+MARGIN_X = 50
+TITLE_HEIGHT = 20
+MIN_SPAN = 10        # samples across the full width at the deepest zoom
+ZOOM_STEP = 1.25
+
+
+def create_access_buttons(parent_frame, controller):
+    """Adds Font Size buttons to a frame"""
+    btn_frame = ctk.CTkFrame(parent_frame, fg_color="transparent")
+    btn_frame.pack(side="right", padx=10)
+
+    ctk.CTkButton(btn_frame, text="A-", width=30, command=controller.decrease_font_size).pack(side="left", padx=2)
+    ctk.CTkButton(btn_frame, text="A+", width=30, command=controller.increase_font_size).pack(side="left", padx=2)
+
+
+class EgramBrowser(ctk.CTkFrame):
+    """
+    Review screen for recorded sessions: a whole-session minimap on top and
+    a zoomable, scrollable view below. Both are drawn from the archive's
+    min/max pyramid (models/egram_archive.py), so a redraw costs the same
+    at any zoom and anywhere in the recording.
+
+    Mouse wheel zooms around the pointer, dragging pans, clicking or
+    dragging the minimap jumps there.
+    """
+
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.controller = controller
+        self.archive: EgramArchive | None = None
+        self.limits = {}
+        self.start = 0.0   # first visible sample
+        self.span = 0.0    # samples across the plot width
+        self._render_job = None
+        self._drag_x = None
+        self._last_render_ms = 0.0
+        self.font_size = controller.DEFAULT_FONT_SIZE
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(2, weight=1)
+
+        # --- Top Controls ---
+        controls = ctk.CTkFrame(self)
+        controls.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
+        create_access_buttons(controls, controller)
+        self.btn_open = ctk.CTkButton(controls, text="Open Recording", width=140, command=self._choose_file)
+        self.btn_open.pack(side="left", padx=10)
+        self.btn_fit = ctk.CTkButton(controls, text="Whole Session", width=120, command=self._fit, state="disabled")
+        self.btn_fit.pack(side="left", padx=10)
+        self.file_label = ctk.CTkLabel(controls, text="No recording open", anchor="w")
+        self.file_label.pack(side="left", padx=10, fill="x", expand=True)
+
+        # --- Minimap and main view (numpy raster -> PhotoImage, as in the Raster renderer) ---
+        self.minimap = tk.Canvas(self, height=MINIMAP_HEIGHT, highlightthickness=0, background="#ffffff")
+        self.minimap.grid(row=1, column=0, sticky="ew", padx=10)
+        self.view = tk.Canvas(self, highlightthickness=0, background="#ffffff")
+        self.view.grid(row=2, column=0, sticky="nsew", padx=10, pady=(5, 0))
+        self._mini_photo = tk.PhotoImage(master=self.minimap, width=1, height=1)
+        self.minimap.create_image(0, 0, image=self._mini_photo, anchor="nw")
+        self._view_photo = tk.PhotoImage(master=self.view, width=1, height=1)
+        self.view.create_image(0, 0, image=self._view_photo, anchor="nw")
+        self._colors = {key: _rgb(color, self.view) for key, _, color in REVIEW_CHANNELS}
+
+        self.minimap.bind("<Configure>", lambda _e: self._render_minimap(), add="+")
+        self.minimap.bind("<Button-1>", self._on_minimap)
+        self.minimap.bind("<B1-Motion>", self._on_minimap)
+        self.view.bind("<Configure>", lambda _e: self._request_render(), add="+")
+        self.view.bind("<ButtonPress-1>", self._on_press)
+        self.view.bind("<B1-Motion>", self._on_drag)
+        self.view.bind("<MouseWheel>", self._on_wheel)
+        self.view.bind("<Button-4>", lambda e: self._zoom(1 / ZOOM_STEP, e.x))  # X11 wheel
+        self.view.bind("<Button-5>", lambda e: self._zoom(ZOOM_STEP, e.x))
+
+        # --- Bottom ---
+        bottom = ctk.CTkFrame(self, fg_color="transparent")
+        bottom.grid(row=3, column=0, sticky="ew", padx=10, pady=10)
+        self.info_label = ctk.CTkLabel(bottom, text="", anchor="w")
+        self.info_label.pack(side="top", fill="x", pady=(0, 5))
+        self.back_btn = ctk.CTkButton(bottom, text="Back to Egram", width=200,
+                                      command=lambda: controller.show_frame("EgramView"))
+        self.back_btn.pack(side="bottom")
+
+    def update_font_size(self, size):
+        self.font_size = size
+        normal_font = ctk.CTkFont(family="Helvetica", size=size)
+        for widget in (self.btn_open, self.btn_fit, self.file_label, self.info_label, self.back_btn):
+            widget.configure(font=normal_font)
+        self._request_render()
+
+    # ---------------- Opening ----------------
+    def _choose_file(self):
+        path = filedialog.askopenfilename(title="Open Egram Recording", initialdir=RECORDINGS_DIR,
+                                          filetypes=[("Egram recordings", "*.egram")])
+        if path:
+            self.open(path)
+
+    def open(self, path: str):
+        """Opens a session; a missing pyramid is built on the I/O worker first."""
+        self.file_label.configure(text=f"Opening {path}...")
+        self.controller.run_io(lambda: self._load(path), self._on_opened)
+
+    @staticmethod
+    def _load(path: str):
+        """Runs on the I/O worker."""
+        try:
+            return EgramArchive(path), ""
+        except (OSError, ValueError, KeyError) as e:
+            return None, f"Could not open {path}: {e}"
+
+    def _on_opened(self, archive: EgramArchive | None, error: str):
+        if archive is None:
+            self.file_label.configure(text="No recording open" if self.archive is None else self.archive.base)
+            self.controller.notify(notifications.ERROR, "Open Recording", error)
+            return
+        self.archive = archive
+        self.limits = {}
+        for key, _, _ in REVIEW_CHANNELS:
+            if key in archive.channels:
+                lo, hi = archive.limits(key)
+                pad = max(hi - lo, 1e-3) * 0.1
+                self.limits[key] = (lo - pad, hi + pad)
+        info = archive.summary()
+        self.file_label.configure(text=f"{archive.base}  |  {info['records']} samples, "
+                                       f"{info['duration_s'] / 3600:.2f} h  |  {info['user'] or '-'} / "
+                                       f"{info['device'] or '-'}")
+        self.btn_fit.configure(state="normal")
+        self._fit()
+        self._render_minimap()
+
+    # ---------------- Navigation ----------------
+    def _plot_width(self) -> int:
+        return max(self.view.winfo_width() - 2 * MARGIN_X, 1)
+
+    def _clamp(self):
+        total = len(self.archive)
+        self.span = min(max(self.span, min(MIN_SPAN, total)), total)
+        self.start = min(max(self.start, 0.0), total - self.span)
+
+    def _fit(self):
+        if self.archive is None:
+            return
+        self.start, self.span = 0.0, float(len(self.archive))
+        self._request_render()
+
+    def _zoom(self, factor: float, x: int):
+        if self.archive is None:
+            return
+        # Keep the sample under the pointer where it is
+        frac = min(max((x - MARGIN_X) / self._plot_width(), 0.0), 1.0)
+        anchor = self.start + frac * self.span
+        self.span *= factor
+        self._clamp()
+        self.start = anchor - frac * self.span
+        self._clamp()
+        self._request_render()
+
+    def _on_wheel(self, event):
+        self._zoom(1 / ZOOM_STEP if event.delta > 0 else ZOOM_STEP, event.x)
+
+    def _on_press(self, event):
+        self._drag_x = event.x
+
+    def _on_drag(self, event):
+        if self.archive is None or self._drag_x is None:
+            return
+        self.start -= (event.x - self._drag_x) * self.span / self._plot_width()
+        self._drag_x = event.x
+        self._clamp()
+        self._request_render()
+
+    def _on_minimap(self, event):
+        if self.archive is None:
+            return
+        width = max(self.minimap.winfo_width() - 2 * MARGIN_X, 1)
+        self.start = (event.x - MARGIN_X) / width * len(self.archive) - self.span / 2
+        self._clamp()
+        self._request_render()
+
+    # ---------------- Rendering ----------------
+    def _request_render(self):
+        # Coalesce bursts of wheel/drag events into one render
+        if self._render_job is None:
+            self._render_job = self.after_idle(self._render)
+
+    def _render(self):
+        self._render_job = None
+        width, height = self.view.winfo_width(), self.view.winfo_height()
+        if self.archive is None or width < 2 * MARGIN_X + 2 or height < 2:
+            return
+        started = time.perf_counter()
+        plot_w = width - 2 * MARGIN_X
+        keys = [key for key, _, _ in REVIEW_CHANNELS if key in self.limits]
+        slot = height // max(len(keys), 1)
+        first, last = int(self.start), int(np.ceil(self.start + self.span))
+
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = FIGURE_BG
+        self.view.delete("label")
+        font = ("Helvetica", max(self.font_size - 4, 8))
+        for n, key in enumerate(keys):
+            y0, h = n * slot + TITLE_HEIGHT, max(slot - TITLE_HEIGHT - 6, 1)
+            area = frame[y0:y0 + h, MARGIN_X:MARGIN_X + plot_w]
+            area[:] = PANEL_BG
+            area[:, ::max(plot_w // 10, 1)] = GRID_COLOR
+            area[::max(h // 4, 1)] = GRID_COLOR
+            values = self.archive.envelope(key, first, last, plot_w)
+            if len(values):
+                top, bottom = trace_spans(values, self.limits[key], plot_w, h)
+                rows = np.arange(h)[:, None]
+                area[(rows >= top) & (rows <= bottom)] = self._colors[key]
+            title = next(t for k, t, _ in REVIEW_CHANNELS if k == key)
+            lo, hi = self.limits[key]
+            self.view.create_text(MARGIN_X + plot_w / 2, y0 - TITLE_HEIGHT / 2, text=title, tags="label",
+                                  font=("Helvetica", max(self.font_size - 4, 8), "bold"), fill="#333333")
+            self.view.create_text(MARGIN_X - 4, y0, text=f"{hi:.3g}", anchor="ne", font=font, tags="label")
+            self.view.create_text(MARGIN_X - 4, y0 + h, text=f"{lo:.3g}", anchor="se", font=font, tags="label")
+
+        header = f"P6 {width} {height} 255 ".encode("ascii")
+        self._view_photo.configure(width=width, height=height)
+        self._view_photo.configure(data=header + frame.tobytes(), format="PPM")
+        self.view.tag_raise("label")
+        self._last_render_ms = (time.perf_counter() - started) * 1000
+        self._update_viewport()
+        self._update_info()
+
+    def _render_minimap(self):
+        width, height = self.minimap.winfo_width(), self.minimap.winfo_height()
+        if self.archive is None or MINIMAP_CHANNEL not in self.limits or width < 2 * MARGIN_X + 2:
+            return
+        plot_w = width - 2 * MARGIN_X
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = FIGURE_BG
+        area = frame[:, MARGIN_X:MARGIN_X + plot_w]
+        area[:] = PANEL_BG
+        # The whole session in plot_w columns: straight from the top of the pyramid
+        values = self.archive.envelope(MINIMAP_CHANNEL, 0, len(self.archive), plot_w)
+        if len(values):
+            top, bottom = trace_spans(values, self.limits[MINIMAP_CHANNEL], plot_w, height)
+            rows = np.arange(height)[:, None]
+            area[(rows >= top) & (rows <= bottom)] = self._colors[MINIMAP_CHANNEL]
+        header = f"P6 {width} {height} 255 ".encode("ascii")
+        self._mini_photo.configure(width=width, height=height)
+        self._mini_photo.configure(data=header + frame.tobytes(), format="PPM")
+        self._update_viewport()
+
+    def _update_viewport(self):
+        self.minimap.delete("viewport")
+        if self.archive is None or not len(self.archive):
+            return
+        plot_w = max(self.minimap.winfo_width() - 2 * MARGIN_X, 1)
+        total = len(self.archive)
+        x0 = MARGIN_X + self.start / total * plot_w
+        x1 = MARGIN_X + (self.start + self.span) / total * plot_w
+        self.minimap.create_rectangle(x0, 1, max(x1, x0 + 2), self.minimap.winfo_height() - 1,
+                                      outline="#1f6aa5", width=2, tags="viewport")
+
+    def _update_info(self):
+        t0 = self.archive.time_at(self.start)
+        t1 = self.archive.time_at(self.start + self.span - 1)
+        per_px = self.span / self._plot_width()
+        self.info_label.configure(
+            text=f"{t0:.2f} s - {t1:.2f} s  |  {per_px:.3g} samples/px  |  render {self._last_render_ms:.1f} ms"
+        )
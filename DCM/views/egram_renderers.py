@@ -0,0 +1,433 @@
+# views/egram_renderers.py
+"""
+Strip-chart renderers for the live egram.
+
+EgramView draws through the EgramRenderer interface, so the backend can
+be swapped without touching acquisition, buffering or autoscaling:
+
+- MatplotlibRenderer: the figure/axes/Line2D path with blitting (and the
+  zoom/pan toolbar).
+- RasterRenderer: rasterizes each trace straight into a NumPy RGB buffer
+  and hands it to a Tk PhotoImage as one binary PPM. Panel fills and grid
+  are rendered into a background image once per size/layout change; titles
+  and tick labels are Tk canvas text. No artist pipeline per frame, so the
+  cost grows with pixels, not with matplotlib overhead per line.
+
+Both also support sweep mode (draw(..., dirty=...)): the buffers are
+written in place left to right and an erase bar runs ahead of the newest
+sample. The raster backend then repaints and uploads only the columns
+touched since the last frame, so its cost follows the sample rate, not
+the window length.
+
+benchmark() times both on the same data at 2, 4 and 8 channels
+(python tools/renderer_bench.py).
+"""
+import time
+import tkinter as tk
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.figure import Figure
+
+from views.blit_cache import BlitCache
+
+# Width of the sweep-mode erase bar, as a fraction of the window
+ERASE_FRACTION = 0.02
+
+
+@dataclass
+class Trace:
+    key: str
+    color: str
+    limits: Tuple[float, float]
+    autoscale: bool = False
+
+
+@dataclass
+class Panel:
+    title: str
+    # The first trace owns the left axis; any others are drawn on a right-hand twin
+    traces: List[Trace] = field(default_factory=list)
+
+
+class EgramRenderer(ABC):
+    """Interface shared by the backends. All methods run on the Tk thread."""
+    name = ""
+
+    def __init__(self, parent, panels: Sequence[Panel], data_size: int):
+        self.panels = list(panels)
+        self.data_size = data_size
+        self.visible = [True] * len(self.panels)
+        self.widget: tk.Widget = None
+
+    @abstractmethod
+    def set_visible(self, flags: Sequence[bool]):
+        """Shows/hides panels (one flag per panel) and re-renders."""
+
+    @abstractmethod
+    def set_limits(self, key: str, limits: Tuple[float, float]):
+        """New y limits for one trace; re-renders only what depends on them."""
+
+    @abstractmethod
+    def refresh(self):
+        """Full re-render (e.g. at stream start)."""
+
+    @abstractmethod
+    def draw(self, data: Dict[str, np.ndarray], dirty: Tuple[int, int] | None = None) -> bool:
+        """
+        Draws one frame of the traces. Returns False if the frame was skipped.
+
+        dirty is None for the scrolling display. In sweep mode it is
+        (start, count): the samples written in place since the last frame,
+        starting at buffer position start (wrapping at data_size); the
+        erase bar sits just after them.
+        """
+
+    def update_font_size(self, size: int):
+        pass
+
+    def destroy(self):
+        self.widget.destroy()
+
+    def _trace(self, key: str) -> Tuple[int, int]:
+        for p, panel in enumerate(self.panels):
+            for t, trace in enumerate(panel.traces):
+                if trace.key == key:
+                    return p, t
+        raise KeyError(key)
+
+
+# ---------------- matplotlib ----------------
+class MatplotlibRenderer(EgramRenderer):
+    name = "Matplotlib"
+
+    def __init__(self, parent, panels: Sequence[Panel], data_size: int):
+        super().__init__(parent, panels, data_size)
+        self.widget = tk.Frame(parent)
+        self.widget.grid_rowconfigure(0, weight=1)
+        self.widget.grid_columnconfigure(0, weight=1)
+
+        self.fig = Figure(figsize=(5, 4), dpi=100)
+        self.axes = []   # per panel: [left axis, twins...]
+        self.lines = {}  # trace key -> Line2D
+        x = np.arange(data_size)
+        for i, panel in enumerate(self.panels):
+            ax = self.fig.add_subplot(len(self.panels), 1, i + 1, sharex=self.axes[0][0] if self.axes else None)
+            self._style_plot(ax, panel.title)
+            axes = [ax]
+            for t, trace in enumerate(panel.traces):
+                target = ax if t == 0 else ax.twinx()
+                if t:
+                    target.tick_params(axis="y", labelsize=8)
+                    axes.append(target)
+                target.set_ylim(*trace.limits)
+                self.lines[trace.key], = target.plot(x, np.zeros(data_size), color=trace.color,
+                                                     linewidth=1.5, animated=True)
+            self.axes.append(axes)
+        self.fig.subplots_adjust(hspace=0.5)
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.widget)
+        # Backgrounds are recaptured on every full draw (resize, zoom, fonts, visibility)
+        self.blit_cache = BlitCache(self.canvas, [
+            (axes[0], [self.lines[trace.key] for trace in panel.traces])
+            for axes, panel in zip(self.axes, self.panels)
+        ])
+        self.canvas.draw()
+        self.canvas.get_tk_widget().grid(row=0, column=0, sticky="nsew")
+
+        toolbar_frame = tk.Frame(self.widget)
+        toolbar_frame.grid(row=1, column=0, sticky="ew")
+        self.toolbar = NavigationToolbar2Tk(self.canvas, toolbar_frame)
+        self.toolbar.update()
+
+    def _style_plot(self, ax, title):
+        ax.set_title(title, fontsize=10, color="#333", fontweight="bold")
+        ax.set_facecolor('#f0f0f0')
+        ax.grid(True, linestyle='--', alpha=0.6)
+        ax.set_xlim(0, self.data_size)
+
+    def set_visible(self, flags: Sequence[bool]):
+        self.visible = list(flags)
+        for axes, shown in zip(self.axes, self.visible):
+            for ax in axes:
+                ax.set_visible(shown)
+        self.canvas.draw()
+
+    def set_limits(self, key: str, limits: Tuple[float, float]):
+        p, t = self._trace(key)
+        self.axes[p][t].set_ylim(*limits)
+        # Only this panel is re-rendered (no full canvas.draw())
+        self.blit_cache.rerender(self.axes[p][0])
+
+    def refresh(self):
+        self.canvas.draw()
+
+    def draw(self, data: Dict[str, np.ndarray], dirty: Tuple[int, int] | None = None) -> bool:
+        if dirty is None:
+            for key, line in self.lines.items():
+                line.set_ydata(data[key])
+        else:
+            # Sweep: same picture, but whole axes are still blitted (no per-column blits here)
+            start, count = dirty
+            gap = (start + count + np.arange(max(1, int(self.data_size * ERASE_FRACTION)))) % self.data_size
+            for key, line in self.lines.items():
+                values = data[key].astype(np.float64)
+                values[gap] = np.nan
+                line.set_ydata(values)
+        # Note: No canvas.draw() here! It kills performance.
+        return self.blit_cache.blit()
+
+    def update_font_size(self, size: int):
+        try:
+            self.fig.tight_layout()
+            self.canvas.draw()
+        except Exception: pass
+
+
+# ---------------- NumPy / PhotoImage ----------------
+PANEL_BG = (240, 240, 240)
+FIGURE_BG = (255, 255, 255)
+GRID_COLOR = (200, 200, 200)
+GRID_DIVISIONS = 5
+MARGIN_LEFT = 50
+MARGIN_RIGHT = 50
+TITLE_HEIGHT = 22
+PANEL_GAP = 12
+LINE_WIDTH = 2
+
+
+def _rgb(color: str, widget: tk.Widget) -> np.ndarray:
+    r, g, b = widget.winfo_rgb(color)
+    return np.array([r >> 8, g >> 8, b >> 8], dtype=np.uint8)
+
+
+def trace_spans(values: np.ndarray, limits: Tuple[float, float], width: int,
+                height: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-column (top, bottom) pixel rows of a polyline through values
+    stretched over width columns. Each column spans the samples that land
+    in it plus its joint with the previous column, so steep edges stay
+    connected and narrow windows keep their peaks (min/max decimation).
+    """
+    lo, hi = limits
+    n = len(values)
+    rows = (hi - np.asarray(values, dtype=np.float64)) * ((height - 1) / (hi - lo))
+    np.clip(rows, 0, height - 1, out=rows)
+    if n >= width:
+        # Several samples per column: min/max of each column's run
+        cols = (np.arange(n) * (width / n)).astype(np.intp)
+        starts = np.searchsorted(cols, np.arange(width))
+        top = np.minimum.reduceat(rows, starts)
+        bottom = np.maximum.reduceat(rows, starts)
+        last = rows[np.append(starts[1:], n) - 1]
+    else:
+        # Fewer samples than columns: interpolate one value per column
+        top = bottom = last = np.interp(np.arange(width) * ((n - 1) / max(width - 1, 1)), np.arange(n), rows)
+    # Join each column to where the previous one ended
+    prev = np.concatenate(([last[0]], last[:-1]))
+    top = np.minimum(top, prev)
+    bottom = np.maximum(bottom, prev)
+    top = np.floor(top).astype(np.intp)
+    bottom = np.maximum(np.ceil(bottom).astype(np.intp), top + LINE_WIDTH - 1)
+    return top, np.minimum(bottom, height - 1)
+
+
+def sweep_columns(start: int, count: int, n: int, width: int):
+    """
+    Column ranges a sweep frame has to touch when count samples were written
+    from buffer position start (n samples across width columns). Returns
+    (paint, erase) lists of (first, stop) column ranges; paint covers the new
+    samples and their joints (the interpolated columns when n < width),
+    erase is the bar just ahead of them. paint is None when the new
+    samples cover the whole plot.
+    """
+    per_sample = width / n
+    bar = max(int(width * ERASE_FRACTION), int(np.ceil(per_sample)) + 2)
+    first = int((start - 1) * per_sample) - 1
+    stop = int(np.ceil((start + count) * per_sample)) + 1
+    erase = _wrap(stop, stop + bar, width)
+    if stop + bar - first >= width:
+        return None, erase
+    return _wrap(first, stop, width), erase
+
+
+def _wrap(first: int, stop: int, width: int):
+    """Splits [first, stop) in unwrapped column space into in-range pieces."""
+    first, stop = first % width, (stop - 1) % width + 1
+    if first < stop:
+        return [(first, stop)]
+    return [(first, width), (0, stop)]
+
+
+class RasterRenderer(EgramRenderer):
+    name = "Raster"
+
+    def __init__(self, parent, panels: Sequence[Panel], data_size: int):
+        super().__init__(parent, panels, data_size)
+        self.widget = tk.Canvas(parent, highlightthickness=0, background="#ffffff")
+        self.limits = {trace.key: trace.limits for panel in self.panels for trace in panel.traces}
+        self.colors = {trace.key: _rgb(trace.color, self.widget) for panel in self.panels for trace in panel.traces}
+        self.font_size = 10
+        self._photo = tk.PhotoImage(master=self.widget, width=1, height=1)
+        self.widget.create_image(0, 0, image=self._photo, anchor="nw")
+        self._width = self._height = 0
+        self._boxes: Dict[int, Tuple[int, int, int, int]] = {}  # panel -> (x0, y0, w, h) of its plot area
+        self._background = np.zeros((1, 1, 3), dtype=np.uint8)
+        self._frame = self._background.copy()
+        self._header = b""
+        self._row_index = np.zeros((1, 1), dtype=np.intp)
+        self._last_data: Dict[str, np.ndarray] | None = None
+        self._last_dirty: Tuple[int, int] | None = None
+        self.widget.bind("<Configure>", self._on_configure, add="+")
+
+    # ---------- layout and background (only on size/limit/visibility changes) ----------
+    def _on_configure(self, event):
+        if (event.width, event.height) != (self._width, self._height):
+            self._width, self._height = event.width, event.height
+            self.refresh()
+
+    def _layout(self):
+        shown = [i for i, flag in enumerate(self.visible) if flag]
+        self._boxes = {}
+        if not shown:
+            return
+        plot_w = max(self._width - MARGIN_LEFT - MARGIN_RIGHT, 1)
+        slot = (self._height - PANEL_GAP) / len(shown)
+        for n, i in enumerate(shown):
+            y0 = int(n * slot) + TITLE_HEIGHT
+            h = max(int(slot) - TITLE_HEIGHT - PANEL_GAP, 1)
+            self._boxes[i] = (MARGIN_LEFT, y0, plot_w, h)
+
+    def refresh(self):
+        if self._width < 2 or self._height < 2:
+            return
+        self._layout()
+        bg = np.empty((self._height, self._width, 3), dtype=np.uint8)
+        bg[:] = FIGURE_BG
+        for x0, y0, w, h in self._boxes.values():
+            bg[y0:y0 + h, x0:x0 + w] = PANEL_BG
+            for k in range(GRID_DIVISIONS + 1):
+                bg[y0 + min(k * h // GRID_DIVISIONS, h - 1), x0:x0 + w] = GRID_COLOR
+                bg[y0:y0 + h, x0 + min(k * w // GRID_DIVISIONS, w - 1)] = GRID_COLOR
+        self._background = bg
+        self._frame = bg.copy()
+        self._header = f"P6 {self._width} {self._height} 255 ".encode("ascii")
+        self._row_index = np.arange(max(h for _, _, _, h in self._boxes.values()) if self._boxes else 1)[:, None]
+        self._photo.configure(width=self._width, height=self._height)
+        self._draw_labels()
+        # Keep the traces on screen through a resize while stopped
+        if self._last_data is not None:
+            self._render(self._last_data, self._last_dirty, whole=True)
+
+    def _draw_labels(self):
+        self.widget.delete("label")
+        font = ("Helvetica", self.font_size)
+        for i, (x0, y0, w, h) in self._boxes.items():
+            panel = self.panels[i]
+            self.widget.create_text(x0 + w / 2, y0 - TITLE_HEIGHT / 2, text=panel.title, tags="label",
+                                    font=("Helvetica", self.font_size, "bold"), fill="#333333")
+            for t, trace in enumerate(panel.traces[:2]):
+                lo, hi = self.limits[trace.key]
+                x, anchor = (x0 - 4, "e") if t == 0 else (x0 + w + 4, "w")
+                for value, y in ((hi, y0), (lo, y0 + h - 1), ((lo + hi) / 2, y0 + h / 2)):
+                    self.widget.create_text(x, y, text=f"{value:.3g}", anchor=anchor, font=font,
+                                            fill=trace.color, tags="label")
+        self.widget.tag_raise("label")
+
+    def set_visible(self, flags: Sequence[bool]):
+        self.visible = list(flags)
+        self.refresh()
+
+    def set_limits(self, key: str, limits: Tuple[float, float]):
+        # The pixels come from the limits every frame; only the labels need redoing
+        self.limits[key] = limits
+        self._draw_labels()
+
+    # ---------- per frame ----------
+    def draw(self, data: Dict[str, np.ndarray], dirty: Tuple[int, int] | None = None) -> bool:
+        return self._render(data, dirty, whole=dirty is None)
+
+    def _render(self, data, dirty, whole: bool) -> bool:
+        self._last_data, self._last_dirty = data, dirty
+        if not self._boxes:
+            return False
+        x0, _, w, _ = next(iter(self._boxes.values()))  # all panels share the x extent
+        paint = erase = None
+        if dirty is not None:
+            paint, erase = sweep_columns(dirty[0], dirty[1], self.data_size, w)
+            whole = whole or paint is None
+        if whole:
+            paint = [(0, w)]
+
+        frame = self._frame
+        if whole:
+            np.copyto(frame, self._background)
+        else:
+            for c0, c1 in paint:
+                frame[:, x0 + c0:x0 + c1] = self._background[:, x0 + c0:x0 + c1]
+        for i, (_, y0, _, h) in self._boxes.items():
+            area = frame[y0:y0 + h, x0:x0 + w]
+            rows = self._row_index[:h]
+            for trace in self.panels[i].traces:
+                top, bottom = trace_spans(data[trace.key], self.limits[trace.key], w, h)
+                for c0, c1 in paint:
+                    columns = area[:, c0:c1]
+                    columns[(rows >= top[c0:c1]) & (rows <= bottom[c0:c1])] = self.colors[trace.key]
+        for c0, c1 in erase or ():
+            frame[:, x0 + c0:x0 + c1] = self._background[:, x0 + c0:x0 + c1]
+
+        if whole:
+            # Binary PPM straight from the buffer; Tk decodes it natively (no PIL)
+            self._photo.configure(data=self._header + frame.tobytes(), format="PPM")
+        else:
+            # Upload only the touched column strips
+            for c0, c1 in paint + erase:
+                strip = np.ascontiguousarray(frame[:, x0 + c0:x0 + c1])
+                header = f"P6 {c1 - c0} {self._height} 255 ".encode("ascii")
+                self._photo.tk.call(self._photo.name, "put", header + strip.tobytes(),
+                                    "-format", "ppm", "-to", x0 + c0, 0)
+        return True
+
+    def update_font_size(self, size: int):
+        self.font_size = max(size - 4, 8)
+        self._draw_labels()
+
+
+RENDERERS = {cls.name: cls for cls in (MatplotlibRenderer, RasterRenderer)}
+
+
+# ---------------- Comparison ----------------
+def benchmark(root, channel_counts: Sequence[int] = (2, 4, 8), frames: int = 200,
+              data_size: int = 500, size: Tuple[int, int] = (900, 600)) -> List[Tuple[str, int, float]]:
+    """
+    Draws the same scrolling signals with each backend at each channel
+    count (one panel per channel) and returns (backend, channels, mean ms
+    per frame). Includes getting the frame onto the screen (update_idletasks).
+    """
+    results = []
+    t = np.arange(data_size) / 100.0
+    for name, cls in RENDERERS.items():
+        for channels in channel_counts:
+            panels = [Panel(f"Ch {c + 1}", [Trace(f"ch{c}", "orange", (-1.5, 1.5))]) for c in range(channels)]
+            window = tk.Toplevel(root)
+            window.geometry(f"{size[0]}x{size[1]}")
+            renderer = cls(window, panels, data_size)
+            renderer.widget.pack(fill="both", expand=True)
+            window.update()
+            renderer.refresh()
+            window.update()
+            data = {f"ch{c}": np.sin(t * (3 + c)) for c in range(channels)}
+            start = time.perf_counter()
+            for k in range(frames):
+                for c in range(channels):
+                    data[f"ch{c}"] = np.roll(data[f"ch{c}"], -5)
+                renderer.draw(data)
+                window.update_idletasks()
+            elapsed = time.perf_counter() - start
+            results.append((name, channels, elapsed / frames * 1000))
+            renderer.destroy()
+            window.destroy()
+    return results
@@ -1,12 +1,30 @@
 import customtkinter as ctk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from matplotlib.figure import Figure
-import tkinter as tk
+# This module (and the renderers' matplotlib) is only imported when the
+# egram screen is first opened (see FRAME_CLASSES)
+from tkinter import filedialog
 import numpy as np
 import time
-import math
-import random
+
+from models.serial_comms import egram_activity
+from models.egram_stats import EgramLinkStats
+from models.egram_recorder import EgramRecorder
+from models.egram_autoscale import AxisAutoscaler, DEFAULT_LIMITS
+from models.egram_recorder import RECORDINGS_DIR
+from models.egram_replay import SPEEDS, ReplaySource
+from models.event_bus import COMM_STATUS, EGRAM_ENDED, EGRAM_FRAMES
+from views import notifications
+from views.egram_renderers import RENDERERS, MatplotlibRenderer, Panel, Trace
+
+# Redraws are driven by arriving frames, at most one per interval
+FRAME_INTERVAL_S = 0.02
+
+# Activity nominally ~1 at rest and ~7 when shaken hard; rate in ppm
+EGRAM_PANELS = [
+    Panel("Atrium", [Trace("atr", "orange", DEFAULT_LIMITS, autoscale=True)]),
+    Panel("Ventricle", [Trace("vent", "cyan", DEFAULT_LIMITS, autoscale=True)]),
+    Panel("Activity / Sensor Rate", [Trace("act", "green", (0.0, 8.0)), Trace("rate", "purple", (30, 180))]),
+]
+DEFAULT_RENDERER = MatplotlibRenderer.name
 
 def create_access_buttons(parent_frame, controller):
     """Adds Font Size buttons to a frame"""
@@ -20,12 +38,36 @@ class EgramView(ctk.CTkFrame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
+        # Acquisition (is_running) and rendering (is_shown) have separate lifecycles:
+        # while the screen is hidden, frames are still buffered and recorded
         self.is_running = False
+        self.is_shown = False
+        self._stream_user = None
+        # What the running stream reads: the board, mock frames, or a ReplaySource
+        self._streaming_serial = False
+        self._replay: ReplaySource | None = None
         
-        # --- Dual Channel Buffer ---
+        # --- Rolling buffers: atrium, ventricle, activity, sensor rate ---
         self.data_size = 500
-        self.atr_data = np.zeros(self.data_size)
-        self.vent_data = np.zeros(self.data_size)
+        self.buffers = {trace.key: np.zeros(self.data_size)
+                        for panel in EGRAM_PANELS for trace in panel.traces}
+
+        # --- Link Accounting / Recording ---
+        self.link_stats = EgramLinkStats()
+        self.recorder = EgramRecorder()
+        self.scalers = {trace.key: AxisAutoscaler(trace.limits)
+                        for panel in EGRAM_PANELS for trace in panel.traces if trace.autoscale}
+        self._last_stats_refresh = 0.0
+        self._redraw_job = None
+        self._last_draw = 0.0
+        # Sweep mode: next write position, and what was written since the last draw
+        self._cursor = 0
+        self._dirty_start = 0
+        self._dirty_count = 0
+        self._redraw_full = False
+        controller.bus.subscribe(EGRAM_FRAMES, self._on_frames)
+        controller.bus.subscribe(COMM_STATUS, self._on_comm_status)
+        controller.bus.subscribe(EGRAM_ENDED, self._on_stream_ended)
         
         # --- Layout ---
         self.grid_columnconfigure(0, weight=1)
@@ -48,155 +90,321 @@ class EgramView(ctk.CTkFrame):
             rb.pack(side="left", padx=10)
             self.radio_btns.append(rb)
 
+        self.activity_var = ctk.BooleanVar(value=True)
+        self.chk_activity = ctk.CTkCheckBox(controls_frame, text="Activity", variable=self.activity_var,
+                                            command=self._update_visibility)
+        self.chk_activity.pack(side="left", padx=10)
+
+        self.autoscale_var = ctk.BooleanVar(value=True)
+        self.chk_autoscale = ctk.CTkCheckBox(controls_frame, text="Auto Y", variable=self.autoscale_var,
+                                             command=self._reset_y_limits)
+        self.chk_autoscale.pack(side="left", padx=10)
+
+        self.sweep_var = ctk.BooleanVar(value=False)
+        self.chk_sweep = ctk.CTkCheckBox(controls_frame, text="Sweep", variable=self.sweep_var,
+                                         command=self._reset_display)
+        self.chk_sweep.pack(side="left", padx=10)
+
+        self.renderer_var = ctk.StringVar(value=DEFAULT_RENDERER)
+        self.renderer_menu = ctk.CTkOptionMenu(controls_frame, values=list(RENDERERS), variable=self.renderer_var,
+                                               width=120, command=self._set_renderer)
+        self.renderer_menu.pack(side="left", padx=10)
+
         self.btn_stop = ctk.CTkButton(controls_frame, text="Stop", fg_color="red", width=80, state="disabled", command=self._stop_graph)
         self.btn_stop.pack(side="right", padx=10)
         
         self.btn_start = ctk.CTkButton(controls_frame, text="Start Stream", fg_color="green", width=100, command=self._start_graph)
         self.btn_start.pack(side="right", padx=10)
 
+        self.record_var = ctk.BooleanVar(value=False)
+        self.chk_record = ctk.CTkCheckBox(controls_frame, text="Record", variable=self.record_var)
+        self.chk_record.pack(side="right", padx=10)
+
         # --- 2. Graph Area ---
         graph_container = ctk.CTkFrame(self, fg_color="transparent")
         graph_container.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0,10))
         graph_container.grid_rowconfigure(0, weight=1)
         graph_container.grid_columnconfigure(0, weight=1)
-
-        self.fig = Figure(figsize=(5, 4), dpi=100)
-        self.ax_atr = self.fig.add_subplot(211) 
-        self.ax_vent = self.fig.add_subplot(212, sharex=self.ax_atr) 
-        self.fig.subplots_adjust(hspace=0.4) 
-
-        self._style_plot(self.ax_atr, "Atrium")
-        self._style_plot(self.ax_vent, "Ventricle")
-        
-        # Initialize Plot Lines (Both active)
-        self.line_atr, = self.ax_atr.plot(np.arange(self.data_size), self.atr_data, color="orange", linewidth=1.5, animated=True)
-        self.line_vent, = self.ax_vent.plot(np.arange(self.data_size), self.vent_data, color="cyan", linewidth=1.5, animated=True)
-
-        self.canvas = FigureCanvasTkAgg(self.fig, master=graph_container)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().grid(row=0, column=0, sticky="nsew")
-
-        self.toolbar_frame = ctk.CTkFrame(graph_container)
-        self.toolbar_frame.grid(row=1, column=0, sticky="ew")
-        self.toolbar = NavigationToolbar2Tk(self.canvas, self.toolbar_frame)
-        self.toolbar.update()
+        self.graph_container = graph_container
+        self.renderer = None
+        self._set_renderer(DEFAULT_RENDERER)
 
         # --- 3. Bottom Controls ---
         bottom_frame = ctk.CTkFrame(self, fg_color="transparent")
         bottom_frame.grid(row=2, column=0, sticky="ew", padx=10, pady=10)
 
-        self.back_btn = ctk.CTkButton(bottom_frame, text="Back to Main Menu", width=200, command=self._go_back)
-        self.back_btn.pack(side="bottom")
-        
-        # Backgrounds for Blitting
-        self.bg_atr = None
-        self.bg_vent = None
+        self.stats_label = ctk.CTkLabel(bottom_frame, text=self.link_stats.summary_text(), anchor="w")
+        self.stats_label.pack(side="top", fill="x", pady=(0, 5))
+
+        nav_frame = ctk.CTkFrame(bottom_frame, fg_color="transparent")
+        nav_frame.pack(side="bottom")
+        self.back_btn = ctk.CTkButton(nav_frame, text="Back to Main Menu", width=200, command=self._go_back)
+        self.back_btn.pack(side="left", padx=5)
+        self.review_btn = ctk.CTkButton(nav_frame, text="Review Recordings", width=200,
+                                        command=lambda: controller.show_frame("EgramBrowser"))
+        self.review_btn.pack(side="left", padx=5)
+        self.replay_btn = ctk.CTkButton(nav_frame, text="Replay Recording", width=160, command=self._choose_replay)
+        self.replay_btn.pack(side="left", padx=5)
+        self.speed_var = ctk.StringVar(value=next(iter(SPEEDS)))
+        self.speed_menu = ctk.CTkOptionMenu(nav_frame, values=list(SPEEDS), variable=self.speed_var, width=80)
+        self.speed_menu.pack(side="left", padx=5)
 
-    def _style_plot(self, ax, title):
-        ax.set_title(title, fontsize=10, color="#333", fontweight="bold")
-        ax.set_facecolor('#f0f0f0') 
-        ax.grid(True, linestyle='--', alpha=0.6)
-        ax.set_xlim(0, self.data_size)
-        ax.set_ylim(-1.0, 6.0)
+    def _set_renderer(self, name: str):
+        """Swaps the plotting backend (only while stopped; the menu is disabled while streaming)."""
+        switching = self.renderer is not None
+        if switching:
+            if self.renderer.name == name:
+                return
+            self.renderer.destroy()
+        self.renderer = RENDERERS[name](self.graph_container, EGRAM_PANELS, self.data_size)
+        self.renderer.widget.grid(row=0, column=0, sticky="nsew")
+        if switching:
+            # Carry the current view settings over to the new backend
+            for key, scaler in self.scalers.items():
+                self.renderer.set_limits(key, scaler.limits)
+            if self.controller.current_font_size != self.controller.DEFAULT_FONT_SIZE:
+                self.renderer.update_font_size(self.controller.current_font_size)
+            self._update_visibility()
 
     def update_font_size(self, size):
         normal_font = ctk.CTkFont(family="Helvetica", size=size)
         self.lbl_select.configure(font=normal_font)
         for rb in self.radio_btns: rb.configure(font=normal_font)
-        for btn in [self.btn_start, self.btn_stop, self.back_btn]: btn.configure(font=normal_font)
-        
-        try:
-            self.fig.tight_layout()
-            self.canvas.draw()
-        except Exception: pass
+        self.chk_activity.configure(font=normal_font)
+        self.chk_autoscale.configure(font=normal_font)
+        self.chk_sweep.configure(font=normal_font)
+        self.renderer_menu.configure(font=normal_font)
+        for btn in [self.btn_start, self.btn_stop, self.back_btn, self.review_btn, self.replay_btn, self.speed_menu]:
+            btn.configure(font=normal_font)
+        self.chk_record.configure(font=normal_font)
+        self.stats_label.configure(font=normal_font)
+        self.renderer.update_font_size(size)
 
     def _update_visibility(self):
         mode = self.channel_var.get()
-        self.ax_atr.set_visible(mode in ["Atrium", "Both"])
-        self.ax_vent.set_visible(mode in ["Ventricle", "Both"])
-        try: self.canvas.draw()
-        except Exception: pass
+        self.renderer.set_visible([mode in ["Atrium", "Both"], mode in ["Ventricle", "Both"],
+                                   self.activity_var.get()])
+
+    def _reset_y_limits(self):
+        """Back to the default egram limits (stream start, or Auto Y switched)."""
+        for key, scaler in self.scalers.items():
+            scaler.reset()
+            self.renderer.set_limits(key, scaler.limits)
+
+    def _reset_display(self):
+        """Empties the buffers (stream start, or scrolling/sweep switched)."""
+        for buffer in self.buffers.values():
+            buffer[:] = 0.0
+        self._cursor = self._dirty_start = self._dirty_count = 0
+        if self.is_running:
+            self._redraw_full = True
+
+    def _choose_replay(self):
+        path = filedialog.askopenfilename(title="Replay Egram Recording", initialdir=RECORDINGS_DIR,
+                                          filetypes=[("Egram recordings", "*.egram"), ("Raw serial captures", "*.rawcap")])
+        if not path:
+            return
+        speed = SPEEDS[self.speed_var.get()]
+        # A capture has to be decoded first; keep that off the Tk thread
+        self.controller.run_io(lambda: self._open_replay(path, speed), self._on_replay_opened)
+
+    def _open_replay(self, path: str, speed):
+        """Runs on the I/O worker."""
+        try:
+            return ReplaySource.from_path(path, speed), None
+        except (OSError, ValueError) as e:
+            return None, f"Could not open {path}: {e}"
+
+    def _on_replay_opened(self, source: ReplaySource | None, error: str | None):
+        if source is None:
+            self.controller.notify(notifications.ERROR, "Replay", error)
+            return
+        if self.is_running:
+            self._stop_graph()
+        self._start_graph(source)
 
-    def _start_graph(self):
-        if self.controller.connected:
+    def _start_graph(self, replay: ReplaySource | None = None):
+        # Live board if connected, else mock frames; a replay takes the board's place
+        self._replay = replay
+        self._streaming_serial = replay is None and self.controller.connected
+        if self._streaming_serial:
             self.controller.serial_manager.start_egram_stream()
         
         # Reset Buffers
-        self.atr_data = np.zeros(self.data_size)
-        self.vent_data = np.zeros(self.data_size)
-        self.line_atr.set_ydata(self.atr_data)
-        self.line_vent.set_ydata(self.vent_data)
+        self._reset_display()
+
+        # Fresh link accounting (and recording) per stream
+        self.link_stats.reset()
+        if self.record_var.get():
+            self.recorder.start(self.controller.current_user, self.controller.current_device_id)
+        self.chk_record.configure(state="disabled")
         
-        # --- BLITTING SETUP ---
-        # Draw once to render background
-        self.canvas.draw()
-        # Save background (everything except the lines)
-        self.bg_atr = self.canvas.copy_from_bbox(self.ax_atr.bbox)
-        self.bg_vent = self.canvas.copy_from_bbox(self.ax_vent.bbox)
+        # Full render once; per-frame draws only touch the traces
+        self._reset_y_limits()
+        self.renderer.refresh()
         
         self.is_running = True
+        self._stream_user = self.controller.current_user
         self.btn_start.configure(state="disabled")
         self.btn_stop.configure(state="normal")
-        self._animate()
+        self.renderer_menu.configure(state="disabled")
+        self.replay_btn.configure(state="disabled")
+        # Frames arrive as bus events from the acquisition thread
+        self.controller.egram_acquisition.start(mock=replay is None and not self._streaming_serial,
+                                                source=replay)
 
     def _stop_graph(self):
-        if self.controller.connected:
+        self.controller.egram_acquisition.stop()
+        if self._streaming_serial and self.controller.connected:
             self.controller.serial_manager.stop_egram_stream()
+        self._streaming_serial = False
+        self._replay = None
 
         self.is_running = False
+        if self._redraw_job is not None:
+            self.after_cancel(self._redraw_job)
+            self._redraw_job = None
         self.btn_start.configure(state="normal")
         self.btn_stop.configure(state="disabled")
+        self.renderer_menu.configure(state="normal")
+        self.replay_btn.configure(state="normal")
 
-    def _go_back(self):
+        path = self.recorder.stop(self.link_stats.snapshot())
+        if path:
+            print(f"[Egram] Session saved to {path}")
+        self.chk_record.configure(state="normal")
+        self._refresh_stats(force=True)
+
+    def _on_comm_status(self, connected: bool, device_id):
+        # A board stream can't outlive the connection it was started on
+        if not connected and self.is_running and self._streaming_serial:
+            self._stop_graph()
+
+    def _on_stream_ended(self, reason: str):
+        if not self.is_running:
+            return
+        was_replay = self._replay is not None
         self._stop_graph()
+        if was_replay:
+            # (a lost board stream has already been reported as an ERROR)
+            self.controller.notify(notifications.INFO, "Replay", reason)
+
+    def _go_back(self):
+        # Leaves the stream running; it keeps buffering/recording in the background
         self.controller.show_frame("MainFrame")
 
+    def on_show(self):
+        """Screen raised: catch up on everything buffered while hidden in one redraw."""
+        self.is_shown = True
+        if self.is_running:
+            self._redraw_full = True
+            self._redraw()
+        self._refresh_stats(force=True)
+
+    def on_hide(self):
+        """Screen covered: stop rendering entirely (acquisition carries on)."""
+        self.is_shown = False
+        if self._redraw_job is not None:
+            self.after_cancel(self._redraw_job)
+            self._redraw_job = None
+
+    def set_user(self, username: str):
+        # A stream (and its recording) belongs to the user who started it
+        if self.is_running and username != self._stream_user:
+            self._stop_graph()
+
     def destroy(self):
         self.is_running = False
+        self.controller.egram_acquisition.stop()
+        self.recorder.stop(self.link_stats.snapshot())
         super().destroy()
 
-    def _animate(self):
-        if not self.is_running or not self.winfo_exists():
+    @staticmethod
+    def _push_samples(buffer, values):
+        """Shifts a rolling buffer left by len(values) and appends them."""
+        n = len(values)
+        if n >= buffer.size:
+            buffer[:] = values[-buffer.size:]
+        else:
+            buffer[:-n] = buffer[n:]
+            buffer[-n:] = values
+
+    def _write_sweep(self, buffer, values):
+        """Writes values into a sweep buffer from the cursor, wrapping at the end."""
+        n = len(values)
+        start = self._cursor
+        if n >= buffer.size:
+            # Only the newest buffer's worth survives; it still ends just before
+            # the new cursor (cursor + len(values)), where the erase bar goes
+            start = (start + n - buffer.size) % buffer.size
+            values = values[-buffer.size:]
+            n = buffer.size
+        idx = (start + np.arange(n)) % buffer.size
+        buffer[idx] = values
+
+    def _refresh_stats(self, force=False):
+        # Label updates are throttled to ~4 Hz; they are not free in Tk
+        if not self.is_shown:
             return
+        now = time.perf_counter()
+        if force or now - self._last_stats_refresh >= 0.25:
+            self._last_stats_refresh = now
+            self.stats_label.configure(text=self.link_stats.summary_text())
 
-        # 1. Read Tuple (Atr, Vent)
-        new_sample = None
-        if self.controller.connected:
-            new_sample = self.controller.serial_manager.read_egram_sample()
-        else:
-            # Mock Data
-            curr_time = time.time()
-            new_sample = (
-                2.5 + math.sin(curr_time * 5) + random.uniform(-0.1, 0.1),
-                2.0 + math.cos(curr_time * 5) + random.uniform(-0.1, 0.1)
-            )
-
-        if new_sample:
-            # Unpack
-            new_atr, new_vent = new_sample
-            
+    def _on_frames(self, frames, resyncs, skipped, arrival):
+        """EGRAM_FRAMES handler: account for and buffer a batch, then schedule a redraw."""
+        if not self.is_running:
+            return
+        self.link_stats.update(frames["seq"], resyncs, skipped, arrival)
+        self.recorder.append(frames, arrival)
+        self._refresh_stats()
+
+        if len(frames):
             # --- Update Buffers (Rolling) ---
-            self.atr_data[:-1] = self.atr_data[1:]
-            self.atr_data[-1] = new_atr
-            self.line_atr.set_ydata(self.atr_data)
-
-            self.vent_data[:-1] = self.vent_data[1:]
-            self.vent_data[-1] = new_vent
-            self.line_vent.set_ydata(self.vent_data)
-            
-            # --- FAST REDRAW (BLITTING) ---
-            # 1. Restore Background (clears old lines)
-            self.canvas.restore_region(self.bg_atr)
-            self.canvas.restore_region(self.bg_vent)
-            
-            # 2. Draw only the lines
-            self.ax_atr.draw_artist(self.line_atr)
-            self.ax_vent.draw_artist(self.line_vent)
-            
-            # 3. Blit (update screen)
-            self.canvas.blit(self.ax_atr.bbox)
-            self.canvas.blit(self.ax_vent.bbox)
-            
-            # Note: No canvas.draw() here! It kills performance.
-        
-        self.after(20, self._animate)
\ No newline at end of file
+            if self.sweep_var.get():
+                # Sweep: overwrite in place at the cursor instead of shifting
+                write = self._write_sweep
+                if self._dirty_count == 0:
+                    self._dirty_start = self._cursor
+                self._dirty_count += len(frames)
+            else:
+                write = self._push_samples
+            write(self.buffers["atr"], frames["atr"])
+            write(self.buffers["vent"], frames["vent"])
+            write(self.buffers["act"], egram_activity(frames))
+            write(self.buffers["rate"], frames["sensor_rate"])
+            if self.sweep_var.get():
+                self._cursor = (self._cursor + len(frames)) % self.data_size
+            self._schedule_redraw()
+
+    def _schedule_redraw(self):
+        # Batches arriving within one interval share a single redraw
+        if self._redraw_job is None and self.is_shown:
+            wait = self._last_draw + FRAME_INTERVAL_S - time.perf_counter()
+            self._redraw_job = self.after(max(0, int(wait * 1000)), self._redraw)
+
+    def _redraw(self):
+        self._redraw_job = None
+        if not self.is_running or not self.winfo_exists():
+            return
+        self._last_draw = time.perf_counter()
+
+        full = self._redraw_full
+        self._redraw_full = False
+        if self.autoscale_var.get():
+            # Limits change rarely (hysteresis); then only that panel is re-rendered
+            for key, scaler in self.scalers.items():
+                limits = scaler.update(self.buffers[key], self._last_draw)
+                if limits is not None:
+                    self.renderer.set_limits(key, limits)
+                    full = True  # old sweep columns were drawn at the old scale
+
+        # Only the traces are drawn per frame; a frame may be skipped
+        # while a resize is pending (the buffers keep filling).
+        # In sweep mode only the columns written since the last frame are dirty.
+        dirty = None
+        if self.sweep_var.get():
+            # A full sweep frame ends at the cursor, where the erase bar belongs
+            dirty = (self._cursor, self.data_size) if full else (self._dirty_start, self._dirty_count)
+            self._dirty_count = 0
+        self.renderer.draw(self.buffers, dirty)
@@ -2,53 +2,12 @@ import customtkinter as ctk
 from tkinter import messagebox
 from typing import Dict
 
-# --- ADDED: Activity Threshold Mapping ---
-ACT_THRESH_MAP = {
-    "V-Low": 1.5,
-    "Low": 2.0,
-    "Med-Low": 2.5,
-    "Med": 3.0,
-    "Med-High": 3.5,
-    "High": 4.0,
-    "V-High": 4.5
-}
-
-# 1. Update the Parameter Map (Added Rate Adaptive Params)
-PARAMETER_MAP = {
-    "AOO": ["Lower Rate Limit", "Upper Rate Limit", "Atrial Amplitude", "Atrial Pulse Width"],
-    "VOO": ["Lower Rate Limit", "Upper Rate Limit", "Ventricular Amplitude", "Ventricular Pulse Width"],
-    "AAI": ["Lower Rate Limit", "Upper Rate Limit", "Atrial Amplitude", "Atrial Pulse Width", "Atrial Sensitivity", "ARP", "Hysteresis"], 
-    "VVI": ["Lower Rate Limit", "Upper Rate Limit", "Ventricular Amplitude", "Ventricular Pulse Width", "Ventricular Sensitivity", "VRP", "Hysteresis"], 
-    
-    # Updated Rate Adaptive Modes with new parameters
-    "AOOR": ["Lower Rate Limit", "Upper Rate Limit", "Maximum Sensor Rate", "Atrial Amplitude", "Atrial Pulse Width", "Activity Threshold", "Reaction Time", "Response Factor", "Recovery Time"],
-    "VOOR": ["Lower Rate Limit", "Upper Rate Limit", "Maximum Sensor Rate", "Ventricular Amplitude", "Ventricular Pulse Width", "Activity Threshold", "Reaction Time", "Response Factor", "Recovery Time"],
-    "AAIR": ["Lower Rate Limit", "Upper Rate Limit", "Maximum Sensor Rate", "Atrial Amplitude", "Atrial Pulse Width", "Atrial Sensitivity", "ARP", "Hysteresis", "Activity Threshold", "Reaction Time", "Response Factor", "Recovery Time"],
-    "VVIR": ["Lower Rate Limit", "Upper Rate Limit", "Maximum Sensor Rate", "Ventricular Amplitude", "Ventricular Pulse Width", "Ventricular Sensitivity", "VRP", "Hysteresis", "Activity Threshold", "Reaction Time", "Response Factor", "Recovery Time"],
-}
-
-# 2. Update Validation Rules (Added ranges from image)
-PARAMETER_VALIDATION_RULES = {
-    "Lower Rate Limit": (30, 175, int),
-    "Upper Rate Limit": (50, 175, int),
-    "Maximum Sensor Rate": (50, 175, int),
-    "Atrial Amplitude": (0.1, 5.0, float),
-    "Ventricular Amplitude": (0.1, 5.0, float),
-    "Atrial Pulse Width": (0.05, 2, float),
-    "Ventricular Pulse Width": (0.05, 2, float),
-    "Atrial Sensitivity": (0, 5.0, float),
-    "Ventricular Sensitivity": (0, 5.0, float),
-    "VRP": (150, 500, int),
-    "ARP": (150, 500, int),
-    "PVARP": (150, 500, int),
-    "Hysteresis": (0, 1, int),
-    
-    # New Rules based on image ranges
-    "Reaction Time": (10, 50, int),    # 10-50 sec
-    "Response Factor": (1, 16, int),   # 1-16
-    "Recovery Time": (2, 16, int),     # 2-16 min
-    # Activity Threshold is validated via Dropdown selection, no numeric range check needed here
-}
+# Parameter tables live in the models so non-UI code (e.g. profile import) can use them
+from models.parameter_rules import (
+    ACT_THRESH_MAP, PARAMETER_MAP, PARAMETER_SPECS, PARAMETER_VALIDATION_RULES, validate_settings
+)
+from models.event_bus import COMM_STATUS, VERIFY_RESULT
+from views import notifications
 
 # --- Shared Accessibility Helper ---
 def create_access_buttons(parent_frame, controller):
@@ -99,6 +58,12 @@ class DebugLED(ctk.CTkFrame):
         self.echo_label = ctk.CTkLabel(main_content, text="Echo Data: --", font=ctk.CTkFont(size=14, weight="bold"))
         self.echo_label.pack(pady=5)
 
+        # Tees every byte on the port to models/captures for offline decoding
+        self.capture_var = ctk.BooleanVar(value=False)
+        self.chk_capture = ctk.CTkCheckBox(main_content, text="Capture Raw Serial", variable=self.capture_var,
+                                           command=self._toggle_capture)
+        self.chk_capture.pack(pady=(15, 5))
+
         self.back_btn = ctk.CTkButton(main_content, text="Back to Main Menu", width=200, command=lambda: controller.show_frame("MainFrame"))
         self.back_btn.pack(side="bottom", pady=20)
 
@@ -106,6 +71,14 @@ class DebugLED(ctk.CTkFrame):
         result_text = self.controller.request_echo()
         self.echo_label.configure(text=result_text)
 
+    def _toggle_capture(self):
+        if self.capture_var.get():
+            path = self.controller.start_capture()
+            self.chk_capture.configure(text=f"Capturing to {path}.rawcap")
+        else:
+            self.controller.stop_capture()
+            self.chk_capture.configure(text="Capture Raw Serial")
+
     def update_font_size(self, size):
         normal_font = ctk.CTkFont(family="Helvetica", size=size)
         title_font = ctk.CTkFont(family="Helvetica", size=size+2, weight="bold")
@@ -113,6 +86,7 @@ class DebugLED(ctk.CTkFrame):
         self.title_label.configure(font=title_font)
         self.instr_label.configure(font=normal_font)
         self.echo_label.configure(font=ctk.CTkFont(family="Helvetica", size=size, weight="bold"))
+        self.chk_capture.configure(font=normal_font)
         
         for btn in self.buttons + [self.back_btn]:
             btn.configure(font=normal_font)
@@ -127,6 +101,7 @@ class DataEntry(ctk.CTkFrame):
         self.mode_var = ctk.StringVar(value="Editing Mode: N/A")
         self.current_mode = None 
         self.param_widgets = {}
+        controller.bus.subscribe(VERIFY_RESULT, self._show_verify_text)
 
         # ------------------------------------------------------------------
         # 1. Top Bar
@@ -191,14 +166,25 @@ class DataEntry(ctk.CTkFrame):
         self.echo_textbox.insert("0.0", "Click 'Verify Sent'\nto read back parameters.")
         self.echo_textbox.configure(state="disabled")
 
-        # Full superset of parameters (Updated with new ones)
-        param_list = [
-            "Lower Rate Limit", "Upper Rate Limit", "Maximum Sensor Rate",
-            "Atrial Amplitude", "Atrial Pulse Width", "Atrial Sensitivity",
-            "Ventricular Amplitude", "Ventricular Pulse Width", "Ventricular Sensitivity",
-            "VRP", "ARP", "PVARP", "Hysteresis",
-            "Activity Threshold", "Reaction Time", "Response Factor", "Recovery Time"
-        ]
+        # Behaviour preview (offline simulation of the typed values)
+        self.preview_title = ctk.CTkLabel(right_frame, text="Preview", font=ctk.CTkFont(size=14, weight="bold"))
+        self.preview_title.pack(side="top", pady=(10, 5), anchor="w")
+
+        intrinsic_row = ctk.CTkFrame(right_frame, fg_color="transparent")
+        intrinsic_row.pack(side="top", fill="x")
+        self.intrinsic_label = ctk.CTkLabel(intrinsic_row, text="Intrinsic (bpm):")
+        self.intrinsic_label.pack(side="left")
+        self.intrinsic_entry = ctk.CTkEntry(intrinsic_row, width=60)
+        self.intrinsic_entry.insert(0, "50")
+        self.intrinsic_entry.pack(side="left", padx=5)
+        self.intrinsic_entry.bind("<KeyRelease>", self._schedule_preview)
+
+        self.preview_label = ctk.CTkLabel(right_frame, text="", justify="left", anchor="w")
+        self.preview_label.pack(side="top", fill="x", pady=5)
+        self._preview_job = None
+
+        # Full superset of parameters (schema order)
+        param_list = list(PARAMETER_SPECS)
 
         for i, param_name in enumerate(param_list):
             rule = PARAMETER_VALIDATION_RULES.get(param_name)
@@ -223,19 +209,45 @@ class DataEntry(ctk.CTkFrame):
                 entry = ctk.CTkEntry(controls_frame, width=150)
 
             entry.grid(row=i, column=1, sticky="w", padx=5, pady=5)
+            entry.bind("<KeyRelease>", self._schedule_preview)
+            if isinstance(entry, ctk.CTkComboBox):
+                entry.configure(command=self._schedule_preview)
             
             self.param_widgets[param_name] = (label, entry)
 
     def _do_verify(self):
-        # 1. Get verification text
-        result_text = self.controller.verify_parameters()
-        
-        # 2. Update Textbox
+        # The board round trip runs on a worker; the result comes back as an event
+        self._show_verify_text("Verifying...")
+        self.controller.request_verify()
+
+    def _show_verify_text(self, result_text: str):
         self.echo_textbox.configure(state="normal")
         self.echo_textbox.delete("0.0", "end")
         self.echo_textbox.insert("0.0", result_text)
         self.echo_textbox.configure(state="disabled")
 
+    def _schedule_preview(self, *_):
+        # Debounced so a burst of keystrokes runs one simulation
+        if self._preview_job is not None:
+            self.after_cancel(self._preview_job)
+        self._preview_job = self.after(150, self._update_preview)
+
+    def _update_preview(self):
+        self._preview_job = None
+        if not self.current_mode:
+            return
+
+        data = {}
+        for param_name, (label, entry) in self.param_widgets.items():
+            if entry.cget("state") != "disabled" and entry.get():
+                data[param_name] = entry.get()
+        try:
+            intrinsic = float(self.intrinsic_entry.get() or 0)
+        except ValueError:
+            intrinsic = 0.0
+
+        self.preview_label.configure(text=self.controller.preview_pacing(self.current_mode, data, intrinsic))
+
     def update_font_size(self, size):
         normal_font = ctk.CTkFont(family="Helvetica", size=size)
         title_font = ctk.CTkFont(family="Helvetica", size=size+4, weight="bold")
@@ -244,6 +256,9 @@ class DataEntry(ctk.CTkFrame):
         self.title_label.configure(font=title_font)
         self.echo_label.configure(font=ctk.CTkFont(family="Helvetica", size=size, weight="bold"))
         self.echo_textbox.configure(font=ctk.CTkFont(family="Helvetica", size=size))
+        self.preview_title.configure(font=ctk.CTkFont(family="Helvetica", size=size, weight="bold"))
+        for widget in [self.intrinsic_label, self.intrinsic_entry, self.preview_label]:
+            widget.configure(font=normal_font)
         
         for (label, entry) in self.param_widgets.values():
             label.configure(font=normal_font)
@@ -280,6 +295,8 @@ class DataEntry(ctk.CTkFrame):
                 entry.grid_remove()
                 entry.configure(state="disabled")
 
+        self._update_preview()
+
     def _get_current_data(self) -> Dict[str, str] | None:
         """Helper to validate and gather data."""
         if not self.current_mode:
@@ -288,10 +305,12 @@ class DataEntry(ctk.CTkFrame):
         data = {}
         for param_name, (label, entry) in self.param_widgets.items():
             if entry.cget("state") != "disabled":
-                value_str = entry.get()
-                if not self._validate_entry(param_name, value_str):
-                    return None
-                data[param_name] = value_str
+                data[param_name] = entry.get()
+
+        errors = validate_settings(self.current_mode, data)
+        if errors:
+            messagebox.showerror("Invalid Input", errors[0])
+            return None
         return data
 
     def _do_save(self):
@@ -304,41 +323,6 @@ class DataEntry(ctk.CTkFrame):
         if data:
             self.controller.handle_send_parameters(self.current_mode, data)
 
-    def _validate_entry(self, name: str, value_str: str) -> bool:
-        # Special validation for Activity Threshold
-        if name == "Activity Threshold":
-            if value_str not in ACT_THRESH_MAP:
-                messagebox.showerror("Invalid Input", "Please select a valid Activity Threshold.")
-                return False
-            return True
-
-        rule = PARAMETER_VALIDATION_RULES.get(name)
-        if not rule:
-            return True
-
-        min_val, max_val, data_type = rule
-        try:
-            value = data_type(value_str)
-        except ValueError:
-            messagebox.showerror("Invalid Input", f"Error in '{name}': Value must be a number.")
-            return False
-
-        if not (min_val <= value <= max_val):
-            messagebox.showerror("Invalid Input", f"Error in '{name}': Value must be between {min_val} and {max_val}.")
-            return False
-        
-        if name == "Upper Rate Limit":
-            try:
-                lrl_widget = self.param_widgets.get("Lower Rate Limit")
-                if lrl_widget and lrl_widget[1].cget("state") != "disabled":
-                    lrl_val = int(lrl_widget[1].get())
-                    if value < lrl_val:
-                        messagebox.showerror("Invalid Input", "Error: URL cannot be less than LRL.")
-                        return False
-            except Exception:
-                pass 
-        return True
-
     def set_user(self, username: str):
         self.user_var.set(f"Logged in as: {username}" if username else "")
             
@@ -351,6 +335,8 @@ class MainFrame(ctk.CTkFrame):
         super().__init__(parent)
         self.controller = controller
         self.user_var = ctk.StringVar(value="")
+        # Connection changes are pushed as they happen, not on navigation
+        controller.bus.subscribe(COMM_STATUS, self.update_comm_status)
 
         # Top Bar
         top_bar = ctk.CTkFrame(self, height=40, corner_radius=0)
@@ -448,6 +434,16 @@ class MainFrame(ctk.CTkFrame):
                                        width=460, height=40,
                                        command=lambda: controller.show_frame("EgramView"))
         self.egram_btn.grid(row=6, column=0, columnspan=2, pady=10)
+
+        self.import_btn = ctk.CTkButton(self.controls_frame, text="Import Profiles...", width=240, height=32,
+                                        command=controller.import_profiles)
+        self.import_btn.grid(row=7, column=0, padx=15, pady=(0, 10))
+        self.export_btn = ctk.CTkButton(self.controls_frame, text="Export Profiles...", width=240, height=32,
+                                        command=controller.export_profiles)
+        self.export_btn.grid(row=7, column=1, padx=15, pady=(0, 10))
+        self.audit_btn = ctk.CTkButton(self.controls_frame, text="Export Serial Audit Log...", width=460, height=32,
+                                       fg_color="gray", command=controller.export_audit_log)
+        self.audit_btn.grid(row=8, column=0, columnspan=2, pady=(0, 10))
         
         self.refresh_ports()
 
@@ -468,6 +464,9 @@ class MainFrame(ctk.CTkFrame):
         
         self.debug_btn.configure(font=normal_font)
         self.egram_btn.configure(font=normal_font)
+        self.import_btn.configure(font=normal_font)
+        self.export_btn.configure(font=normal_font)
+        self.audit_btn.configure(font=normal_font)
             
         controls = [self.port_dropdown, self.refresh_btn, self.connect_btn, self.disconnect_btn, self.logout_btn]
         for ctrl in controls:
@@ -485,7 +484,7 @@ class MainFrame(ctk.CTkFrame):
     def _handle_connect(self):
         selected_port = self.port_var.get()
         if not selected_port or selected_port == "No Ports" or selected_port == "Select Port...":
-            messagebox.showerror("Error", "Please select a valid COM port.")
+            self.controller.notify(notifications.ERROR, "Error", "Please select a valid COM port.")
             return
         self.controller.connect_serial(selected_port)
 
@@ -0,0 +1,134 @@
+# views/notifications.py
+"""
+In-window, non-modal notifications (toasts).
+
+Toasts stack in the top-right corner of the window and go away on their
+own (errors stay until dismissed). Nothing waits for the user, so the Tk
+loop, and with it egram rendering, keeps running while one is shown. At
+most MAX_VISIBLE are on screen; the rest wait in a bounded queue. Posting
+a message that is already showing bumps its count instead of stacking a
+duplicate.
+"""
+from collections import deque
+
+import customtkinter as ctk
+
+INFO = "info"
+SUCCESS = "success"
+WARNING = "warning"
+ERROR = "error"
+
+# severity -> (accent colour, seconds on screen; None = until dismissed)
+SEVERITY_STYLES = {
+    INFO: ("#3b82f6", 4.0),
+    SUCCESS: ("#22c55e", 3.0),
+    WARNING: ("#f59e0b", 8.0),
+    ERROR: ("#ef4444", None),
+}
+
+MAX_VISIBLE = 3
+MAX_PENDING = 20
+TOAST_WIDTH = 320
+
+
+class Toast(ctk.CTkFrame):
+    def __init__(self, parent, stack, severity: str, title: str, message: str, font_size: int):
+        accent, _ = SEVERITY_STYLES[severity]
+        super().__init__(parent, width=TOAST_WIDTH, border_width=2, border_color=accent, corner_radius=8)
+        self.stack = stack
+        self.severity = severity
+        self.key = (severity, title, message)
+        self.title = title
+        self.count = 1
+        self.dismiss_job = None
+
+        self.grid_columnconfigure(0, weight=1)
+        self.title_label = ctk.CTkLabel(self, text=title, text_color=accent, anchor="w",
+                                        font=ctk.CTkFont(family="Helvetica", size=font_size, weight="bold"))
+        self.title_label.grid(row=0, column=0, sticky="ew", padx=(10, 0), pady=(6, 0))
+        ctk.CTkButton(self, text="×", width=24, height=24, fg_color="transparent",
+                      text_color=("gray20", "gray80"), hover_color=("gray80", "gray30"),
+                      command=lambda: stack.dismiss(self)).grid(row=0, column=1, padx=4, pady=(4, 0))
+        self.message_label = ctk.CTkLabel(self, text=message, anchor="w", justify="left",
+                                          wraplength=TOAST_WIDTH - 30,
+                                          font=ctk.CTkFont(family="Helvetica", size=font_size - 2))
+        self.message_label.grid(row=1, column=0, columnspan=2, sticky="ew", padx=10, pady=(0, 8))
+
+    def bump(self):
+        self.count += 1
+        self.title_label.configure(text=f"{self.title} (×{self.count})")
+
+
+class ToastStack:
+    """Owns the toasts shown over one window. Tk thread only (post from workers via the bus)."""
+
+    def __init__(self, root, font_size: int = 14):
+        self.root = root
+        self.font_size = font_size
+        self._visible: list[Toast] = []
+        self._pending: deque = deque()
+
+    def show(self, severity: str, title: str, message: str):
+        if severity not in SEVERITY_STYLES:
+            severity = INFO
+        key = (severity, title, message)
+        for toast in self._visible:
+            if toast.key == key:
+                toast.bump()
+                self._arm_timer(toast)
+                return
+        if key in self._pending:
+            return
+        if len(self._visible) < MAX_VISIBLE:
+            self._open(*key)
+            return
+        if len(self._pending) >= MAX_PENDING:
+            # Drop the oldest non-error; errors are never dropped for other messages
+            droppable = [k for k in self._pending if k[0] != ERROR]
+            if not droppable:
+                return
+            self._pending.remove(droppable[0])
+        self._pending.append(key)
+
+    def dismiss(self, toast: Toast):
+        if toast not in self._visible:
+            return
+        if toast.dismiss_job is not None:
+            toast.after_cancel(toast.dismiss_job)
+        self._visible.remove(toast)
+        toast.destroy()
+        while self._pending and len(self._visible) < MAX_VISIBLE:
+            self._open(*self._pending.popleft())
+        self._layout()
+
+    def clear(self):
+        self._pending.clear()
+        for toast in list(self._visible):
+            self.dismiss(toast)
+
+    def update_font_size(self, size: int):
+        # Applies to toasts opened from now on
+        self.font_size = size
+
+    def _open(self, severity: str, title: str, message: str):
+        toast = Toast(self.root, self, severity, title, message, self.font_size)
+        self._visible.append(toast)
+        self._arm_timer(toast)
+        self._layout()
+
+    def _arm_timer(self, toast: Toast):
+        _, seconds = SEVERITY_STYLES[toast.severity]
+        if toast.dismiss_job is not None:
+            toast.after_cancel(toast.dismiss_job)
+            toast.dismiss_job = None
+        if seconds is not None:
+            toast.dismiss_job = toast.after(int(seconds * 1000), lambda: self.dismiss(toast))
+
+    def _layout(self):
+        # Newest on top; place() overlays the current screen without reflowing it
+        y = 10
+        for toast in reversed(self._visible):
+            toast.place(relx=1.0, x=-10, y=y, anchor="ne")
+            toast.lift()
+            toast.update_idletasks()  # so reqheight reflects the wrapped message
+            y += toast.winfo_reqheight() + 8